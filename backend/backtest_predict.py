@@ -0,0 +1,106 @@
+"""
+World-Studio.live - Walk-Forward Backtest
+=========================================
+
+Evaluates each model and the ensemble of predict_stock.py over rolling
+walk-forward folds of many symbols, in parallel across cores, and fits
+ensemble weights from the out-of-fold forecasts. The fitted blend is
+scored out of sample: each test period with weights fitted on the
+earlier ones only.
+
+Usage:
+    python backtest_predict.py                           # All supported symbols
+    python backtest_predict.py AAPL MSFT BTC-USD         # Selected symbols
+    python backtest_predict.py --fixtures recorded/      # Recorded CSV bars
+    python backtest_predict.py --models rf,gb,xgb -o backtest.json
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import predict_stock as ps  # noqa: E402
+
+
+def load_frames(symbols: List[str], years: int, fixtures: Optional[str]) -> Dict[str, pd.DataFrame]:
+    """Bars from recorded <SYMBOL>.csv files, else the local store / Yahoo."""
+    if not fixtures:
+        return ps.prefetch_stock_data(symbols, years)
+
+    frames = {}
+    for symbol in symbols:
+        path = os.path.join(fixtures, f"{symbol}.csv")
+        if os.path.exists(path):
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+            frames[symbol] = df[ps.OHLCV_COLUMNS].dropna()
+    return frames
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the prediction ensemble.")
+    parser.add_argument("symbols", nargs="*", help="symbols (default: all supported)")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--fixtures", help="directory of recorded <SYMBOL>.csv bars")
+    parser.add_argument("--models", default="rf,gb,xgb,lstm")
+    parser.add_argument("--train-window", type=int, default=ps.BACKTEST_TRAIN_WINDOW)
+    parser.add_argument("--test-window", type=int, default=ps.BACKTEST_TEST_WINDOW)
+    parser.add_argument("--max-folds", type=int, default=ps.BACKTEST_MAX_FOLDS)
+    parser.add_argument("--lstm-epochs", type=int, default=30)
+    parser.add_argument("--workers", type=int, help="processes (default: all cores, 0 = inline)")
+    parser.add_argument("-o", "--output", help="write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.fixtures and not args.symbols:
+        args.symbols = sorted(
+            os.path.splitext(n)[0] for n in os.listdir(args.fixtures) if n.endswith(".csv"))
+    symbols = [s.upper() for s in args.symbols] or ps.SUPPORTED_STOCKS + ps.SUPPORTED_CRYPTO
+
+    frames = load_frames(symbols, args.years, args.fixtures)
+    missing = sorted(set(symbols) - set(frames))
+    if missing:
+        print(f"No data for: {', '.join(missing)}")
+
+    report = ps.walk_forward_backtest(
+        frames,
+        models=tuple(m.strip() for m in args.models.split(",") if m.strip()),
+        train_window=args.train_window,
+        test_window=args.test_window,
+        max_folds=args.max_folds,
+        lstm_epochs=args.lstm_epochs,
+        workers=args.workers
+    )
+
+    print(f"{report['symbols']} symbols, {report['folds']} folds in {report['elapsed']}s\n")
+    print(f"{'model':<16}{'MAE':>10}{'RMSE':>10}{'MAPE %':>10}{'R2':>10}{'Dir %':>10}")
+    rows = dict(report["models"])
+    rows["ensemble"] = report["ensemble"]
+    held_out = report["heldOut"]
+    if held_out:
+        rows["ensemble *"] = held_out["ensemble"]
+        rows["fitted ens. *"] = held_out["fittedEnsemble"]
+    for name, m in rows.items():
+        print(f"{name:<16}{m['mae']:>10.4f}{m['rmse']:>10.4f}{m['mape']:>10.4f}"
+              f"{m['r2']:>10.4f}{m['directionAccuracy']:>10.2f}")
+    if held_out:
+        print(f"\n* the {held_out['periods']} later test periods only; fitted weights "
+              f"there come from earlier periods (out of sample)")
+    else:
+        print("\n(one test period: no out-of-sample score for fitted weights)")
+    print(f"\ndefault weights: {report['defaultWeights']}")
+    print(f"fitted weights:  {report['fittedWeights']} (all folds, in-sample)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+"""
+World-Studio.live - Prediction Pipeline Benchmarks
+==================================================
+
+Offline benchmark suite for predict_stock.py. Every stage of the
+pipeline is timed on synthetic (or recorded) daily bars served from a
+throw-away local OHLCV store, so no network access is needed.
+
+Stages:
+- fetch_stock_data (local store)
+- add_technical_features / build_feature_panel
+- prepare_features / create_sequences
+- train_random_forest / train_gradient_boosting / train_xgboost / train_lstm
+- ensemble_predict / InferenceEngine.predict (native vs compiled serving)
+- predict_stock end-to-end (cold: full training, warm: registry hit)
+
+Usage:
+    python benchmark_predict.py                          # Default matrix
+    python benchmark_predict.py --quick                  # Smoke run
+    python benchmark_predict.py --fixtures recorded/     # Recorded CSV bars
+    python benchmark_predict.py -o bench.json --baseline baseline.json
+    python benchmark_predict.py -o baseline.json         # Record a baseline
+
+Results are written as JSON. With --baseline, each stage's median is
+compared against the baseline and the exit code is 1 if any stage got
+slower than the allowed tolerance.
+"""
+
+import os
+import sys
+import atexit
+import json
+import math
+import time
+import argparse
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+
+# The pipeline reads its configuration at import time: point the stores
+# at a scratch directory and keep everything in-process.
+_SCRATCH = tempfile.mkdtemp(prefix="predict-bench-")
+atexit.register(shutil.rmtree, _SCRATCH, ignore_errors=True)
+os.environ["MODEL_DIR"] = os.path.join(_SCRATCH, "models")
+os.environ["DATA_DIR"] = os.path.join(_SCRATCH, "data")
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["PREDICT_WORKERS"] = "0"
+os.environ["NEWS_API_KEY"] = ""
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import predict_stock as ps  # noqa: E402
+from synthetic_data import synthetic_bars  # noqa: E402
+
+ps.logger.setLevel("WARNING")
+
+
+# ===========================================
+# FIXTURES
+# ===========================================
+
+def load_recorded(path: str) -> Dict[str, pd.DataFrame]:
+    """Recorded bars: one <SYMBOL>.csv per symbol with OHLCV columns."""
+    frames = {}
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(".csv"):
+            continue
+        df = pd.read_csv(os.path.join(path, name), index_col=0, parse_dates=True)
+        df.index = pd.DatetimeIndex(df.index).tz_localize(None)
+        frames[os.path.splitext(name)[0].upper()] = df[ps.OHLCV_COLUMNS].dropna()
+    return frames
+
+
+def install_fixture(symbol: str, df: pd.DataFrame):
+    """Store bars locally and mark them fresh so no download is attempted."""
+    now = datetime.now().timestamp()
+    ps.ohlcv_store.write(symbol, df)
+    ps.ohlcv_store._write_meta(symbol, {"covered_from": 0, "full_at": now, "checked_at": now})
+
+
+def history_years(df: pd.DataFrame) -> int:
+    """fetch_stock_data() window that covers the whole fixture."""
+    days = (datetime.now() - df.index[0].to_pydatetime()).days
+    return max(1, math.ceil(days / 365) + 1)
+
+
+# ===========================================
+# TIMING
+# ===========================================
+
+def time_call(fn: Callable[[], Any], repeat: int, warmup: bool = True) -> List[float]:
+    """Wall-clock seconds for repeat calls of fn."""
+    if warmup:
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def record(results: List[Dict[str, Any]], stage: str, n_bars: int,
+           n_symbols: int, times: List[float]):
+    results.append({
+        "stage": stage,
+        "bars": n_bars,
+        "symbols": n_symbols,
+        "repeat": len(times),
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times)
+    })
+    print(f"  {stage:<28} {n_bars:>6} bars x{n_symbols:<3} "
+          f"median {statistics.median(times) * 1000:10.2f} ms")
+
+
+# ===========================================
+# BENCHMARKS
+# ===========================================
+
+def bench_data_stages(
+    results: List[Dict[str, Any]],
+    frames: Dict[str, pd.DataFrame],
+    n_bars: int,
+    repeat: int
+):
+    """Stages that run once per symbol: fetch, features, sequences, inference."""
+    symbols = list(frames)
+    years = {s: history_years(frames[s]) for s in symbols}
+
+    record(results, "fetch_stock_data", n_bars, len(symbols), time_call(
+        lambda: [ps.fetch_stock_data(s, years[s]) for s in symbols], repeat))
+
+    record(results, "add_technical_features", n_bars, len(symbols), time_call(
+        lambda: [ps.add_technical_features(frames[s]) for s in symbols], repeat))
+
+    ohlcv = np.stack([frames[s][ps.OHLCV_COLUMNS].to_numpy() for s in symbols])
+    record(results, "build_feature_panel", n_bars, len(symbols), time_call(
+        lambda: ps.build_feature_panel(ohlcv), repeat))
+
+    featured = {s: ps.add_technical_features(frames[s]) for s in symbols}
+    record(results, "prepare_features", n_bars, len(symbols), time_call(
+        lambda: [ps.prepare_features(featured[s]) for s in symbols], repeat))
+
+    prepared = {s: ps.prepare_features(featured[s])[:2] for s in symbols}
+    record(results, "create_sequences", n_bars, len(symbols), time_call(
+        lambda: [ps.create_sequences(prepared[s][0], prepared[s][1]) for s in symbols],
+        repeat))
+
+
+def bench_model_stages(
+    results: List[Dict[str, Any]],
+    df: pd.DataFrame,
+    n_bars: int,
+    repeat: int,
+    lookback: int = 20
+) -> Dict[str, Any]:
+    """Training and inference on one symbol's history; returns the models."""
+    X, y, _, _ = ps.prepare_features(ps.add_technical_features(df))
+    X_seq, y_seq = ps.create_sequences(X, y, lookback)
+    split_idx = int(len(X) * 0.8)
+    X_train, y_train = X[:split_idx], y[:split_idx]
+    seq_split = split_idx - lookback
+
+    trainers = [
+        ("train_random_forest", lambda: ps.train_random_forest(X_train, y_train)),
+        ("train_gradient_boosting", lambda: ps.train_gradient_boosting(X_train, y_train)),
+    ]
+    if ps.HAS_XGB:
+        trainers.append(("train_xgboost", lambda: ps.train_xgboost(X_train, y_train)))
+    if seq_split > 10:
+        trainers.append(("train_lstm", lambda: ps.train_lstm(
+            X_seq[:seq_split], y_seq[:seq_split], n_features=X.shape[1], epochs=30)))
+
+    for stage, train in trainers:
+        record(results, stage, n_bars, 1, time_call(train, repeat, warmup=False))
+
+    models = ps.train_models(X, y, X_seq, y_seq, lookback)
+    X_last, _ = ps.create_sequences(X, y, lookback, last_only=True)
+    record(results, "ensemble_predict", n_bars, 1, time_call(
+        lambda: ps.ensemble_predict(models, X, X_last), repeat))
+    engine = ps.InferenceEngine.from_models(models, X.shape[1], lookback)
+    record(results, "engine_predict", n_bars, 1, time_call(
+        lambda: engine.predict(X[[-1]], X_last), repeat))
+    return models
+
+
+def register_models(frames: Dict[str, pd.DataFrame], models: Dict[str, Any], lookback: int = 20):
+    """
+    Register one trained model set for every symbol, so the warm
+    end-to-end stage measures the serving path without training each.
+    """
+    for symbol, df in frames.items():
+        featured = ps.add_technical_features(df, 0.0)
+        _, _, features, scaler = ps.prepare_features(featured)
+        ps.model_registry.put(
+            symbol, ps.data_fingerprint(featured, lookback), models, scaler,
+            features, lookback)
+
+
+def bench_end_to_end(
+    results: List[Dict[str, Any]],
+    frames: Dict[str, pd.DataFrame],
+    n_bars: int,
+    repeat: int,
+    cold: bool
+):
+    """predict_stock() with (cold) or without (warm) model training."""
+    symbols = list(frames)
+    years = {s: history_years(frames[s]) for s in symbols}
+    fetch = ps.fetch_stock_data
+
+    # predict_stock() uses the default 5-year window; widen it for
+    # fixtures that reach further back.
+    ps.fetch_stock_data = lambda symbol, years_=5: fetch(symbol, years.get(symbol, years_))
+
+    def run():
+        if cold:
+            ps.model_registry.clear()
+            ps.cache_backend.clear()
+            shutil.rmtree(ps.cache_backend.artifact_dir, ignore_errors=True)
+        for s in symbols:
+            ps.predict_stock(s, use_cache=False, sentiment=0.0)
+
+    try:
+        stage = "predict_stock_cold" if cold else "predict_stock_warm"
+        record(results, stage, n_bars, len(symbols), time_call(run, repeat, warmup=not cold))
+    finally:
+        ps.fetch_stock_data = fetch
+
+
+# ===========================================
+# BASELINE COMPARISON
+# ===========================================
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    tolerance: float,
+    min_delta: float
+) -> List[str]:
+    """Stages whose median got slower than baseline * (1 + tolerance)."""
+    previous = {(r["stage"], r["bars"], r["symbols"]): r for r in baseline}
+    regressions = []
+
+    for r in results:
+        base = previous.get((r["stage"], r["bars"], r["symbols"]))
+        if base is None:
+            continue
+        slower = r["median"] - base["median"]
+        if r["median"] > base["median"] * (1 + tolerance) and slower > min_delta:
+            regressions.append(
+                f"{r['stage']} ({r['bars']} bars x{r['symbols']}): "
+                f"{base['median'] * 1000:.2f} ms -> {r['median'] * 1000:.2f} ms "
+                f"(+{slower / base['median'] * 100:.0f}%)")
+
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "torch": ps.torch.__version__,
+        "xgboost": ps.xgb.__version__ if ps.HAS_XGB else None
+    }
+
+
+# ===========================================
+# MAIN
+# ===========================================
+
+def parse_ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the prediction pipeline offline.")
+    parser.add_argument("--bars", type=parse_ints, default=[250, 750, 1250],
+                        help="history lengths in bars (comma separated)")
+    parser.add_argument("--symbols", type=parse_ints, default=[1, 10, 50],
+                        help="symbol counts for per-symbol stages (comma separated)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed runs of the fast stages")
+    parser.add_argument("--train-repeat", type=int, default=1,
+                        help="timed runs of the training stages")
+    parser.add_argument("--fixtures", help="directory of recorded <SYMBOL>.csv bars")
+    parser.add_argument("--no-train", action="store_true",
+                        help="skip training and end-to-end stages")
+    parser.add_argument("--quick", action="store_true",
+                        help="small matrix for a smoke run")
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.005,
+                        help="ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.bars, args.symbols, args.repeat = [250], [1, 5], 2
+
+    recorded = load_recorded(args.fixtures) if args.fixtures else {}
+    results: List[Dict[str, Any]] = []
+
+    for n_bars in args.bars:
+        print(f"\n{n_bars} bars")
+        models = None
+
+        for n_symbols in args.symbols:
+            if recorded:
+                chosen = [s for s in recorded if len(recorded[s]) >= n_bars][:n_symbols]
+                if len(chosen) < n_symbols:
+                    print(f"  skipping x{n_symbols}: only {len(chosen)} fixtures "
+                          f"with {n_bars}+ bars")
+                    continue
+                frames = {s: recorded[s].iloc[-n_bars:] for s in chosen}
+            else:
+                frames = {f"SYN{i:03d}": synthetic_bars(n_bars, seed=i)
+                          for i in range(n_symbols)}
+
+            for symbol, df in frames.items():
+                install_fixture(symbol, df)
+
+            if models is None and not args.no_train:
+                # Training is per symbol: measure it once per history length
+                first = dict(list(frames.items())[:1])
+                models = bench_model_stages(
+                    results, next(iter(first.values())), n_bars, args.train_repeat)
+                bench_end_to_end(results, first, n_bars, args.train_repeat, cold=True)
+
+            bench_data_stages(results, frames, n_bars, args.repeat)
+            if models is not None:
+                register_models(frames, models)
+                bench_end_to_end(results, frames, n_bars, args.repeat, cold=False)
+
+    report = {"environment": environment(), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions vs {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
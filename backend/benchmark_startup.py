@@ -0,0 +1,155 @@
+"""
+World-Studio.live - Startup Benchmark
+=====================================
+
+Tracks cold-start cost of predict_stock.py, each measurement in a fresh
+interpreter:
+- import: importing the module (heavy libraries are lazy)
+- import_warm: import plus warm_imports() (everything a prediction needs)
+- first_response: launching uvicorn until GET /health answers
+- first_supported: launching uvicorn until GET /supported answers
+
+Usage:
+    python benchmark_startup.py                        # 5 runs each
+    python benchmark_startup.py -o startup.json --baseline baseline.json
+"""
+
+import os
+import sys
+import shutil
+import atexit
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import tempfile
+import urllib.request
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRATCH = tempfile.mkdtemp(prefix="startup-bench-")
+atexit.register(shutil.rmtree, SCRATCH, ignore_errors=True)
+
+
+def _env() -> Dict[str, str]:
+    """Offline, side-effect free settings for the measured processes."""
+    env = dict(os.environ)
+    env.update({
+        "MODEL_DIR": os.path.join(SCRATCH, "models"),
+        "DATA_DIR": os.path.join(SCRATCH, "data"),
+        "CACHE_BACKEND": "memory",
+        "PREWARM_CONCURRENCY": "0",
+        "IMPORT_WARMUP": "false",
+        "PYTHONDONTWRITEBYTECODE": "1"
+    })
+    return env
+
+
+def time_import(warm: bool) -> float:
+    code = (
+        "import time; t = time.perf_counter(); import predict_stock as ps; "
+        + ("ps.warm_imports(); " if warm else "")
+        + "print(time.perf_counter() - t)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=HERE, env=_env(),
+        capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_first_response(path: str, timeout: float = 120) -> float:
+    """Seconds from launching the server until path returns 200."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "predict_stock:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=HERE, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError(f"no response from {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def summarize(stage: str, times: List[float]) -> Dict[str, Any]:
+    result = {
+        "stage": stage,
+        "repeat": len(times),
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times)
+    }
+    print(f"  {stage:<18} median {result['median'] * 1000:9.1f} ms "
+          f"(min {result['min'] * 1000:.1f}, max {result['max'] * 1000:.1f})")
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark cold start of the prediction service.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", default="startup_results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = [
+        summarize("import", [time_import(False) for _ in range(args.repeat)]),
+        summarize("import_warm", [time_import(True) for _ in range(args.repeat)]),
+        summarize("first_response", [time_first_response("/health") for _ in range(args.repeat)]),
+        summarize("first_supported", [time_first_response("/supported") for _ in range(args.repeat)]),
+    ]
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "environment": {
+                "timestamp": datetime.utcnow().isoformat(),
+                "python": sys.version.split()[0],
+                "cpus": os.cpu_count()
+            },
+            "results": results
+        }, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {r["stage"]: r for r in json.load(f)["results"]}
+        regressions = [
+            f"{r['stage']}: {baseline[r['stage']]['median'] * 1000:.1f} ms -> "
+            f"{r['median'] * 1000:.1f} ms"
+            for r in results
+            if r["stage"] in baseline
+            and r["median"] > baseline[r["stage"]]["median"] * (1 + args.tolerance)
+        ]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions vs {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,660 @@
+"""
+World-Studio.live - Load Test
+=============================
+
+Async load generator for the HTTP and WebSocket endpoints of
+predict_stock.py. By default it starts the service locally on replayed
+market data (MARKET_DATA_PROVIDER=replay over synthetic or recorded
+bars), so runs are repeatable and need no network access.
+
+Scenarios (mixed with --mix, virtual users per scenario):
+- hot: GET /predict/{symbol} on symbols warmed before the run
+- cold: POST /predict with use_cache=false on symbols nobody warmed
+  (the first request per symbol trains its models)
+- quote: GET /quote/{symbol} and GET /quotes
+- batch: bursts of concurrent POST /predict/batch calls
+- ws: WebSocket subscribers per hot symbol (/ws); throughput is
+  messages received and latency is the age of each update on arrival
+
+Each stage scales every scenario by a multiplier (--stages 1,2,4,8), so
+the throughput ceiling shows up as the stage where req/s stops growing
+and latency or errors take off. Every stage reports throughput, latency
+percentiles and error rates per scenario (requests still running when
+the stage ends are dropped and counted), the server's CPU and memory
+(the whole process tree when started locally, else the process_* gauges
+from /metrics) and admission / cache counters.
+
+Usage:
+    python loadtest_predict.py                                # Default mix, 30 s
+    python loadtest_predict.py --stages 1,2,4,8               # Find the ceiling
+    python loadtest_predict.py --mix hot=32,ws=50 --duration 60
+    python loadtest_predict.py --fixtures recorded/ --latency-ms 80
+    python loadtest_predict.py --url http://staging:8000 --hot AAPL,MSFT
+    python loadtest_predict.py -o load.json --baseline baseline.json
+
+Results are written as JSON. With --baseline, the exit code is 1 if any
+scenario lost more throughput or gained more p99 latency than allowed.
+
+Requires httpx and websockets on top of the service's own dependencies:
+    pip install httpx websockets
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import random
+import shutil
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import urllib.request
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+try:
+    import httpx
+    import websockets
+except ImportError as e:
+    sys.exit(f"The load test needs httpx and websockets "
+             f"(pip install httpx websockets): {e}")
+
+from synthetic_data import write_bars
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRATCH = tempfile.mkdtemp(prefix="loadtest-")
+atexit.register(shutil.rmtree, SCRATCH, ignore_errors=True)
+
+SCENARIOS = ("hot", "cold", "quote", "batch", "ws")
+DEFAULT_MIX = "hot=16,cold=2,quote=8,batch=1,ws=10"
+DEFAULT_REMOTE_HOT = "AAPL,MSFT,NVDA,BTC-USD"
+
+# /metrics values compared before and after each stage
+COUNTERS = {
+    "process_cpu_seconds_total": "cpuSeconds",
+    "predict_admission_rejected_total": "rejected",
+    "predict_deadline_exceeded_total": "deadlineExceeded",
+    "predict_cache_hits_total": "cacheHits",
+    "predict_cache_misses_total": "cacheMisses",
+    "quote_upstream_calls_total": "quoteUpstreamCalls",
+    "model_registry_evictions_total": "modelEvictions",
+}
+
+
+# ===========================================
+# FIXTURES / LOCAL SERVER
+# ===========================================
+
+def _env(replay_dir: str, args: argparse.Namespace) -> Dict[str, str]:
+    """Offline settings for the server under test (tunables pass through)."""
+    env = dict(os.environ)
+    env.update({
+        "MODEL_DIR": os.path.join(SCRATCH, "models"),
+        "DATA_DIR": os.path.join(SCRATCH, "data"),
+        "CACHE_BACKEND": "memory",
+        "MARKET_DATA_PROVIDER": "replay",
+        "REPLAY_DIR": replay_dir,
+        "REPLAY_LATENCY_MS": str(args.latency_ms),
+        "REPLAY_JITTER_MS": str(args.jitter_ms),
+        "REPLAY_SPEED": str(args.replay_speed),
+        "PREWARM_CONCURRENCY": "0",
+        "NEWS_API_KEY": "",
+        "PYTHONDONTWRITEBYTECODE": "1"
+    })
+    env.setdefault("WS_MIN_INTERVAL", "1")
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(replay_dir: str, args: argparse.Namespace, timeout: float = 120):
+    """Launch uvicorn on replayed data; returns (process, base url)."""
+    port = _free_port()
+    log = open(os.path.join(SCRATCH, "server.log"), "w")
+    cmd = [sys.executable, "-m", "uvicorn", "predict_stock:app",
+           "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    if args.server_workers > 1:
+        cmd += ["--workers", str(args.server_workers)]
+    server = subprocess.Popen(
+        cmd, cwd=HERE, env=_env(replay_dir, args), stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if server.poll() is not None:
+            break
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=1) as r:
+                if r.status == 200:
+                    return server, url
+        except OSError:
+            time.sleep(0.1)
+
+    stop_server(server)
+    with open(log.name) as f:
+        print(f.read()[-2000:])
+    raise RuntimeError("server did not start")
+
+
+def stop_server(server: subprocess.Popen):
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+class ProcessTree:
+    """CPU time and resident memory of a process and its descendants (Linux /proc)."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.tick = os.sysconf("SC_CLK_TCK")
+        self.page = os.sysconf("SC_PAGE_SIZE")
+
+    @staticmethod
+    def _stat(pid: int) -> List[str]:
+        # Fields after the parenthesised command name, starting at state
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()
+
+    def _pids(self) -> List[int]:
+        children: Dict[int, List[int]] = {}
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                try:
+                    children.setdefault(int(self._stat(int(name))[1]), []).append(int(name))
+                except (OSError, IndexError, ValueError):
+                    continue
+
+        pids, todo = [], [self.pid]
+        while todo:
+            pid = todo.pop()
+            pids.append(pid)
+            todo.extend(children.get(pid, []))
+        return pids
+
+    def sample(self) -> Dict[str, float]:
+        cpu, rss, processes = 0.0, 0, 0
+        for pid in self._pids():
+            try:
+                fields = self._stat(pid)
+                with open(f"/proc/{pid}/statm") as f:
+                    rss += int(f.read().split()[1]) * self.page
+                cpu += (int(fields[11]) + int(fields[12])) / self.tick
+                processes += 1
+            except (OSError, IndexError, ValueError):
+                continue
+        return {"cpu": cpu, "rss": rss, "processes": processes}
+
+
+# ===========================================
+# VIRTUAL USERS
+# ===========================================
+
+class Stats:
+    """Outcomes of one scenario during one stage."""
+
+    def __init__(self, scenario: str, users: int):
+        self.scenario = scenario
+        self.users = users
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.connects: List[float] = []
+        self.dropped = 0  # still in flight when the stage ended
+
+    def record(self, seconds: Optional[float], outcome: str):
+        self.outcomes[outcome] += 1
+        if seconds is not None:
+            self.latencies.append(seconds)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        total = sum(self.outcomes.values())
+        errors = total - self.outcomes["ok"]
+        result = {
+            "scenario": self.scenario,
+            "users": self.users,
+            "requests": total,
+            "throughput": round(self.outcomes["ok"] / elapsed, 2),
+            "errorRate": round(errors / total, 4) if total else 0.0,
+            "errors": {k: v for k, v in self.outcomes.items() if k != "ok"},
+            "dropped": self.dropped,
+            "latency": percentiles(self.latencies)
+        }
+        if self.scenario == "ws":
+            result["connect"] = percentiles(self.connects)
+        return result
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p90/p99/max in milliseconds."""
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    values = sorted(values)
+
+    def at(q: float) -> float:
+        return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 2)
+
+    return {"p50": at(0.5), "p90": at(0.9), "p99": at(0.99), "max": round(values[-1] * 1000, 2)}
+
+
+class SymbolPools:
+    """Hot symbols are warmed before the run; cold ones are handed out in turn."""
+
+    def __init__(self, hot: List[str], cold: List[str]):
+        self.hot = hot
+        self.cold = cold
+        self.touched: set = set()
+        self._next = 0
+
+    def next_cold(self) -> str:
+        symbol = self.cold[self._next % len(self.cold)]
+        self._next += 1
+        return symbol
+
+    @property
+    def all(self) -> List[str]:
+        return self.hot + self.cold
+
+
+async def timed(stats: Stats, request) -> Optional[httpx.Response]:
+    started = time.perf_counter()
+    response = None
+    try:
+        response = await request
+        outcome = "ok" if response.status_code < 400 else f"http_{response.status_code}"
+    except asyncio.CancelledError:
+        stats.dropped += 1
+        raise
+    except httpx.TimeoutException:
+        outcome = "timeout"
+    except httpx.HTTPError as e:
+        outcome = type(e).__name__
+    stats.record(time.perf_counter() - started, outcome)
+    return response
+
+
+async def hot_user(client: httpx.AsyncClient, stats: Stats, pools: SymbolPools, args):
+    params = {"deadline": args.deadline} if args.deadline else {}
+    while True:
+        await timed(stats, client.get(f"/predict/{random.choice(pools.hot)}", params=params))
+        await asyncio.sleep(args.think_ms / 1000)
+
+
+async def cold_user(client: httpx.AsyncClient, stats: Stats, pools: SymbolPools, args):
+    while True:
+        symbol = pools.next_cold()
+        pools.touched.add(symbol)
+        body = {"symbol": symbol, "use_cache": False, "deadline": args.deadline}
+        await timed(stats, client.post("/predict", json=body))
+        await asyncio.sleep(args.think_ms / 1000)
+
+
+async def quote_user(client: httpx.AsyncClient, stats: Stats, pools: SymbolPools, args):
+    while True:
+        if random.random() < 0.5:
+            request = client.get(f"/quote/{random.choice(pools.all)}")
+        else:
+            symbols = random.sample(pools.all, min(10, len(pools.all)))
+            request = client.get("/quotes", params={"symbols": ",".join(symbols)})
+        await timed(stats, request)
+        await asyncio.sleep(args.think_ms / 1000)
+
+
+async def batch_user(client: httpx.AsyncClient, stats: Stats, pools: SymbolPools, args):
+    """Bursts of concurrent batch calls, then a pause."""
+    size = min(args.batch_size, len(pools.all))
+    while True:
+        await asyncio.gather(*(
+            timed(stats, client.post("/predict/batch", json={
+                "symbols": random.sample(pools.all, size), "deadline": args.deadline}))
+            for _ in range(args.batch_burst)))
+        await asyncio.sleep(args.batch_pause)
+
+
+async def ws_user(url: str, stats: Stats, symbol: str, args):
+    """One subscriber; reconnects after a second if the socket drops."""
+    while True:
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(url, open_timeout=args.timeout, max_size=None) as ws:
+                stats.connects.append(time.perf_counter() - started)
+                await ws.send(json.dumps(
+                    {"action": "subscribe", "symbols": [symbol], "interval": args.ws_interval}))
+                async for raw in ws:
+                    message = json.loads(raw)
+                    if "error" in message:
+                        stats.record(None, "update_error")
+                        continue
+                    age = datetime.utcnow() - datetime.fromisoformat(message["timestamp"])
+                    stats.record(max(0.0, age.total_seconds()), "ok")
+            stats.record(None, "closed")
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+            stats.record(None, type(e).__name__)
+        await asyncio.sleep(1)
+
+
+# ===========================================
+# STAGES
+# ===========================================
+
+async def scrape(client: httpx.AsyncClient) -> Dict[str, float]:
+    """Unlabelled samples from /metrics ({} if it cannot be read)."""
+    try:
+        response = await client.get("/metrics", timeout=10)
+    except httpx.HTTPError:
+        return {}
+
+    values = {}
+    for line in response.text.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and not line.startswith("#") and "{" not in parts[0]:
+            try:
+                values[parts[0]] = float(parts[1])
+            except ValueError:
+                continue
+    return values
+
+
+async def sample_tree(tree: ProcessTree, samples: List[Dict[str, float]], period: float = 0.5):
+    while True:
+        samples.append(tree.sample())
+        await asyncio.sleep(period)
+
+
+def server_summary(
+    elapsed: float,
+    before: Dict[str, float],
+    after: Dict[str, float],
+    samples: List[Dict[str, float]]
+) -> Dict[str, Any]:
+    deltas = {
+        key: round(after[name] - before[name], 3) if name == "process_cpu_seconds_total"
+        else int(after[name] - before[name])
+        for name, key in COUNTERS.items() if name in before and name in after
+    }
+    server: Dict[str, Any] = {k: v for k, v in deltas.items() if k != "cpuSeconds"}
+
+    if samples:
+        cpu = samples[-1]["cpu"] - samples[0]["cpu"]
+        server.update({
+            "source": "proc",
+            "rssEndBytes": samples[-1]["rss"],
+            "rssPeakBytes": max(s["rss"] for s in samples),
+            "processes": max(s["processes"] for s in samples)
+        })
+    else:
+        cpu = deltas.get("cpuSeconds")
+        server.update({
+            "source": "metrics",
+            "rssEndBytes": after.get("process_resident_memory_bytes"),
+            "rssPeakBytes": after.get("process_max_resident_memory_bytes")
+        })
+    server["cpuSeconds"] = round(cpu, 3) if cpu is not None else None
+    server["cores"] = round(cpu / elapsed, 2) if cpu is not None else None
+
+    lookups = deltas.get("cacheHits", 0) + deltas.get("cacheMisses", 0)
+    server["cacheHitRatio"] = round(deltas["cacheHits"] / lookups, 4) if lookups else None
+    server["modelBytes"] = after.get("model_registry_bytes")
+    return server
+
+
+async def run_stage(
+    base_url: str,
+    mix: Dict[str, int],
+    multiplier: float,
+    pools: SymbolPools,
+    tree: Optional[ProcessTree],
+    args: argparse.Namespace
+) -> Dict[str, Any]:
+    users = {s: max(0, round(n * multiplier)) for s, n in mix.items()}
+    users["ws"] = users.get("ws", 0) * len(pools.hot)  # per hot symbol
+    stats = {s: Stats(s, n) for s, n in users.items() if n}
+    ws_url = base_url.replace("http", "ws", 1) + "/ws"
+    cold_before = len(pools.touched)
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        before = await scrape(client)
+        samples: List[Dict[str, float]] = []
+
+        tasks = []
+        if tree is not None:
+            tasks.append(asyncio.create_task(sample_tree(tree, samples)))
+        workers = {"hot": hot_user, "cold": cold_user, "quote": quote_user, "batch": batch_user}
+        for scenario, user in workers.items():
+            for _ in range(users.get(scenario, 0)):
+                tasks.append(asyncio.create_task(user(client, stats[scenario], pools, args)))
+        for i in range(users["ws"]):
+            symbol = pools.hot[i % len(pools.hot)]
+            tasks.append(asyncio.create_task(ws_user(ws_url, stats["ws"], symbol, args)))
+
+        started = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        elapsed = time.perf_counter() - started
+
+        # Requests still in flight are dropped, not counted
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tree is not None:
+            samples.append(tree.sample())
+        after = await scrape(client)
+
+    scenarios = [s.summary(elapsed) for s in stats.values()]
+    for scenario in scenarios:
+        if scenario["scenario"] == "cold":
+            scenario["firstTouches"] = len(pools.touched) - cold_before
+    return {
+        "multiplier": multiplier,
+        "duration": round(elapsed, 2),
+        "scenarios": scenarios,
+        "server": server_summary(elapsed, before, after, samples)
+    }
+
+
+async def warm_up(base_url: str, symbols: List[str], timeout: float):
+    """Predict every hot symbol once so the run starts from warm caches."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        for symbol in symbols:
+            response = await client.get(f"/predict/{symbol}")
+            if response.status_code != 200:
+                print(f"  warm-up of {symbol} failed: HTTP {response.status_code}")
+
+
+def print_stage(stage: Dict[str, Any]):
+    print(f"\nStage x{stage['multiplier']:g} ({stage['duration']} s)")
+    print(f"  {'scenario':<10}{'users':>7}{'req/s':>10}{'p50 ms':>10}"
+          f"{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>9}{'dropped':>9}")
+
+    def ms(value: Optional[float]) -> str:
+        return f"{value:10.1f}" if value is not None else f"{'-':>10}"
+
+    for s in stage["scenarios"]:
+        lat = s["latency"]
+        print(f"  {s['scenario']:<10}{s['users']:>7}{s['throughput']:>10.2f}{ms(lat['p50'])}"
+              f"{ms(lat['p90'])}{ms(lat['p99'])}{ms(lat['max'])}{s['errorRate'] * 100:>8.2f}%"
+              f"{s['dropped']:>9}")
+        if s["errors"]:
+            print(f"  {'':<10}errors: {s['errors']}")
+
+    server = stage["server"]
+
+    def mb(value: Optional[float]) -> str:
+        return f"{value / 2**20:.0f} MB" if value is not None else "-"
+
+    hit = server.get("cacheHitRatio")
+    print(f"  server: {server.get('cores')} cores, rss {mb(server.get('rssEndBytes'))} "
+          f"(peak {mb(server.get('rssPeakBytes'))}), rejected {server.get('rejected')}, "
+          f"deadline {server.get('deadlineExceeded')}, prediction cache hits "
+          f"{f'{hit * 100:.1f}%' if hit is not None else '-'}, "
+          f"quote upstream calls {server.get('quoteUpstreamCalls')}")
+
+
+# ===========================================
+# MAIN
+# ===========================================
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        name, _, users = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' ({', '.join(SCENARIOS)})")
+        mix[name.strip()] = int(users or 1)
+    return mix
+
+
+def split_symbols(value: Optional[str]) -> List[str]:
+    return [s.strip().upper() for s in (value or "").split(",") if s.strip()]
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> int:
+    with open(baseline_path) as f:
+        baseline = {
+            (stage["multiplier"], s["scenario"]): s
+            for stage in json.load(f)["stages"] for s in stage["scenarios"]
+        }
+
+    regressions = []
+    for stage in results:
+        for s in stage["scenarios"]:
+            base = baseline.get((stage["multiplier"], s["scenario"]))
+            if base is None:
+                continue
+            label = f"{s['scenario']} x{stage['multiplier']:g}"
+            if s["throughput"] < base["throughput"] * (1 - tolerance):
+                regressions.append(
+                    f"{label}: {base['throughput']:.1f} -> {s['throughput']:.1f} req/s")
+            p99, base_p99 = s["latency"]["p99"], base["latency"]["p99"]
+            if p99 is not None and base_p99 is not None and p99 > base_p99 * (1 + tolerance):
+                regressions.append(f"{label}: p99 {base_p99:.1f} ms -> {p99:.1f} ms")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) vs {baseline_path}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions vs {baseline_path}")
+    return 0
+
+
+async def run(base_url: str, mix: Dict[str, int], pools: SymbolPools,
+              tree: Optional[ProcessTree], args: argparse.Namespace) -> List[Dict[str, Any]]:
+    if pools.hot:
+        print(f"Warming {len(pools.hot)} hot symbols...")
+        await warm_up(base_url, pools.hot, max(args.timeout, 600))
+
+    stages = []
+    for multiplier in args.stages:
+        stage = await run_stage(base_url, mix, multiplier, pools, tree, args)
+        print_stage(stage)
+        stages.append(stage)
+    return stages
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the prediction service.")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"users per scenario (default {DEFAULT_MIX}; ws is per hot symbol)")
+    parser.add_argument("--stages", default="1",
+                        type=lambda v: [float(x) for x in v.split(",") if x.strip()],
+                        help="user multipliers, one stage each (e.g. 1,2,4,8)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per stage")
+    parser.add_argument("--hot", help="hot symbols (default: first --hot-count fixtures)")
+    parser.add_argument("--cold", help="cold symbols (default: the remaining fixtures)")
+    parser.add_argument("--hot-count", type=int, default=4)
+    parser.add_argument("--cold-count", type=int, default=24, help="synthetic cold symbols")
+    parser.add_argument("--bars", type=int, default=750, help="synthetic bars per symbol")
+    parser.add_argument("--fixtures", help="directory of recorded <SYMBOL>.csv bars to replay")
+    parser.add_argument("--latency-ms", type=float, default=50, help="replayed upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--replay-speed", type=float, default=0,
+                        help="accelerated replay clock (simulated seconds per second)")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--think-ms", type=float, default=0, help="pause between a user's requests")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout (seconds)")
+    parser.add_argument("--deadline", type=float, help="prediction deadline sent with requests")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--batch-burst", type=int, default=5, help="concurrent batch calls per burst")
+    parser.add_argument("--batch-pause", type=float, default=5, help="seconds between bursts")
+    parser.add_argument("--ws-interval", type=int, default=2, help="subscription interval (seconds)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="loadtest_results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed throughput drop / p99 rise vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    random.seed(args.seed)
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        hot = split_symbols(args.hot or DEFAULT_REMOTE_HOT)
+        cold = split_symbols(args.cold)
+    else:
+        if args.fixtures:
+            replay_dir = os.path.abspath(args.fixtures)
+            symbols = sorted(
+                os.path.splitext(n)[0].upper() for n in os.listdir(replay_dir) if n.endswith(".csv"))
+        else:
+            replay_dir = os.path.join(SCRATCH, "replay")
+            symbols = [f"LT{i:03d}" for i in range(args.hot_count + args.cold_count)]
+            write_bars(replay_dir, symbols, args.bars, args.seed)
+        hot = split_symbols(args.hot) or symbols[:args.hot_count]
+        cold = split_symbols(args.cold) or [s for s in symbols if s not in hot]
+
+    mix = dict(args.mix)
+    needs = {"hot": hot, "ws": hot, "cold": cold}
+    for scenario in [s for s in mix if s in needs and not needs[s]]:
+        print(f"No {'cold' if scenario == 'cold' else 'hot'} symbols: skipping {scenario}")
+        del mix[scenario]
+    pools = SymbolPools(hot, cold)
+
+    tree = None
+    if not args.url:
+        server, base_url = start_server(replay_dir, args)
+        if sys.platform.startswith("linux"):
+            tree = ProcessTree(server.pid)
+    try:
+        stages = asyncio.run(run(base_url, mix, pools, tree, args))
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "environment": {
+                "timestamp": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "url": args.url or "local",
+                "mix": args.mix,
+                "hot": hot,
+                "cold": cold,
+                "latencyMs": None if args.url else args.latency_ms,
+                "serverWorkers": None if args.url else args.server_workers
+            },
+            "stages": stages
+        }, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        return compare(stages, args.baseline, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,55 +11,189 @@ Features:
 - Technical indicators (RSI, MACD, Moving Averages, Volatility)
 - News sentiment analysis
 - Ensemble prediction for accuracy
+- Persistent model registry (no retraining until new bars arrive)
 - FastAPI REST & WebSocket API
 - Real-time predictions
+- Per-stage latency metrics (Prometheus format)
+- Parallel walk-forward backtesting (see backtest_predict.py)
+- Background pre-warming of the supported universe
+- Lazy imports: heavy libraries load on first use (fast cold start)
+- Multi-horizon forecasts (e.g. 1, 5, 20 bars) from one training pass
+- Pluggable market data: Yahoo Finance, or recorded files replayed offline
+- Load testing of the HTTP and WebSocket endpoints (see loadtest_predict.py)
 
 Usage:
     python predict_stock.py                    # Start server on port 8000
     uvicorn predict_stock:app --port 8000     # Production mode
+    SERVE_ONLY=1 uvicorn predict_stock:app     # Saved models only, no training
+    MARKET_DATA_PROVIDER=replay REPLAY_DIR=recorded/ uvicorn predict_stock:app
 
 API:
     POST /predict {"symbol": "AAPL"}          # Get prediction
+    POST /predict/batch {"symbols": [...]}    # Many symbols, one download
+    GET /predict/{symbol}/forecast?horizons=1,5,20  # Multi-horizon curve
     GET /quote/{symbol}                        # Quick quote
+    GET /quotes?symbols=AAPL,MSFT              # Many quotes, micro-cached
     GET /health                                # Health check
+    GET /metrics                               # Prometheus metrics
+    GET /models/memory                         # Resident models (main process)
     WS /ws                                     # Real-time updates
 """
 
+from __future__ import annotations
+
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import os
+import sys
+import re
+import math
+import io
+import json
+import pickle
+import threading
+import hashlib
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+import importlib
+import importlib.util
+import sqlite3
+import tempfile
+import multiprocessing
+import heapq
+import itertools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Set, Tuple
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from zoneinfo import ZoneInfo
 
 import numpy as np
-import pandas as pd
-import yfinance as yf
-import requests
-
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_absolute_error, r2_score
-
-import torch
-import torch.nn as nn
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi import Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import asyncio
 
+
+# ===========================================
+# LAZY IMPORTS
+# ===========================================
+
+# Lazy imports are serialized: importing torch from two threads at once
+# (e.g. the warm-up and a prediction job) breaks its operator registry
+_import_lock = threading.RLock()
+
+
+def _import(name: str):
+    with _import_lock:
+        return importlib.import_module(name)
+
+
+class LazyModule:
+    """
+    Stand-in for a heavy module that is imported on first attribute
+    access, so /health and friends can serve before pandas, sklearn,
+    torch or yfinance are loaded.
+    """
+
+    def __init__(self, name: str, on_load=None):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+        object.__setattr__(self, "_on_load", on_load)
+
+    def _load(self):
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_load is not None:
+                        self._on_load(module)
+                    object.__setattr__(self, "_module", module)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(module: str, name: str):
+    """Callable standing in for `from module import name` until first call."""
+    def call(*args, **kwargs):
+        return getattr(_import(module), name)(*args, **kwargs)
+    call.__name__ = name
+    return call
+
+
+def has_module(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _configure_torch(module):
+    # Keep LSTM training from oversubscribing cores next to RF's n_jobs=-1
+    if TORCH_THREADS > 0:
+        module.set_num_threads(TORCH_THREADS)
+
+
+pd = LazyModule("pandas")
+yf = LazyModule("yfinance")
+requests = LazyModule("requests")
+joblib = LazyModule("joblib")
+torch = LazyModule("torch", on_load=_configure_torch)
+nn = LazyModule("torch.nn")
+
+nnls = lazy_import("scipy.optimize", "nnls")
+lfilter = lazy_import("scipy.signal", "lfilter")
+RandomForestRegressor = lazy_import("sklearn.ensemble", "RandomForestRegressor")
+GradientBoostingRegressor = lazy_import("sklearn.ensemble", "GradientBoostingRegressor")
+MultiOutputRegressor = lazy_import("sklearn.multioutput", "MultiOutputRegressor")
+StandardScaler = lazy_import("sklearn.preprocessing", "StandardScaler")
+mean_absolute_error = lazy_import("sklearn.metrics", "mean_absolute_error")
+r2_score = lazy_import("sklearn.metrics", "r2_score")
+
 # Optional imports
-try:
-    import xgboost as xgb
-    HAS_XGB = True
-except ImportError:
-    xgb = None
-    HAS_XGB = False
+HAS_XGB = has_module("xgboost")
+xgb = LazyModule("xgboost") if HAS_XGB else None
+
+
+def xgb_available() -> bool:
+    """
+    Import xgboost on first use. A broken install (e.g. a missing libgomp)
+    disables the model like a missing package instead of failing training.
+    """
+    global HAS_XGB
+    if HAS_XGB:
+        try:
+            xgb._load()
+        except Exception as e:
+            logger.warning(f"XGBoost disabled, import failed: {e}")
+            HAS_XGB = False
+    return HAS_XGB
+
+HAS_VADER = has_module("vaderSentiment")
+SentimentIntensityAnalyzer = lazy_import(
+    "vaderSentiment.vaderSentiment", "SentimentIntensityAnalyzer")
+
+HAS_HTTPX = has_module("httpx")
+httpx = LazyModule("httpx") if HAS_HTTPX else None
 
 try:
-    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-    HAS_VADER = True
-except ImportError:
-    HAS_VADER = False
+    import fcntl
+except ImportError:  # Windows: locks fall back to in-process only
+    fcntl = None
 
 # Logging
 logging.basicConfig(level=logging.INFO)
@@ -72,9 +206,109 @@ logger = logging.getLogger(__name__)
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
 
-# Cache for predictions (simple in-memory)
-prediction_cache: Dict[str, Dict] = {}
-CACHE_TTL = 300  # 5 minutes
+# News sentiment (headlines change far slower than our request rate)
+SENTIMENT_TTL = int(os.getenv("SENTIMENT_TTL", 900))  # seconds
+SENTIMENT_STALE_TTL = int(os.getenv("SENTIMENT_STALE_TTL", 3600))
+SENTIMENT_CONCURRENCY = int(os.getenv("SENTIMENT_CONCURRENCY", 8))
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+# Prediction cache (bounded LRU with per-entry TTL)
+CACHE_TTL = int(os.getenv("CACHE_TTL", 300))  # seconds (5 minutes)
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", 600))  # served while refreshing
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 500))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 0))  # 0 = no byte limit
+
+# Persistent model registry (trained models reused across requests/restarts)
+MODEL_DIR = os.getenv(
+    "MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_store")
+)
+MODEL_MAX_AGE = int(os.getenv("MODEL_MAX_AGE", 24 * 3600))  # seconds
+
+# Shared cache backend for all workers on a host: "sqlite", "redis" or
+# "memory" (per process). Holds prediction results and model artifacts.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+CACHE_DB = os.getenv("CACHE_DB", os.path.join(MODEL_DIR, "cache.sqlite3"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+TRAIN_LOCK_TIMEOUT = int(os.getenv("TRAIN_LOCK_TIMEOUT", 600))  # seconds
+
+# Incremental updates when new bars arrive; full refit on a schedule
+MODEL_FULL_REFIT_AGE = int(os.getenv("MODEL_FULL_REFIT_AGE", 7 * 24 * 3600))
+MODEL_UPDATE_TREES = int(os.getenv("MODEL_UPDATE_TREES", 10))
+MODEL_UPDATE_EPOCHS = int(os.getenv("MODEL_UPDATE_EPOCHS", 3))
+
+# Resident model memory per process (least recently used symbols are
+# evicted beyond it; 0 = unlimited). The main process and every predict
+# worker each get the full budget, so the host total is up to
+# (PREDICT_WORKERS + 1) x budget. Compact residency keeps only the
+# compiled inference form; native models are reloaded for updates.
+MODEL_MEMORY_BUDGET = int(float(os.getenv("MODEL_MEMORY_BUDGET_MB", 512)) * 2**20)
+MODEL_COMPACT = os.getenv("MODEL_COMPACT", "true").lower() in ("1", "true", "yes")
+
+# Local OHLCV store (bars are appended instead of re-downloaded)
+DATA_DIR = os.getenv(
+    "DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_store")
+)
+OHLCV_REFRESH = int(os.getenv("OHLCV_REFRESH", 300))  # seconds
+OHLCV_FULL_REFRESH = int(os.getenv("OHLCV_FULL_REFRESH", 7 * 24 * 3600))
+# Top-ups re-fetch the last finished stored bar; a Close differing by more
+# than this (relative) means upstream re-adjusted history (split/dividend)
+# and the symbol is fetched again in full.
+OHLCV_ADJUST_TOLERANCE = float(os.getenv("OHLCV_ADJUST_TOLERANCE", 1e-4))
+
+# Quotes (micro-cached; widgets poll these constantly)
+QUOTE_TTL = float(os.getenv("QUOTE_TTL", 2))  # seconds
+QUOTE_INFO_TTL = float(os.getenv("QUOTE_INFO_TTL", 3600))  # name/market cap
+QUOTES_MAX_SYMBOLS = int(os.getenv("QUOTES_MAX_SYMBOLS", 100))
+
+# Market data source: "yahoo", or "replay" to serve recorded <SYMBOL>.csv
+# bars (plus optional quotes.json) from REPLAY_DIR with simulated upstream
+# latency. REPLAY_SPEED > 0 replays history on an accelerated clock
+# (simulated seconds per wall second) from REPLAY_START; bars appear as
+# the clock passes them (lower OHLCV_REFRESH to pick them up quickly).
+# Processes sharing REPLAY_EPOCH (unix seconds) share one clock.
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yahoo").lower()
+REPLAY_DIR = os.getenv(
+    "REPLAY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_data")
+)
+REPLAY_LATENCY = float(os.getenv("REPLAY_LATENCY_MS", 0)) / 1000
+REPLAY_JITTER = float(os.getenv("REPLAY_JITTER_MS", 0)) / 1000
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", 0))  # 0 = all bars at once
+REPLAY_START = os.getenv("REPLAY_START", "")  # default: a year into the data
+
+# Batch predictions
+BATCH_MAX_SYMBOLS = int(os.getenv("BATCH_MAX_SYMBOLS", 100))
+
+# LSTM training limits
+LSTM_TIME_BUDGET = float(os.getenv("LSTM_TIME_BUDGET", 20))  # seconds per fit
+LSTM_PATIENCE = int(os.getenv("LSTM_PATIENCE", 5))  # epochs without improvement
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", 0))  # 0 = torch default
+
+# WebSocket subscriptions
+WS_MIN_INTERVAL = int(os.getenv("WS_MIN_INTERVAL", 10))  # seconds
+WS_DEFAULT_INTERVAL = 60
+WS_MAX_SYMBOLS = int(os.getenv("WS_MAX_SYMBOLS", 20))  # per socket
+
+# Background pre-warming of SUPPORTED_STOCKS / SUPPORTED_CRYPTO
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", 1))  # 0 = disabled
+PREWARM_CRYPTO_INTERVAL = int(os.getenv("PREWARM_CRYPTO_INTERVAL", 1800))  # 24/7
+PREWARM_STOCK_INTERVAL = int(os.getenv("PREWARM_STOCK_INTERVAL", 900))  # in session
+PREWARM_MARKET_HOURS = os.getenv("PREWARM_MARKET_HOURS", "09:30-16:00")
+PREWARM_MARKET_TZ = os.getenv("PREWARM_MARKET_TZ", "America/New_York")
+PREWARM_SESSION_MARGIN = int(os.getenv("PREWARM_SESSION_MARGIN", 900))  # before open / after close
+PREWARM_POPULARITY_HALF_LIFE = int(os.getenv("PREWARM_POPULARITY_HALF_LIFE", 3600))
+PREWARM_TICK = int(os.getenv("PREWARM_TICK", 30))  # seconds between schedule checks
+PREWARM_START_DELAY = int(os.getenv("PREWARM_START_DELAY", 30))
+
+# Prediction jobs run off the event loop (0 = threads in this process)
+PREDICT_WORKERS = int(
+    os.getenv("PREDICT_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+# Admission control: jobs running at once, and jobs allowed to wait for
+# a slot before requests are turned away with 503 + Retry-After
+PREDICT_MAX_ACTIVE = int(os.getenv("PREDICT_MAX_ACTIVE", PREDICT_WORKERS or max(1, (os.cpu_count() or 2) // 2)))
+PREDICT_QUEUE_SIZE = int(os.getenv("PREDICT_QUEUE_SIZE", 64))
 
 # Supported symbols
 SUPPORTED_STOCKS = [
@@ -91,517 +325,4282 @@ SUPPORTED_CRYPTO = [
     "ADA-USD", "DOGE-USD", "DOT-USD", "MATIC-USD", "AVAX-USD"
 ]
 
+# Startup: serve-only never trains (saved model artifacts only); the
+# warm-up imports the heavy libraries in the background after startup
+SERVE_ONLY = os.getenv("SERVE_ONLY", "false").lower() in ("1", "true", "yes")
+IMPORT_WARMUP = os.getenv("IMPORT_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Default ensemble weights (fit your own with walk_forward_backtest)
+ENSEMBLE_WEIGHTS = {"rf": 0.35, "gb": 0.25, "xgb": 0.25, "lstm": 0.15}
+
+# Multi-horizon forecasts (bars ahead) for /predict/{symbol}/forecast
+FORECAST_HORIZONS = tuple(
+    int(h) for h in os.getenv("FORECAST_HORIZONS", "1,5,20").split(",") if h.strip())
+FORECAST_MAX_HORIZON = int(os.getenv("FORECAST_MAX_HORIZON", 60))
+
+# Walk-forward backtest defaults (bars)
+BACKTEST_TRAIN_WINDOW = int(os.getenv("BACKTEST_TRAIN_WINDOW", 500))
+BACKTEST_TEST_WINDOW = int(os.getenv("BACKTEST_TEST_WINDOW", 60))
+BACKTEST_MAX_FOLDS = int(os.getenv("BACKTEST_MAX_FOLDS", 8))
+
+# Latency histogram buckets (seconds)
+LATENCY_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
 # ===========================================
-# NEWS SENTIMENT
+# METRICS
 # ===========================================
 
+def label_value(value) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Labelled latency histogram rendered in Prometheus text format."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            # Per series: one count per bucket, then +Inf count and sum
+            series = self._series.setdefault(
+                label_values, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+
+        for label_values, counts in sorted(series.items()):
+            labels = ",".join(f'{k}="{label_value(v)}"' for k, v in zip(self.labels, label_values))
+            sep = "," if labels else ""
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {count:g}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {counts[-2]:g}')
+            lines.append(f"{self.name}_sum{{{labels}}} {counts[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {counts[-2]:g}")
+        return lines
+
+
+stage_latency = Histogram(
+    "predict_stage_seconds", "Time spent in each prediction pipeline stage", ("stage",))
+model_latency = Histogram(
+    "predict_model_seconds", "Time spent fitting, updating or querying each model",
+    ("model", "phase"))
+http_latency = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route", "status"))
+
+_timings = threading.local()
+
+
+@contextmanager
+def track_timings():
+    """Collect the stage() timings made in this thread into a dict."""
+    previous = getattr(_timings, "current", None)
+    _timings.current = collected = {}
+    try:
+        yield collected
+    finally:
+        _timings.current = previous
 
-def get_news_sentiment(symbol: str, api_key: Optional[str] = None) -> float:
+
+@contextmanager
+def stage(name: str):
     """
-    Fetch news sentiment for a stock symbol.
-    Returns compound score between -1 (negative) and 1 (positive).
+    Time a pipeline stage. Names like "fit:rf" are per-model phases.
+    Inside track_timings() the time is collected (prediction jobs may run
+    in another process and report back); otherwise it is recorded here.
     """
-    if not api_key and not NEWS_API_KEY:
-        return 0.0
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        current = getattr(_timings, "current", None)
+        if current is not None:
+            current[name] = current.get(name, 0.0) + elapsed
+        else:
+            record_timings({name: elapsed})
 
-    if not HAS_VADER:
-        return 0.0
 
-    key = api_key or NEWS_API_KEY
-    clean_symbol = symbol.replace("-USD", "").replace(".", "")
+def record_timings(timings: Dict[str, float]):
+    """Feed a stage -> seconds breakdown into the latency histograms."""
+    for name, seconds in timings.items():
+        if ":" in name:
+            phase, model = name.split(":", 1)
+            model_latency.observe(seconds, model, phase)
+        else:
+            stage_latency.observe(seconds, name)
 
-    url = (
-        f"https://newsapi.org/v2/everything"
-        f"?q={clean_symbol}&language=en&sortBy=publishedAt&pageSize=10&apiKey={key}"
-    )
+# ===========================================
+# SHARED CACHE BACKEND
+# ===========================================
 
-    try:
-        resp = requests.get(url, timeout=5)
-        data = resp.json()
-        articles = data.get("articles", [])
+def _safe_name(symbol: str) -> str:
+    """Symbol as a file/key-safe name."""
+    return re.sub(r"[^A-Z0-9._-]", "_", symbol.upper())
 
-        if not articles:
-            return 0.0
 
-        analyzer = SentimentIntensityAnalyzer()
-        scores = []
+class CacheBackend:
+    """
+    Per-process backend: values live in a dict, model artifacts in
+    MODEL_DIR, and locks are file locks (so they hold across processes).
+    Subclasses share values and artifacts between workers.
+    """
 
-        for article in articles[:10]:
-            title = article.get("title", "")
-            desc = article.get("description", "")
-            text = f"{title} {desc}"
+    name = "memory"
 
-            if text.strip():
-                score = analyzer.polarity_scores(text)["compound"]
-                scores.append(score)
+    def __init__(self, artifact_dir: str = MODEL_DIR):
+        self.artifact_dir = artifact_dir
+        self.lock_dir = os.path.join(artifact_dir, "locks")
+        self._values: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._thread_locks: Dict[str, threading.Lock] = {}
 
-        return float(np.mean(scores)) if scores else 0.0
+    def get(self, key: str) -> Optional[bytes]:
+        item = self._values.get(key)
+        if item is None or (item[1] is not None and item[1] < time.time()):
+            return None
+        return item[0]
 
-    except Exception as e:
-        logger.warning(f"Sentiment fetch error for {symbol}: {e}")
-        return 0.0
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self._values[key] = (value, time.time() + ttl if ttl else None)
 
+    def delete(self, key: str):
+        self._values.pop(key, None)
 
-# ===========================================
-# DATA FETCHING
-# ===========================================
+    def clear(self, prefix: str = ""):
+        for key in [k for k in self._values if k.startswith(prefix)]:
+            del self._values[key]
 
-def fetch_stock_data(symbol: str, years: int = 5) -> pd.DataFrame:
+    def get_artifact(self, name: str) -> Optional[bytes]:
+        path = os.path.join(self.artifact_dir, f"{_safe_name(name)}.joblib")
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_artifact(self, name: str, blob: bytes):
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.artifact_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, os.path.join(self.artifact_dir, f"{_safe_name(name)}.joblib"))
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = TRAIN_LOCK_TIMEOUT):
+        """
+        Exclusive lock shared by all workers on this host.
+        Yields False if it could not be acquired within timeout (the
+        caller goes ahead anyway rather than failing the request).
+        """
+        if fcntl is None:
+            lock = self._thread_locks.setdefault(name, threading.Lock())
+            acquired = lock.acquire(timeout=timeout)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    lock.release()
+            return
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        deadline = time.monotonic() + timeout
+        with open(os.path.join(self.lock_dir, f"{_safe_name(name)}.lock"), "a") as f:
+            acquired = False
+            while not acquired:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    acquired = True
+                except BlockingIOError:
+                    if time.monotonic() > deadline:
+                        logger.warning(f"Timed out waiting for lock {name}")
+                        break
+                    time.sleep(0.1)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Host-wide backend in a local SQLite file (WAL mode)."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = CACHE_DB, artifact_dir: str = MODEL_DIR):
+        super().__init__(artifact_dir)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, sqlite3.Binary(value), time.time() + ttl if ttl else None))
+
+        self._writes += 1
+        if self._writes % 100 == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self, prefix: str = ""):
+        self._conn().execute(
+            "DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def get_artifact(self, name: str) -> Optional[bytes]:
+        return self.get(f"artifact:{name}")
+
+    def put_artifact(self, name: str, blob: bytes):
+        self.set(f"artifact:{name}", blob)
+
+
+class RedisCacheBackend(CacheBackend):
     """
-    Fetch historical stock data from Yahoo Finance.
+    Redis-compatible backend (shared across hosts). Any client with the
+    redis-py API works, e.g. a fakeredis instance for local testing.
     """
-    end = datetime.now()
-    start = end - timedelta(days=years * 365)
 
-    try:
-        df = yf.download(symbol, start=start, end=end, progress=False)
+    name = "redis"
 
-        if df.empty:
-            raise ValueError(f"No data found for {symbol}")
+    def __init__(self, url: str = REDIS_URL, client=None, prefix: str = "world-studio:"):
+        super().__init__()
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
 
-        if len(df) < 100:
-            raise ValueError(
-                f"Insufficient data for {symbol} (need 100+ days)")
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
 
-        # Flatten multi-index columns if present
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
 
-        return df
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
 
-    except Exception as e:
-        logger.error(f"Data fetch error for {symbol}: {e}")
-        raise
+    def clear(self, prefix: str = ""):
+        for key in self.client.scan_iter(match=f"{self.prefix}{prefix}*"):
+            self.client.delete(key)
 
+    def get_artifact(self, name: str) -> Optional[bytes]:
+        return self.get(f"artifact:{name}")
 
-def get_current_price(symbol: str) -> float:
-    """Get current/latest price for symbol."""
+    def put_artifact(self, name: str, blob: bytes):
+        self.set(f"artifact:{name}", blob)
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = TRAIN_LOCK_TIMEOUT):
+        lock = self.client.lock(f"{self.prefix}lock:{name}", timeout=timeout)
+        acquired = lock.acquire(blocking_timeout=timeout)
+        if not acquired:
+            logger.warning(f"Timed out waiting for lock {name}")
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except Exception:
+                    pass  # expired while held
+
+
+def create_cache_backend(kind: str = CACHE_BACKEND) -> CacheBackend:
+    """Build the configured backend, falling back to per-process memory."""
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        return info.get("regularMarketPrice") or info.get("currentPrice") or 0.0
-    except Exception:
-        return 0.0
+        if kind == "redis":
+            return RedisCacheBackend()
+        if kind == "sqlite":
+            return SQLiteCacheBackend()
+    except Exception as e:
+        logger.warning(f"Cache backend '{kind}' unavailable ({e}), using memory")
+    return CacheBackend()
+
+
+cache_backend = create_cache_backend()
 
 
 # ===========================================
-# TECHNICAL INDICATORS
+# PREDICTION CACHE
 # ===========================================
 
-def calculate_rsi(series: pd.Series, period: int = 14) -> pd.Series:
-    """Calculate Relative Strength Index."""
-    delta = series.diff()
-    gain = delta.where(delta > 0, 0.0)
-    loss = -delta.where(delta < 0, 0.0)
+class PredictionCache:
+    """
+    Bounded LRU cache with per-entry TTL.
 
-    avg_gain = gain.rolling(window=period, min_periods=1).mean()
-    avg_loss = loss.rolling(window=period, min_periods=1).mean()
+    Expired entries stay servable for stale_ttl more seconds so callers
+    can answer from them while a refresh runs (stale-while-revalidate).
+    With a shared backend, local misses fall through to entries other
+    workers wrote. Hit/miss/eviction counters are kept for /cache/stats.
+    """
 
-    rs = avg_gain / avg_loss.replace(0, np.inf)
-    rsi = 100 - (100 / (1 + rs))
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: int = CACHE_TTL,
+        stale_ttl: int = CACHE_STALE_TTL,
+        max_bytes: int = CACHE_MAX_BYTES,
+        backend: Optional[CacheBackend] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+
+    def _read_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        """The entry another worker stored for key, if any."""
+        if self.backend is None:
+            return None
+        try:
+            blob = self.backend.get(f"pred:{key}")
+        except Exception as e:
+            logger.warning(f"Shared cache read failed: {e}")
+            return None
+        if blob is None:
+            return None
+
+        record = json.loads(blob)
+        return {
+            "data": record["data"],
+            "cached_at": record["cached_at"],
+            "expires_at": record["expires_at"],
+            "size": len(blob) if self.max_bytes else 0
+        }
 
-    return rsi.fillna(50)
+    def _load_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        """Pull an entry another worker stored into the local LRU."""
+        entry = self._read_shared(key)
+        if entry is None:
+            return None
+        with self._lock:
+            self._insert(key, entry)
+            self.shared_hits += 1
+        return entry
+
+    def lookup(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Return (data, state) where state is "fresh", "stale" or None."""
+        now = datetime.now().timestamp()
+        entry = self._entries.get(key)
+        if entry is None or now >= entry["expires_at"]:
+            shared = self._load_shared(key)
+            if shared is not None and (entry is None or shared["expires_at"] > entry["expires_at"]):
+                entry = shared
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+
+            if now < entry["expires_at"]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["data"], "fresh"
+
+            if now < entry["expires_at"] + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return entry["data"], "stale"
+
+            self._remove(key)
+            self.misses += 1
+            return None, None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fresh data for key, else None."""
+        data, state = self.lookup(key)
+        return data if state == "fresh" else None
+
+    def is_fresh(self, key: str) -> bool:
+        """Check freshness without touching LRU order or counters."""
+        now = datetime.now().timestamp()
+        entry = self._entries.get(key)
+        if entry is None or now >= entry["expires_at"]:
+            entry = self._read_shared(key)
+        return entry is not None and now < entry["expires_at"]
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Servable (fresh or stale) data for key without touching LRU order,
+        counters or the local cache; for background checks like prewarm.
+        """
+        now = datetime.now().timestamp()
+        entry = self._entries.get(key)
+        if entry is None or now >= entry["expires_at"]:
+            shared = self._read_shared(key)
+            if shared is not None and (entry is None or shared["expires_at"] > entry["expires_at"]):
+                entry = shared
+        if entry is None or now >= entry["expires_at"] + self.stale_ttl:
+            return None
+        return entry["data"]
+
+    def set(self, key: str, data: Dict[str, Any], ttl: Optional[int] = None):
+        now = datetime.now().timestamp()
+        ttl = self.ttl if ttl is None else ttl
+        entry = {"data": data, "cached_at": now, "expires_at": now + ttl, "size": 0}
+
+        blob = None
+        if self.backend is not None or self.max_bytes:
+            blob = json.dumps(
+                {k: entry[k] for k in ("data", "cached_at", "expires_at")}, default=str)
+            entry["size"] = len(blob) if self.max_bytes else 0
+
+        with self._lock:
+            self._insert(key, entry)
+
+        if self.backend is not None:
+            try:
+                self.backend.set(f"pred:{key}", blob.encode(), ttl=ttl + self.stale_ttl)
+            except Exception as e:
+                logger.warning(f"Shared cache write failed: {e}")
+
+    def _insert(self, key: str, entry: Dict[str, Any]):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry["size"]
+
+        while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes and self._bytes > self.max_bytes)):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.backend is not None:
+            self.backend.clear("pred:")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "bytes": self._bytes if self.max_bytes else None,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "sharedHits": self.shared_hits,
+            "evictions": self.evictions,
+            "backend": self.backend.name if self.backend is not None else None,
+            "hitRate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None
+        }
 
 
-def calculate_macd(series: pd.Series) -> pd.Series:
-    """Calculate MACD (Moving Average Convergence Divergence)."""
-    ema12 = series.ewm(span=12, adjust=False).mean()
-    ema26 = series.ewm(span=26, adjust=False).mean()
-    return ema12 - ema26
+prediction_cache = PredictionCache(backend=cache_backend)
 
 
-def calculate_bollinger_bands(series: pd.Series, period: int = 20) -> tuple:
-    """Calculate Bollinger Bands."""
-    sma = series.rolling(window=period).mean()
-    std = series.rolling(window=period).std()
+# ===========================================
+# NEWS SENTIMENT
+# ===========================================
 
-    upper = sma + (std * 2)
-    lower = sma - (std * 2)
 
-    return upper, sma, lower
+class SentimentService:
+    """
+    News sentiment with one shared VADER analyzer and pooled HTTP clients.
 
+    Scores are cached per symbol for ttl seconds (and shared through the
+    cache backend); once stale they are still served for stale_ttl while
+    a refresh runs in the background. Articles already scored are not
+    scored again.
+    """
 
-def add_technical_features(df: pd.DataFrame, sentiment: float = 0.0) -> pd.DataFrame:
-    """Add technical indicators as features."""
-    df = df.copy()
+    def __init__(
+        self,
+        api_key: Optional[str] = NEWS_API_KEY,
+        ttl: int = SENTIMENT_TTL,
+        stale_ttl: int = SENTIMENT_STALE_TTL,
+        concurrency: int = SENTIMENT_CONCURRENCY,
+        backend: Optional[CacheBackend] = None
+    ):
+        self.api_key = api_key
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.concurrency = concurrency
+        self.backend = backend
+        self._analyzer = None
+        self._session = None
+        self._client = None
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._articles: "OrderedDict[str, float]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            self._analyzer = SentimentIntensityAnalyzer()
+        return self._analyzer
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+
+    def _params(self, symbol: str, api_key: str) -> Dict[str, Any]:
+        return {
+            "q": symbol.replace("-USD", "").replace(".", ""),
+            "language": "en",
+            "sortBy": "publishedAt",
+            "pageSize": 10,
+            "apiKey": api_key,
+        }
 
-    # Moving averages
-    df["MA_5"] = df["Close"].rolling(5).mean()
-    df["MA_10"] = df["Close"].rolling(10).mean()
-    df["MA_20"] = df["Close"].rolling(20).mean()
-    df["MA_50"] = df["Close"].rolling(50).mean()
+    @staticmethod
+    def _parse_articles(resp) -> List[Dict[str, Any]]:
+        """Articles from a NewsAPI response; raises on HTTP or API errors."""
+        resp.raise_for_status()
+        body = resp.json()
+        if body.get("status") != "ok":
+            raise ValueError(f"NewsAPI error {body.get('code')}: {body.get('message')}")
+        return body.get("articles", [])
+
+    def score_articles(self, articles: List[Dict[str, Any]]) -> float:
+        """Mean compound score of the articles (-1 negative .. 1 positive)."""
+        scores = []
 
-    # Price changes
-    df["Daily_Return"] = df["Close"].pct_change()
-    df["Weekly_Return"] = df["Close"].pct_change(5)
+        for article in articles[:10]:
+            title = article.get("title") or ""
+            desc = article.get("description") or ""
+            text = f"{title} {desc}"
+            if not text.strip():
+                continue
+
+            key = article.get("url") or hashlib.sha1(text.encode()).hexdigest()
+            with self._lock:
+                score = self._articles.get(key)
+            if score is None:
+                score = self.analyzer.polarity_scores(text)["compound"]
+                with self._lock:
+                    self._articles[key] = score
+                    if len(self._articles) > 10000:
+                        self._articles.popitem(last=False)
+            scores.append(score)
 
-    # Volatility
-    df["Volatility_5"] = df["Daily_Return"].rolling(5).std()
-    df["Volatility_20"] = df["Daily_Return"].rolling(20).std()
+        return float(np.mean(scores)) if scores else 0.0
 
-    # Technical indicators
-    df["RSI"] = calculate_rsi(df["Close"])
-    df["MACD"] = calculate_macd(df["Close"])
+    def _cached(self, symbol: str) -> Optional[Tuple[float, float]]:
+        """(score, fetched_at) from memory or the shared backend."""
+        cached = self._scores.get(symbol)
+        if (cached is None or time.time() - cached[1] >= self.ttl) and self.backend is not None:
+            try:
+                blob = self.backend.get(f"sentiment:{symbol}")
+            except Exception:
+                blob = None
+            if blob is not None:
+                shared = tuple(json.loads(blob))
+                if cached is None or shared[1] > cached[1]:
+                    cached = self._scores[symbol] = shared
+        return cached
+
+    def _store(self, symbol: str, score: float) -> float:
+        now = time.time()
+        self._scores[symbol] = (score, now)
+        if self.backend is not None:
+            try:
+                self.backend.set(
+                    f"sentiment:{symbol}", json.dumps([score, now]).encode(),
+                    ttl=self.ttl + self.stale_ttl)
+            except Exception as e:
+                logger.warning(f"Shared sentiment write failed: {e}")
+        return score
 
-    # Volume features
-    df["Volume_Change"] = df["Volume"].pct_change()
-    df["Volume_MA"] = df["Volume"].rolling(20).mean()
-    df["Volume_Ratio"] = df["Volume"] / df["Volume_MA"]
+    def get(self, symbol: str, api_key: Optional[str] = None) -> float:
+        """Blocking lookup (pooled requests session), cached for ttl."""
+        key = api_key or self.api_key
+        if not key or not HAS_VADER:
+            return 0.0
 
-    # Price position
-    df["Price_vs_MA20"] = (df["Close"] - df["MA_20"]) / df["MA_20"]
-    df["High_Low_Range"] = (df["High"] - df["Low"]) / df["Close"]
+        symbol = symbol.upper()
+        cached = self._cached(symbol)
+        if cached is not None and time.time() - cached[1] < self.ttl:
+            return cached[0]
 
-    # Sentiment
-    df["Sentiment"] = sentiment
+        try:
+            resp = self.session.get(NEWS_API_URL, params=self._params(symbol, key), timeout=5)
+            return self._store(symbol, self.score_articles(self._parse_articles(resp)))
+        except Exception as e:
+            logger.warning(f"Sentiment fetch error for {symbol}: {e}")
+            return cached[0] if cached is not None else 0.0
 
-    # Target: next day's close
-    df["Target"] = df["Close"].shift(-1)
+    async def _fetch(self, symbol: str, key: str) -> float:
+        try:
+            if HAS_HTTPX:
+                if self._client is None:
+                    self._client = httpx.AsyncClient(
+                        timeout=5,
+                        limits=httpx.Limits(max_connections=self.concurrency))
+                resp = await self._client.get(NEWS_API_URL, params=self._params(symbol, key))
+                return self._store(symbol, self.score_articles(self._parse_articles(resp)))
+            return await asyncio.to_thread(self.get, symbol, key)
+        except Exception as e:
+            logger.warning(f"Sentiment fetch error for {symbol}: {e}")
+            cached = self._scores.get(symbol)
+            return cached[0] if cached is not None else 0.0
+        finally:
+            self._refreshing.pop(symbol, None)
+
+    async def aget(self, symbol: str, api_key: Optional[str] = None) -> float:
+        """
+        Non-blocking lookup. Stale scores are returned at once and
+        refreshed in the background; only a cold symbol waits for NewsAPI.
+        """
+        key = api_key or self.api_key
+        if not key or not HAS_VADER:
+            return 0.0
 
-    return df.dropna()
+        symbol = symbol.upper()
+        cached = self._cached(symbol)
+        age = time.time() - cached[1] if cached is not None else None
 
+        if age is not None and age < self.ttl:
+            return cached[0]
 
-# ===========================================
-# FEATURE PREPARATION
-# ===========================================
+        task = self._refreshing.get(symbol)
+        if task is None:
+            task = asyncio.create_task(self._fetch(symbol, key))
+            self._refreshing[symbol] = task
 
-def prepare_features(df: pd.DataFrame) -> tuple:
-    """Prepare features for ML models."""
-    feature_cols = [
-        "Close", "Volume", "MA_5", "MA_10", "MA_20",
-        "Daily_Return", "Volatility_5", "Volatility_20",
-        "RSI", "MACD", "Volume_Change", "Volume_Ratio",
-        "Price_vs_MA20", "High_Low_Range", "Sentiment"
-    ]
+        if age is not None and age < self.ttl + self.stale_ttl:
+            return cached[0]
+        return await asyncio.shield(task)
 
-    # Filter to available columns
-    available = [c for c in feature_cols if c in df.columns]
+    async def aget_many(self, symbols: List[str], api_key: Optional[str] = None) -> Dict[str, float]:
+        """Sentiment for many symbols, fetched concurrently in batches."""
+        semaphore = asyncio.Semaphore(self.concurrency)
 
-    X = df[available].values
-    y = df["Target"].values
+        async def one(symbol: str) -> float:
+            async with semaphore:
+                return await self.aget(symbol, api_key)
 
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+        symbols = [s.upper() for s in symbols]
+        scores = await asyncio.gather(*(one(s) for s in symbols))
+        return dict(zip(symbols, scores))
 
-    return X_scaled, y, available, scaler
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
 
-def create_sequences(X: np.ndarray, y: np.ndarray, lookback: int = 20) -> tuple:
-    """Create sequences for LSTM model."""
-    Xs, ys = [], []
+sentiment_service = SentimentService(backend=cache_backend)
 
-    for i in range(len(X) - lookback):
-        Xs.append(X[i:i + lookback])
-        ys.append(y[i + lookback])
 
-    return np.array(Xs), np.array(ys)
+def get_news_sentiment(symbol: str, api_key: Optional[str] = None) -> float:
+    """
+    Fetch news sentiment for a stock symbol.
+    Returns compound score between -1 (negative) and 1 (positive).
+    """
+    return sentiment_service.get(symbol, api_key)
 
 
 # ===========================================
-# ML MODELS
+# DATA FETCHING
 # ===========================================
 
-def train_random_forest(X: np.ndarray, y: np.ndarray) -> RandomForestRegressor:
-    """Train Random Forest model."""
-    model = RandomForestRegressor(
-        n_estimators=150,
-        max_depth=15,
-        min_samples_split=5,
-        random_state=42,
-        n_jobs=-1
-    )
-    model.fit(X, y)
-    return model
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
 
+# Model inputs, in order
+FEATURE_COLS = [
+    "Close", "Volume", "MA_5", "MA_10", "MA_20",
+    "Daily_Return", "Volatility_5", "Volatility_20",
+    "RSI", "MACD", "Volume_Change", "Volume_Ratio",
+    "Price_vs_MA20", "High_Low_Range", "Sentiment"
+]
 
-def train_gradient_boosting(X: np.ndarray, y: np.ndarray) -> GradientBoostingRegressor:
-    """Train Gradient Boosting model."""
-    model = GradientBoostingRegressor(
-        n_estimators=100,
-        max_depth=5,
-        learning_rate=0.1,
-        random_state=42
-    )
-    model.fit(X, y)
-    return model
 
+def _normalize_bars(df: pd.DataFrame) -> pd.DataFrame:
+    """Flatten yfinance output to plain OHLCV columns."""
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    df = df[[c for c in OHLCV_COLUMNS if c in df.columns]]
+    if getattr(df.index, "tz", None) is not None:
+        df.index = df.index.tz_convert(None)
+    return df[~df.index.duplicated(keep="last")].dropna(how="all")
 
-def train_xgboost(X: np.ndarray, y: np.ndarray):
-    """Train XGBoost model if available."""
-    if not HAS_XGB:
-        return None
 
-    model = xgb.XGBRegressor(
-        n_estimators=150,
-        max_depth=6,
-        learning_rate=0.1,
-        verbosity=0,
-        random_state=42
-    )
-    model.fit(X, y)
-    return model
+def _quote_from_bars(symbol: str, bars: pd.DataFrame, timestamp: str) -> Dict[str, Any]:
+    """Quote fields from the latest daily bar (and the one before it)."""
+    last = bars.iloc[-1]
+    return {
+        "symbol": symbol,
+        "price": round(float(last["Close"]), 4),
+        "previousClose": round(float(bars["Close"].iloc[-2]), 4) if len(bars) > 1 else None,
+        "open": round(float(last["Open"]), 4),
+        "high": round(float(last["High"]), 4),
+        "low": round(float(last["Low"]), 4),
+        "volume": int(last["Volume"]) if not pd.isna(last["Volume"]) else None,
+        "timestamp": timestamp
+    }
+
+
+class MarketDataProvider:
+    """
+    Source of daily bars and quotes behind fetch_stock_data() and
+    get_current_price(). now() is the provider's clock: the end of the
+    history windows that callers ask for.
+    """
+
+    name = "base"
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def bars(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def bars_many(
+        self,
+        symbols: List[str],
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, pd.DataFrame]:
+        return {symbol: self.bars(symbol, start, end) for symbol in symbols}
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def quote_info(self, symbol: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"provider": self.name}
+
+
+class YahooProvider(MarketDataProvider):
+    """Live data from Yahoo Finance."""
+
+    name = "yahoo"
+
+    def bars(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        df = yf.download(symbol, start=start, end=end, progress=False)
+        return _normalize_bars(df) if not df.empty else df
+
+    def bars_many(
+        self,
+        symbols: List[str],
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, pd.DataFrame]:
+        """All symbols in one request."""
+        if len(symbols) == 1:
+            return {symbols[0]: self.bars(symbols[0], start, end)}
+
+        df = yf.download(
+            symbols, start=start, end=end, group_by="ticker", progress=False)
+
+        bars = {}
+        for symbol in symbols:
+            if df.empty or symbol not in df.columns.get_level_values(0):
+                bars[symbol] = pd.DataFrame()
+                continue
+            bars[symbol] = _normalize_bars(df[symbol].copy())
+        return bars
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Latest daily bar for all symbols in one request."""
+        df = yf.download(
+            symbols, period="5d", interval="1d", group_by="ticker", progress=False)
+
+        quotes = {}
+        for symbol in symbols:
+            if df.empty:
+                break
+            if isinstance(df.columns, pd.MultiIndex):
+                if symbol not in df.columns.get_level_values(0):
+                    continue
+                bars = df[symbol]
+            else:
+                bars = df
+            bars = bars.dropna(subset=["Close"])
+            if not bars.empty:
+                quotes[symbol] = _quote_from_bars(
+                    symbol, bars, datetime.utcnow().isoformat())
+        return quotes
+
+    def quote_info(self, symbol: str) -> Dict[str, Any]:
+        info = yf.Ticker(symbol).info
+        return {
+            "symbol": symbol,
+            "price": info.get("regularMarketPrice") or info.get("currentPrice"),
+            "previousClose": info.get("previousClose"),
+            "open": info.get("open"),
+            "high": info.get("dayHigh"),
+            "low": info.get("dayLow"),
+            "volume": info.get("volume"),
+            "marketCap": info.get("marketCap"),
+            "name": info.get("shortName") or info.get("longName"),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Recorded data for offline runs and load tests.
+
+    Bars come from <SYMBOL>.csv files (date index, OHLCV columns) and
+    quotes are derived from the latest visible bar, overlaid on any
+    recorded fields in quotes.json ({symbol: {"name": ..., ...}}). Every
+    call sleeps latency (+ up to jitter) like an upstream request would.
+
+    With speed > 0 the replay clock runs at speed simulated seconds per
+    wall second from start, and only bars it has passed are visible.
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        directory: str = REPLAY_DIR,
+        latency: float = REPLAY_LATENCY,
+        jitter: float = REPLAY_JITTER,
+        speed: float = REPLAY_SPEED,
+        start: str = REPLAY_START
+    ):
+        if not os.path.isdir(directory):
+            raise ValueError(f"replay directory {directory} not found")
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self.speed = speed
+        self._start = pd.Timestamp(start).to_pydatetime() if start else None
+        # Child processes inherit the epoch, so workers agree on the clock
+        self.epoch = float(os.environ.setdefault("REPLAY_EPOCH", str(time.time())))
+        self._frames: Optional[Dict[str, pd.DataFrame]] = None
+        self._recorded: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _load(self) -> Dict[str, pd.DataFrame]:
+        """Read every recording once."""
+        with self._lock:
+            if self._frames is not None:
+                return self._frames
+
+            frames = {}
+            for name in sorted(os.listdir(self.directory)):
+                if not name.lower().endswith(".csv"):
+                    continue
+                df = pd.read_csv(
+                    os.path.join(self.directory, name), index_col=0, parse_dates=True)
+                df.index = pd.DatetimeIndex(df.index).tz_localize(None)
+                frames[os.path.splitext(name)[0].upper()] = (
+                    df[OHLCV_COLUMNS].dropna().sort_index())
+
+            path = os.path.join(self.directory, "quotes.json")
+            if os.path.exists(path):
+                with open(path) as f:
+                    self._recorded = {k.upper(): v for k, v in json.load(f).items()}
+
+            first = max((df.index[0] for df in frames.values() if len(df)), default=None)
+            if self._start is None and first is not None:
+                self._start = first.to_pydatetime() + timedelta(days=365)
+
+            logger.info(f"Replaying {len(frames)} symbols from {self.directory}")
+            self._frames = frames
+            return frames
+
+    def _wait(self):
+        self.calls += 1
+        delay = self.latency + self.jitter * float(np.random.random())
+        if delay > 0:
+            time.sleep(delay)
+
+    def now(self) -> datetime:
+        frames = self._load()
+        # Without recorded bars there is no start to run the clock from
+        if self.speed > 0 and self._start is not None:
+            elapsed = time.time() - self.epoch
+            return self._start + timedelta(seconds=elapsed * self.speed)
+        last = max((df.index[-1] for df in frames.values() if len(df)), default=None)
+        return last.to_pydatetime() + timedelta(days=1) if last is not None else datetime.now()
+
+    def _visible(self, symbol: str) -> pd.DataFrame:
+        df = self._load().get(symbol.upper())
+        if df is None:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        if self.speed > 0:
+            df = df[df.index <= self.now()]
+        return df
+
+    def bars(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        self._wait()
+        df = self._visible(symbol)
+        return df[(df.index >= start) & (df.index < end)].copy()
+
+    def bars_many(
+        self,
+        symbols: List[str],
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, pd.DataFrame]:
+        """One simulated request for all symbols."""
+        self._wait()
+        bars = {}
+        for symbol in symbols:
+            df = self._visible(symbol)
+            bars[symbol] = df[(df.index >= start) & (df.index < end)].copy()
+        return bars
+
+    def _quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        recorded = self._recorded.get(symbol.upper(), {})
+        bars = self._visible(symbol)
+        timestamp = self.now().isoformat()
+        if not bars.empty:
+            return {**recorded, **_quote_from_bars(symbol, bars.iloc[-2:], timestamp)}
+        if recorded.get("price") is not None:
+            return {**recorded, "symbol": symbol, "timestamp": timestamp}
+        return None
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        self._wait()
+        quotes = {}
+        for symbol in symbols:
+            quote = self._quote(symbol)
+            if quote is not None:
+                quotes[symbol] = quote
+        return quotes
+
+    def quote_info(self, symbol: str) -> Dict[str, Any]:
+        self._wait()
+        quote = self._quote(symbol) or {"symbol": symbol, "price": None}
+        return {"marketCap": None, "name": None, **quote}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "directory": self.directory,
+            "symbols": len(self._frames) if self._frames is not None else None,
+            "latencyMs": round(self.latency * 1000, 1),
+            "jitterMs": round(self.jitter * 1000, 1),
+            "speed": self.speed,
+            "clock": self.now().isoformat() if self._frames is not None else None,
+            "calls": self.calls
+        }
+
+
+def create_market_data_provider(kind: str = MARKET_DATA_PROVIDER) -> MarketDataProvider:
+    """Build the configured provider, falling back to Yahoo Finance."""
+    try:
+        if kind == "replay":
+            return ReplayProvider()
+    except Exception as e:
+        logger.warning(f"Market data provider '{kind}' unavailable ({e}), using yahoo")
+    return YahooProvider()
+
+
+market_data = create_market_data_provider()
+
+
+def download_bars(symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+    """Download daily bars for one symbol from the market data provider."""
+    return market_data.bars(symbol, start, end)
+
+
+def download_bars_many(
+    symbols: List[str],
+    start: datetime,
+    end: datetime
+) -> Dict[str, pd.DataFrame]:
+    """Download daily bars for many symbols in one provider request."""
+    return market_data.bars_many(symbols, start, end)
+
+
+class OHLCVStore:
+    """
+    Local columnar store of daily bars, one memory-mapped .npy per symbol.
+
+    Layout: float64 matrix [epoch_seconds, Open, High, Low, Close, Volume].
+    A JSON sidecar records which range is covered and when upstream was
+    last checked, so calls only fetch the days after the last stored bar.
+    Each top-up overlaps the stored bars by one finished bar; when that
+    bar comes back re-adjusted, the whole history is fetched again.
+    """
+
+    def __init__(
+        self,
+        root: str = DATA_DIR,
+        refresh: int = OHLCV_REFRESH,
+        full_refresh: int = OHLCV_FULL_REFRESH,
+        adjust_tolerance: float = OHLCV_ADJUST_TOLERANCE
+    ):
+        self.root = root
+        self.refresh = refresh
+        self.full_refresh = full_refresh
+        self.adjust_tolerance = adjust_tolerance
+
+    def _base(self, symbol: str) -> str:
+        return os.path.join(self.root, _safe_name(symbol))
+
+    def _read_meta(self, symbol: str) -> Dict[str, float]:
+        try:
+            with open(self._base(symbol) + ".json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, symbol: str, meta: Dict[str, float]):
+        tmp = self._base(symbol) + ".json.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._base(symbol) + ".json")
+
+    def read(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Stored bars as a DataFrame backed by the memory-mapped file."""
+        path = self._base(symbol) + ".npy"
+        if not os.path.exists(path):
+            return None
+
+        try:
+            data = np.load(path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning(f"OHLCV store unreadable for {symbol}: {e}")
+            return None
+
+        # One index unit for stored and fetched bars (fingerprints hash it)
+        index = pd.to_datetime(np.asarray(data[:, 0], dtype=np.int64), unit="s").as_unit("ns")
+        return pd.DataFrame(
+            data[:, 1:], index=index, columns=OHLCV_COLUMNS, copy=False)
+
+    def write(self, symbol: str, df: pd.DataFrame):
+        """Atomically replace the stored bars for a symbol."""
+        os.makedirs(self.root, exist_ok=True)
+        index = pd.DatetimeIndex(df.index)
+        data = np.empty((len(df), 1 + len(OHLCV_COLUMNS)), dtype=np.float64)
+        data[:, 0] = index.values.astype("datetime64[s]").astype(np.int64)
+        data[:, 1:] = df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, data)
+        os.replace(tmp, self._base(symbol) + ".npy")
+
+    def _plan(self, symbol: str, start: datetime) -> tuple:
+        """
+        Work out what a sync needs: (stored, meta, fetch_from).
+        fetch_from is None when the stored bars are fresh enough.
+        """
+        now = datetime.now().timestamp()
+        meta = self._read_meta(symbol)
+        stored = self.read(symbol)
+
+        covered = (
+            stored is not None and len(stored) > 0
+            and meta.get("covered_from", float("inf")) <= start.timestamp()
+            and now - meta.get("full_at", 0) < self.full_refresh
+        )
+
+        if not covered:
+            return None, {}, start
+        if now - meta.get("checked_at", 0) < self.refresh:
+            return stored, meta, None
+        # The last stored bar may have been an unfinished session; the one
+        # before it is finished and shows whether history was re-adjusted
+        return stored, meta, stored.index[max(len(stored) - 2, 0)].to_pydatetime()
+
+    def _readjusted(self, stored: Optional[pd.DataFrame], fetched: pd.DataFrame) -> bool:
+        """True when re-fetched finished bars differ from the stored ones."""
+        if stored is None or fetched.empty or len(stored) < 2:
+            return False
+        index = pd.DatetimeIndex(fetched.index).as_unit("ns")
+        common = stored.index[:-1].intersection(index)
+        if common.empty:
+            return False
+        old = stored["Close"].reindex(common).to_numpy(dtype=np.float64)
+        new = fetched["Close"].set_axis(index).reindex(common).to_numpy(dtype=np.float64)
+        return not np.allclose(new, old, rtol=self.adjust_tolerance, atol=0)
+
+    def _apply(
+        self,
+        symbol: str,
+        start: datetime,
+        stored: Optional[pd.DataFrame],
+        meta: Dict[str, float],
+        fetched: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Merge freshly fetched bars into the store and return the window."""
+        now = datetime.now().timestamp()
+        if not fetched.empty:
+            fetched = fetched.set_axis(pd.DatetimeIndex(fetched.index).as_unit("ns"))
+
+        if stored is None:
+            if fetched.empty:
+                return fetched
+            bars = fetched
+            meta = {"covered_from": start.timestamp(), "full_at": now}
+        elif fetched.empty:
+            bars = stored
+        else:
+            bars = pd.concat([stored[stored.index < fetched.index[0]], fetched])
+        meta["checked_at"] = now
+
+        try:
+            self.write(symbol, bars)
+            self._write_meta(symbol, meta)
+        except OSError as e:
+            logger.warning(f"Could not update OHLCV store for {symbol}: {e}")
+
+        return bars[bars.index >= start]
+
+    def sync(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        """Return bars from start to end, fetching only what is missing."""
+        stored, meta, fetch_from = self._plan(symbol, start)
+        if fetch_from is None:
+            return stored[stored.index >= start]
+
+        fetched = download_bars(symbol, fetch_from, end)
+        if self._readjusted(stored, fetched):
+            logger.info(f"History for {symbol} was re-adjusted upstream, refetching")
+            stored, meta = None, {}
+            fetched = download_bars(symbol, start, end)
+        return self._apply(symbol, start, stored, meta, fetched)
+
+    def sync_many(
+        self,
+        symbols: List[str],
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Sync several symbols with a single multi-ticker download.
+        Symbols that come back empty are left out of the result.
+        """
+        plans = {s: self._plan(s, start) for s in symbols}
+        stale = {s: p for s, p in plans.items() if p[2] is not None}
+
+        fetched: Dict[str, pd.DataFrame] = {}
+        if stale:
+            fetch_from = min(p[2] for p in stale.values())
+            fetched = download_bars_many(list(stale), fetch_from, end)
+            fetched = {
+                s: bars[bars.index >= stale[s][2]] if not bars.empty else bars
+                for s, bars in fetched.items()}
+
+        # Re-adjusted histories are replaced in full, again in one download
+        readjusted = [
+            s for s in stale if self._readjusted(stale[s][0], fetched.get(s, pd.DataFrame()))]
+        if readjusted:
+            logger.info(f"History re-adjusted upstream for {readjusted}, refetching")
+            fetched.update(download_bars_many(readjusted, start, end))
+            for symbol in readjusted:
+                plans[symbol] = (None, {}, start)
+
+        result = {}
+        for symbol, (stored, meta, fetch_from) in plans.items():
+            if fetch_from is None:
+                bars = stored[stored.index >= start]
+            else:
+                bars = self._apply(
+                    symbol, start, stored, meta, fetched.get(symbol, pd.DataFrame()))
+            if not bars.empty:
+                result[symbol] = bars
+
+        return result
+
+
+# Recorded bars are kept apart from the live ones
+ohlcv_store = OHLCVStore(
+    DATA_DIR if market_data.name == "yahoo" else os.path.join(DATA_DIR, market_data.name))
+
+
+def prefetch_stock_data(symbols: List[str], years: int = 5) -> Dict[str, pd.DataFrame]:
+    """
+    Bring the local store up to date for many symbols at once, so the
+    per-symbol prediction jobs that follow read bars without network I/O.
+    """
+    end = market_data.now()
+    start = end - timedelta(days=years * 365)
+
+    try:
+        return ohlcv_store.sync_many(symbols, start, end)
+    except Exception as e:
+        logger.error(f"Bulk data fetch error: {e}")
+        return {}
+
+
+def fetch_stock_data(symbol: str, years: int = 5) -> pd.DataFrame:
+    """
+    Fetch historical stock data (local store, topped up from the provider).
+    """
+    end = market_data.now()
+    start = end - timedelta(days=years * 365)
+
+    try:
+        df = ohlcv_store.sync(symbol, start, end)
+
+        if df.empty:
+            raise ValueError(f"No data found for {symbol}")
+
+        if len(df) < 100:
+            raise ValueError(
+                f"Insufficient data for {symbol} (need 100+ days)")
+
+        return df
+
+    except Exception as e:
+        logger.error(f"Data fetch error for {symbol}: {e}")
+        raise
+
+
+def fetch_quotes(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Latest daily bar for many symbols in one provider request.
+    Symbols without data are left out.
+    """
+    return market_data.quotes(symbols)
+
+
+def fetch_quote_info(symbol: str) -> Dict[str, Any]:
+    """Full quote for one symbol, including name and market cap."""
+    return market_data.quote_info(symbol)
+
+
+class QuoteService:
+    """
+    Short-TTL micro-cache in front of the quote sources.
+
+    Cache misses are fetched in bulk, and a symbol already being fetched
+    is awaited instead of requested again, so polling widgets hit
+    upstream at most once per symbol per ttl.
+    """
+
+    def __init__(self, ttl: float = QUOTE_TTL, info_ttl: float = QUOTE_INFO_TTL):
+        self.ttl = ttl
+        self.info_ttl = info_ttl
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.upstream_calls = 0
+
+    def _fresh(self, key: str, ttl: float) -> Optional[Dict[str, Any]]:
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        return None
+
+    def _store(self, key: str, quote: Dict[str, Any]):
+        self._cache[key] = (time.monotonic(), quote)
+        if len(self._cache) > 5000:
+            cutoff = time.monotonic() - max(self.ttl, self.info_ttl)
+            for k in [k for k, (at, _) in self._cache.items() if at < cutoff]:
+                del self._cache[k]
+
+    async def _run(self, keys: List[str], fetch, *args) -> Dict[str, Any]:
+        try:
+            self.upstream_calls += 1
+            return await asyncio.to_thread(fetch, *args)
+        finally:
+            for key in keys:
+                self._inflight.pop(key, None)
+
+    async def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Quotes for many symbols; one upstream call for all misses."""
+        result = {}
+        missing = []
+        for symbol in symbols:
+            quote = self._fresh(f"q:{symbol}", self.ttl)
+            if quote is not None:
+                self.hits += 1
+                result[symbol] = quote
+            else:
+                missing.append(symbol)
+
+        to_fetch = [s for s in missing if f"q:{s}" not in self._inflight]
+        if to_fetch:
+            keys = [f"q:{s}" for s in to_fetch]
+            task = asyncio.create_task(self._run(keys, fetch_quotes, to_fetch))
+            for key in keys:
+                self._inflight[key] = task
+
+        # Capture tasks now: finished ones drop out of _inflight
+        tasks = {s: self._inflight.get(f"q:{s}") for s in missing}
+
+        for symbol in missing:
+            task = tasks[symbol]
+            try:
+                fetched = await asyncio.shield(task) if task is not None else {}
+            except Exception as e:
+                logger.warning(f"Quote fetch failed: {e}")
+                fetched = {}
+            for sym, quote in fetched.items():
+                self._store(f"q:{sym}", quote)
+            if symbol in fetched:
+                result[symbol] = fetched[symbol]
+            else:
+                quote = self._fresh(f"q:{symbol}", self.ttl)
+                if quote is not None:
+                    result[symbol] = quote
+
+        return result
+
+    async def info(self, symbol: str) -> Dict[str, Any]:
+        """
+        Full quote for one symbol. Prices follow the micro-cache TTL;
+        name and market cap are kept for info_ttl.
+        """
+        quote = self._fresh(f"q:{symbol}", self.ttl)
+        info = self._fresh(f"info:{symbol}", self.info_ttl)
+
+        if quote is not None and info is not None:
+            self.hits += 1
+            return {**info, **quote}
+
+        task = self._inflight.get(f"info:{symbol}")
+        if task is None:
+            task = asyncio.create_task(
+                self._run([f"info:{symbol}"], fetch_quote_info, symbol))
+            self._inflight[f"info:{symbol}"] = task
+
+        info = await asyncio.shield(task)
+        self._store(f"info:{symbol}", info)
+        self._store(f"q:{symbol}", {k: v for k, v in info.items() if k not in ("name", "marketCap")})
+        return info
+
+    def quote_sync(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Blocking variant for code running outside the event loop."""
+        quote = self._fresh(f"q:{symbol}", self.ttl)
+        if quote is not None:
+            self.hits += 1
+            return quote
+
+        self.upstream_calls += 1
+        quote = fetch_quotes([symbol]).get(symbol)
+        if quote is not None:
+            self._store(f"q:{symbol}", quote)
+        return quote
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "upstreamCalls": self.upstream_calls}
+
+
+quote_service = QuoteService()
+
+
+def get_current_price(symbol: str) -> float:
+    """Get current/latest price for symbol."""
+    try:
+        quote = quote_service.quote_sync(symbol.upper())
+        return quote["price"] if quote else 0.0
+    except Exception:
+        return 0.0
+
+
+# ===========================================
+# TECHNICAL INDICATORS
+# ===========================================
+
+def calculate_rsi(series: pd.Series, period: int = 14) -> pd.Series:
+    """Calculate Relative Strength Index."""
+    delta = series.diff()
+    gain = delta.where(delta > 0, 0.0)
+    loss = -delta.where(delta < 0, 0.0)
+
+    avg_gain = gain.rolling(window=period, min_periods=1).mean()
+    avg_loss = loss.rolling(window=period, min_periods=1).mean()
+
+    rs = avg_gain / avg_loss.replace(0, np.inf)
+    rsi = 100 - (100 / (1 + rs))
+
+    return rsi.fillna(50)
+
+
+def calculate_macd(series: pd.Series) -> pd.Series:
+    """Calculate MACD (Moving Average Convergence Divergence)."""
+    ema12 = series.ewm(span=12, adjust=False).mean()
+    ema26 = series.ewm(span=26, adjust=False).mean()
+    return ema12 - ema26
+
+
+def calculate_bollinger_bands(series: pd.Series, period: int = 20) -> tuple:
+    """Calculate Bollinger Bands."""
+    sma = series.rolling(window=period).mean()
+    std = series.rolling(window=period).std()
+
+    upper = sma + (std * 2)
+    lower = sma - (std * 2)
+
+    return upper, sma, lower
+
+
+def add_technical_features(df: pd.DataFrame, sentiment: float = 0.0) -> pd.DataFrame:
+    """Add technical indicators as features."""
+    df = df.copy()
+
+    # Moving averages
+    df["MA_5"] = df["Close"].rolling(5).mean()
+    df["MA_10"] = df["Close"].rolling(10).mean()
+    df["MA_20"] = df["Close"].rolling(20).mean()
+    df["MA_50"] = df["Close"].rolling(50).mean()
+
+    # Price changes
+    df["Daily_Return"] = df["Close"].pct_change()
+    df["Weekly_Return"] = df["Close"].pct_change(5)
+
+    # Volatility
+    df["Volatility_5"] = df["Daily_Return"].rolling(5).std()
+    df["Volatility_20"] = df["Daily_Return"].rolling(20).std()
+
+    # Technical indicators
+    df["RSI"] = calculate_rsi(df["Close"])
+    df["MACD"] = calculate_macd(df["Close"])
+
+    # Volume features
+    df["Volume_Change"] = df["Volume"].pct_change()
+    df["Volume_MA"] = df["Volume"].rolling(20).mean()
+    df["Volume_Ratio"] = df["Volume"] / df["Volume_MA"]
+
+    # Price position
+    df["Price_vs_MA20"] = (df["Close"] - df["MA_20"]) / df["MA_20"]
+    df["High_Low_Range"] = (df["High"] - df["Low"]) / df["Close"]
+
+    # Sentiment
+    df["Sentiment"] = sentiment
+
+    # Target: next day's close
+    df["Target"] = df["Close"].shift(-1)
+
+    return df.dropna()
+
+
+# ===========================================
+# STREAMING INDICATORS
+# ===========================================
+
+class RollingWindow:
+    """Fixed-size window with an O(1) running sum."""
+
+    __slots__ = ("size", "values", "total", "pushes")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: deque = deque(maxlen=size)
+        self.total = 0.0
+        self.pushes = 0
+
+    def push(self, x: float):
+        if len(self.values) == self.size:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+
+        # Re-sum now and then so float error can't accumulate (amortized O(1))
+        self.pushes += 1
+        if self.pushes % 1000 == 0:
+            self.total = math.fsum(self.values)
+
+    def copy(self) -> "RollingWindow":
+        window = RollingWindow(self.size)
+        window.values = deque(self.values, maxlen=self.size)
+        window.total, window.pushes = self.total, self.pushes
+        return window
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self, min_periods: Optional[int] = None) -> float:
+        n = len(self.values)
+        if n < (self.size if min_periods is None else min_periods) or n == 0:
+            return float("nan")
+        return self.total / n
+
+    def std(self) -> float:
+        """
+        Sample std (ddof=1) over a full window, like pandas rolling.
+        Centred on the window mean: a running sum of squares cancels
+        badly when the values barely vary (smooth price series).
+        """
+        n = len(self.values)
+        if n < self.size or n < 2:
+            return float("nan")
+        mean = math.fsum(self.values) / n
+        return math.sqrt(math.fsum((v - mean) ** 2 for v in self.values) / (n - 1))
+
+
+class IndicatorState:
+    """
+    Running indicator state for one symbol.
+
+    update() appends a bar and refreshes every indicator of
+    add_technical_features() in constant time; its values match the batch
+    computation within float tolerance (including the simple rolling-mean
+    RSI used there). replace_last=True re-applies the most recent bar,
+    for intraday refreshes of an unfinished session.
+    """
+
+    def __init__(self, sentiment: float = 0.0):
+        self.sentiment = sentiment
+        self.ma = {n: RollingWindow(n) for n in (5, 10, 20, 50)}
+        self.vol_5 = RollingWindow(5)
+        self.vol_20 = RollingWindow(20)
+        self.gain = RollingWindow(14)
+        self.loss = RollingWindow(14)
+        self.volume_ma = RollingWindow(20)
+        self.closes: deque = deque(maxlen=5)
+        self.prev_volume: Optional[float] = None
+        self.ema12: Optional[float] = None
+        self.ema26: Optional[float] = None
+        self.bars = 0
+        self.last_timestamp = None
+        self.values: Dict[str, float] = {}
+        self._before_last: Optional["IndicatorState"] = None
+
+    def _snapshot(self) -> "IndicatorState":
+        snap = IndicatorState.__new__(IndicatorState)
+        snap.__dict__.update(self.__dict__)
+        snap.ma = {n: w.copy() for n, w in self.ma.items()}
+        for name in ("vol_5", "vol_20", "gain", "loss", "volume_ma"):
+            setattr(snap, name, getattr(self, name).copy())
+        snap.closes = deque(self.closes, maxlen=5)
+        snap.values = dict(self.values)
+        snap._before_last = None
+        return snap
+
+    def update(
+        self,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+        timestamp=None,
+        replace_last: bool = False
+    ) -> Dict[str, float]:
+        """Apply one bar and return the latest indicator values."""
+        if replace_last and self._before_last is not None:
+            self.__dict__.update(self._before_last.__dict__)
+        self._before_last = self._snapshot()
+
+        nan = float("nan")
+        prev_close = self.closes[-1] if self.closes else None
+
+        for window in self.ma.values():
+            window.push(close)
+
+        daily_return = close / prev_close - 1 if prev_close is not None else nan
+        weekly_return = close / self.closes[-5] - 1 if len(self.closes) == 5 else nan
+        self.closes.append(close)
+
+        if prev_close is not None:
+            self.vol_5.push(daily_return)
+            self.vol_20.push(daily_return)
+
+        # RSI (rolling mean of gains/losses, min_periods=1)
+        delta = close - prev_close if prev_close is not None else 0.0
+        self.gain.push(delta if delta > 0 else 0.0)
+        self.loss.push(-delta if delta < 0 else 0.0)
+        avg_gain = self.gain.mean(min_periods=1)
+        avg_loss = self.loss.mean(min_periods=1)
+        rs = avg_gain / avg_loss if avg_loss != 0 else 0.0
+        rsi = 100 - (100 / (1 + rs))
+
+        # MACD (EMA, adjust=False)
+        if self.ema12 is None:
+            self.ema12 = self.ema26 = close
+        else:
+            self.ema12 += (2 / 13) * (close - self.ema12)
+            self.ema26 += (2 / 27) * (close - self.ema26)
+
+        # Volume
+        if self.prev_volume is None:
+            volume_change = nan
+        elif self.prev_volume == 0:
+            volume_change = nan if volume == 0 else math.copysign(math.inf, volume)
+        else:
+            volume_change = volume / self.prev_volume - 1
+        self.prev_volume = volume
+        self.volume_ma.push(volume)
+        volume_ma = self.volume_ma.mean()
+
+        ma20 = self.ma[20].mean()
+        self.values = {
+            "Open": open_, "High": high, "Low": low,
+            "Close": close, "Volume": volume,
+            "MA_5": self.ma[5].mean(),
+            "MA_10": self.ma[10].mean(),
+            "MA_20": ma20,
+            "MA_50": self.ma[50].mean(),
+            "Daily_Return": daily_return,
+            "Weekly_Return": weekly_return,
+            "Volatility_5": self.vol_5.std(),
+            "Volatility_20": self.vol_20.std(),
+            "RSI": rsi,
+            "MACD": self.ema12 - self.ema26,
+            "Volume_Change": volume_change,
+            "Volume_MA": volume_ma,
+            "Volume_Ratio": volume / volume_ma if volume_ma else nan,
+            "Price_vs_MA20": (close - ma20) / ma20,
+            "High_Low_Range": (high - low) / close,
+            "Sentiment": self.sentiment,
+        }
+        self.bars += 1
+        self.last_timestamp = timestamp
+        return self.values
+
+    @property
+    def ready(self) -> bool:
+        """True once every indicator has enough history (no NaNs)."""
+        return self.ma[50].full and self.vol_20.full and self.volume_ma.full
+
+    def feature_row(self, columns: Optional[List[str]] = None) -> np.ndarray:
+        """Latest values in prepare_features() column order."""
+        return np.array([self.values[c] for c in (columns or FEATURE_COLS)], dtype=np.float64)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, sentiment: float = 0.0) -> "IndicatorState":
+        """Warm up from historical OHLCV bars."""
+        state = cls(sentiment)
+        for ts, o, h, l, c, v in zip(
+                df.index, df["Open"].to_numpy(), df["High"].to_numpy(),
+                df["Low"].to_numpy(), df["Close"].to_numpy(), df["Volume"].to_numpy()):
+            state.update(float(o), float(h), float(l), float(c), float(v), ts)
+        return state
+
+
+class IndicatorEngine:
+    """Per-symbol IndicatorState, kept in step with incoming bars."""
+
+    def __init__(self):
+        self._states: Dict[str, IndicatorState] = {}
+
+    def get(self, symbol: str) -> Optional[IndicatorState]:
+        return self._states.get(symbol.upper())
+
+    def sync(self, symbol: str, df: pd.DataFrame, sentiment: float = 0.0) -> IndicatorState:
+        """
+        Bring a symbol's state up to date with df: warm up on first use,
+        afterwards apply only bars newer than the last one seen (the last
+        bar itself is re-applied, it may have changed intraday).
+        """
+        symbol = symbol.upper()
+        state = self._states.get(symbol)
+
+        if state is None or state.last_timestamp is None or state.last_timestamp not in df.index:
+            state = self._states[symbol] = IndicatorState.from_frame(df, sentiment)
+            return state
+
+        state.sentiment = sentiment
+        tail = df[df.index >= state.last_timestamp]
+        for i, (ts, row) in enumerate(tail.iterrows()):
+            state.update(
+                float(row["Open"]), float(row["High"]), float(row["Low"]),
+                float(row["Close"]), float(row["Volume"]), ts,
+                replace_last=(i == 0))
+        return state
+
+    def update(self, symbol: str, bar: Dict[str, float], timestamp=None,
+               replace_last: bool = False) -> Dict[str, float]:
+        """Append (or replace) one bar for a warmed-up symbol."""
+        state = self._states.setdefault(symbol.upper(), IndicatorState())
+        return state.update(
+            bar["Open"], bar["High"], bar["Low"], bar["Close"], bar["Volume"],
+            timestamp, replace_last=replace_last)
+
+
+indicator_engine = IndicatorEngine()
+
+
+# ===========================================
+# VECTORIZED FEATURE PANEL
+# ===========================================
+
+def _rolling_sum(x: np.ndarray, n: int) -> np.ndarray:
+    """Sum of the last n values along time (axis 1); partial at the start."""
+    c = np.cumsum(x, axis=1)
+    out = c.copy()
+    out[:, n:] -= c[:, :-n]
+    return out
+
+
+def _rolling_std(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    Sample std (ddof=1) of the last n values along time (axis 1), NaN
+    before the first full window. Each window is centred on its own mean;
+    cumulative sums of squares cancel badly on smooth series.
+    """
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= n:
+        out[:, n - 1:] = np.lib.stride_tricks.sliding_window_view(
+            x, n, axis=1).std(axis=2, ddof=1)
+    return out
+
+
+def _panel_columns(ohlcv: np.ndarray, sentiment) -> tuple:
+    """
+    All add_technical_features() columns for a (symbols, time, OHLCV)
+    array as (symbols, time) matrices, plus the bars-since-start counter.
+
+    Each symbol's bars are right-aligned; leading NaN rows (shorter
+    histories) are treated as a flat copy of the first bar so the kernels
+    stay branch-free, then masked back to NaN wherever the batch version
+    would not have enough history.
+    """
+    data = np.array(ohlcv, dtype=np.float64)
+    n_sym, n_time, _ = data.shape
+
+    has_bar = ~np.isnan(data[:, :, 3])
+    start = np.where(has_bar.any(axis=1), has_bar.argmax(axis=1), n_time)
+    lead = np.arange(n_time)[None, :] < start[:, None]
+    if lead.any():
+        first = data[np.arange(n_sym), np.minimum(start, n_time - 1)]
+        data = np.where(lead[:, :, None], first[:, None, :], data)
+
+    high, low, close, volume = data[:, :, 1], data[:, :, 2], data[:, :, 3], data[:, :, 4]
+    k = np.arange(n_time)[None, :] - start[:, None]  # bars since first bar
+
+    def shifted(x: np.ndarray, n: int) -> np.ndarray:
+        return np.concatenate([np.repeat(x[:, :1], n, axis=1), x[:, :-n]], axis=1)
+
+    def masked(x: np.ndarray, min_bars: int) -> np.ndarray:
+        x[k < min_bars] = np.nan
+        return x
+
+    cols: Dict[str, np.ndarray] = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for n in (5, 10, 20, 50):
+            cols[f"MA_{n}"] = masked(_rolling_sum(close, n) / n, n - 1)
+
+        prev_close = shifted(close, 1)
+        returns = close / prev_close - 1
+        cols["Daily_Return"] = masked(returns.copy(), 1)
+        cols["Weekly_Return"] = masked(close / shifted(close, 5) - 1, 5)
+
+        for n in (5, 20):
+            cols[f"Volatility_{n}"] = masked(_rolling_std(returns, n), n)
+
+        # RSI as calculate_rsi(): ratio of rolling gain/loss means. The
+        # loss count is tracked exactly so "no losses" stays exactly 0.
+        delta = close - prev_close
+        gains = _rolling_sum(np.where(delta > 0, delta, 0.0), 14)
+        losses = _rolling_sum(np.where(delta < 0, -delta, 0.0), 14)
+        loss_days = _rolling_sum((delta < 0).astype(np.int64), 14)
+        rs = np.where(loss_days > 0, gains / np.where(loss_days > 0, losses, 1.0), 0.0)
+        cols["RSI"] = masked(100 - 100 / (1 + rs), 0)
+
+        # MACD: EMAs with adjust=False as first-order IIR filters
+        emas = []
+        for span in (12, 26):
+            alpha = 2 / (span + 1)
+            ema, _ = lfilter([alpha], [1, alpha - 1], close, axis=1,
+                             zi=(1 - alpha) * close[:, :1])
+            emas.append(ema)
+        cols["MACD"] = masked(emas[0] - emas[1], 0)
+
+        cols["Volume_Change"] = masked(volume / shifted(volume, 1) - 1, 1)
+        volume_ma = masked(_rolling_sum(volume, 20) / 20, 19)
+        cols["Volume_MA"] = volume_ma
+        cols["Volume_Ratio"] = volume / volume_ma
+        cols["Price_vs_MA20"] = (close - cols["MA_20"]) / cols["MA_20"]
+        cols["High_Low_Range"] = masked((high - low) / close, 0)
+
+    cols["Close"] = masked(close.copy(), 0)
+    cols["Volume"] = masked(volume.copy(), 0)
+    cols["Sentiment"] = masked(np.broadcast_to(
+        np.asarray(sentiment, dtype=np.float64).reshape(-1, 1), (n_sym, n_time)).copy(), 0)
+
+    return cols, data, k
+
+
+def build_feature_panel(
+    ohlcv: np.ndarray,
+    sentiment=0.0,
+    dtype=np.float64
+) -> tuple:
+    """
+    Features for many symbols in one vectorized pass.
+
+    ohlcv: (symbols, time, 5) array in OHLCV_COLUMNS order, each symbol's
+    bars right-aligned (shorter histories padded with leading NaN rows).
+    sentiment: scalar or one value per symbol.
+
+    Returns (features, target, valid):
+        features  C-contiguous (symbols, time, len(FEATURE_COLS)) of dtype
+        target    next bar's close, (symbols, time)
+        valid     rows add_technical_features() would keep, (symbols, time)
+    """
+    cols, _, k = _panel_columns(ohlcv, sentiment)
+
+    features = np.empty(cols["Close"].shape + (len(FEATURE_COLS),), dtype=dtype)
+    for i, name in enumerate(FEATURE_COLS):
+        features[:, :, i] = cols[name]
+
+    target = np.full(cols["Close"].shape, np.nan)
+    target[:, :-1] = cols["Close"][:, 1:]
+
+    valid = (k >= 49) & ~np.isnan(target) & ~np.isnan(features).any(axis=2)
+    return features, target, valid
+
+
+def build_feature_frames(
+    frames: Dict[str, pd.DataFrame],
+    sentiments: Optional[Dict[str, float]] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    add_technical_features() for many symbols at once: stacks their bars
+    into one panel, runs the vectorized kernels, and splits the result
+    back into per-symbol frames with the same columns and rows.
+    """
+    if not frames:
+        return {}
+
+    symbols = list(frames)
+    bars = {s: frames[s][OHLCV_COLUMNS].dropna() for s in symbols}
+    n_time = max(len(b) for b in bars.values())
+
+    ohlcv = np.full((len(symbols), n_time, len(OHLCV_COLUMNS)), np.nan)
+    for i, symbol in enumerate(symbols):
+        if len(bars[symbol]):
+            ohlcv[i, n_time - len(bars[symbol]):] = bars[symbol].to_numpy(dtype=np.float64)
+
+    sentiments = sentiments or {}
+    sentiment = np.array([sentiments.get(s, 0.0) for s in symbols])
+    cols, data, k = _panel_columns(ohlcv, sentiment)
+
+    target = np.full(data.shape[:2], np.nan)
+    target[:, :-1] = data[:, 1:, 3]
+
+    order = [
+        "MA_5", "MA_10", "MA_20", "MA_50", "Daily_Return", "Weekly_Return",
+        "Volatility_5", "Volatility_20", "RSI", "MACD", "Volume_Change",
+        "Volume_MA", "Volume_Ratio", "Price_vs_MA20", "High_Low_Range", "Sentiment"
+    ]
+
+    result = {}
+    for i, symbol in enumerate(symbols):
+        n_bars = len(bars[symbol])
+        rows = slice(n_time - n_bars, n_time)
+        df = bars[symbol].copy()
+        for name in order:
+            df[name] = cols[name][i, rows]
+        df["Target"] = target[i, rows]
+        result[symbol] = df.dropna()
+
+    return result
+
+
+# ===========================================
+# FEATURE PREPARATION
+# ===========================================
+
+def prepare_features(
+    df: pd.DataFrame,
+    scaler: Optional[StandardScaler] = None
+) -> tuple:
+    """
+    Prepare features for ML models.
+    Pass a fitted scaler (e.g. from the model registry) to reuse it
+    instead of fitting a new one.
+    """
+    feature_cols = FEATURE_COLS
+
+    # Filter to available columns
+    available = [c for c in feature_cols if c in df.columns]
+
+    X = df[available].values
+    y = df["Target"].values
+
+    if scaler is None:
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+    else:
+        X_scaled = scaler.transform(X)
+
+    return X_scaled, y, available, scaler
+
+
+def create_sequences(
+    X: np.ndarray,
+    y: np.ndarray,
+    lookback: int = 20,
+    last_only: bool = False
+) -> tuple:
+    """
+    Create sequences for LSTM model.
+
+    Window i is X[i:i + lookback] paired with y[i + lookback]. Windows are
+    a read-only strided view over X, so nothing is copied. last_only
+    returns just the final window/target pair (for inference).
+    """
+    X = np.ascontiguousarray(X)
+    n = len(X) - lookback
+
+    if n <= 0:
+        return np.empty((0, lookback, X.shape[1]), dtype=X.dtype), y[:0]
+
+    if last_only:
+        return X[np.newaxis, n - 1:n - 1 + lookback], y[-1:]
+
+    row_stride, col_stride = X.strides
+    X_seq = np.lib.stride_tricks.as_strided(
+        X,
+        shape=(n, lookback, X.shape[1]),
+        strides=(row_stride, row_stride, col_stride),
+        writeable=False
+    )
+
+    return X_seq, y[lookback:]
+
+
+SYMBOL_PATTERN = re.compile(r"\^?[A-Z0-9][A-Z0-9.=-]{0,19}")
+
+
+def normalize_symbol(symbol) -> str:
+    """Upper-cased ticker (e.g. AAPL, BRK-B, BTC-USD, ^GSPC); ValueError if malformed."""
+    normalized = symbol.strip().upper() if isinstance(symbol, str) else ""
+    if not SYMBOL_PATTERN.fullmatch(normalized):
+        raise ValueError(f"Invalid symbol: {symbol!r}")
+    return normalized
+
+
+def parse_horizons(horizons) -> Optional[Tuple[int, ...]]:
+    """
+    Normalize requested horizons (list or "1,5,20") to sorted unique
+    bar counts; None/empty means the classic next-bar prediction.
+    """
+    if horizons is None:
+        return None
+    if isinstance(horizons, str):
+        horizons = [h for h in horizons.split(",") if h.strip()]
+    try:
+        result = tuple(sorted({int(h) for h in horizons}))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid horizons: {horizons}")
+    if not result:
+        return None
+    if result[0] < 1 or result[-1] > FORECAST_MAX_HORIZON:
+        raise ValueError(f"Horizons must be between 1 and {FORECAST_MAX_HORIZON}")
+    return result
+
+
+def forecast_key(symbol: str, horizons: Optional[Tuple[int, ...]] = None) -> str:
+    """Cache/registry key: the symbol, plus its horizons in forecast mode."""
+    if not horizons:
+        return symbol
+    return f"{symbol}@{'-'.join(str(h) for h in horizons)}"
+
+
+def horizon_targets(y: np.ndarray, horizons: Tuple[int, ...]) -> np.ndarray:
+    """
+    (rows, horizons) targets from the next-bar Target column: the close h
+    bars after row t is y[t + h - 1]. Rows too close to the end are NaN.
+    """
+    Y = np.full((len(y), len(horizons)), np.nan)
+    for j, h in enumerate(horizons):
+        Y[:len(y) - h + 1, j] = y[h - 1:]
+    return Y
+
+
+# ===========================================
+# ML MODELS
+# ===========================================
+
+def train_random_forest(X: np.ndarray, y: np.ndarray, n_jobs: int = -1) -> RandomForestRegressor:
+    """Train Random Forest model."""
+    model = RandomForestRegressor(
+        n_estimators=150,
+        max_depth=15,
+        min_samples_split=5,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+    model.fit(X, y)
+    return model
+
+
+def train_gradient_boosting(X: np.ndarray, y: np.ndarray) -> GradientBoostingRegressor:
+    """Train Gradient Boosting model (one booster per column of a 2-D y)."""
+    model = GradientBoostingRegressor(
+        n_estimators=100,
+        max_depth=5,
+        learning_rate=0.1,
+        random_state=42
+    )
+    if y.ndim > 1:
+        model = MultiOutputRegressor(model)
+    model.fit(X, y)
+    return model
+
+
+def train_xgboost(X: np.ndarray, y: np.ndarray, n_jobs: Optional[int] = None):
+    """Train XGBoost model if available."""
+    if not xgb_available():
+        return None
+
+    model = xgb.XGBRegressor(
+        n_estimators=150,
+        max_depth=6,
+        learning_rate=0.1,
+        verbosity=0,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+    model.fit(X, y)
+    return model
+
+
+def update_random_forest(
+    model: RandomForestRegressor,
+    X: np.ndarray,
+    y: np.ndarray,
+    n_new: int = MODEL_UPDATE_TREES
+) -> RandomForestRegressor:
+    """Grow an existing forest by n_new trees fitted on the latest data."""
+    model.set_params(warm_start=True, n_estimators=model.n_estimators + n_new)
+    model.fit(X, y)
+    return model
+
+
+def update_gradient_boosting(
+    model: GradientBoostingRegressor,
+    X: np.ndarray,
+    y: np.ndarray,
+    n_new: int = MODEL_UPDATE_TREES
+) -> GradientBoostingRegressor:
+    """Add n_new boosting stages on the residuals of the latest data."""
+    if isinstance(getattr(model, "estimators_", None), list):
+        # MultiOutputRegressor: extend each horizon's booster
+        for j, estimator in enumerate(model.estimators_):
+            update_gradient_boosting(estimator, X, y[:, j], n_new)
+        return model
+    model.set_params(warm_start=True, n_estimators=model.n_estimators + n_new)
+    model.fit(X, y)
+    return model
+
+
+def update_xgboost(model, X: np.ndarray, y: np.ndarray, n_new: int = MODEL_UPDATE_TREES):
+    """Continue boosting an existing XGBoost model for n_new rounds."""
+    if not xgb_available() or model is None:
+        return train_xgboost(X, y)
+
+    params = model.get_params()
+    params["n_estimators"] = n_new
+    updated = xgb.XGBRegressor(**params)
+    updated.fit(X, y, xgb_model=model.get_booster())
+    return updated
+
+
+# ===========================================
+# LSTM MODEL
+# ===========================================
+
+def lstm_predictor_class():
+    """
+    The LSTMPredictor nn.Module, defined on first use so that torch is
+    only imported when an LSTM is actually built.
+    """
+    cls = globals().get("LSTMPredictor")
+    if cls is not None:
+        return cls
+
+    class LSTMPredictor(nn.Module):
+        """LSTM Neural Network for time series prediction."""
+
+        def __init__(
+            self,
+            n_features: int,
+            hidden_size: int = 64,
+            num_layers: int = 2,
+            n_outputs: int = 1
+        ):
+            super().__init__()
+
+            self.lstm = nn.LSTM(
+                input_size=n_features,
+                hidden_size=hidden_size,
+                num_layers=num_layers,
+                batch_first=True,
+                dropout=0.2 if num_layers > 1 else 0
+            )
+
+            self.dropout = nn.Dropout(0.2)
+            self.fc = nn.Linear(hidden_size, n_outputs)
+
+        def forward(self, x):
+            lstm_out, _ = self.lstm(x)
+            out = self.dropout(lstm_out[:, -1, :])
+            return self.fc(out)
+
+    # Picklable as predict_stock.LSTMPredictor
+    LSTMPredictor.__qualname__ = "LSTMPredictor"
+    globals()["LSTMPredictor"] = LSTMPredictor
+    return LSTMPredictor
+
+
+def train_lstm(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    n_features: int,
+    epochs: int = 50,
+    batch_size: int = 32,
+    model: Optional[nn.Module] = None,
+    time_budget: float = LSTM_TIME_BUDGET,
+    patience: int = LSTM_PATIENCE,
+    val_fraction: float = 0.1
+) -> tuple:
+    """
+    Train LSTM model (or fine-tune an existing one when given).
+    A 2-D y_train trains one output per column on a shared encoder.
+
+    Shuffled mini-batches; the most recent val_fraction of the windows is
+    held out for early stopping, and training stops once time_budget
+    seconds are spent. The best weights on validation are kept.
+
+    X_train may be the strided window view from create_sequences(): each
+    mini-batch gathers only its own windows, so the overlapping windows
+    are never materialized all at once.
+    """
+    if model is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        n_outputs = y_train.shape[1] if np.ndim(y_train) > 1 else 1
+        model = lstm_predictor_class()(n_features, n_outputs=n_outputs).to(device)
+    else:
+        device = next(model.parameters()).device.type
+
+    criterion = nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+
+    def windows(idx) -> torch.Tensor:
+        return torch.from_numpy(np.ascontiguousarray(X_train[idx], dtype=np.float32)).to(device)
+
+    y_tensor = torch.tensor(
+        y_train, dtype=torch.float32).view(len(y_train), -1).to(device)
+
+    # Chronological hold-out (shuffled splits would leak the future)
+    n_val = int(len(X_train) * val_fraction) if len(X_train) >= 50 else 0
+    n_train = len(X_train) - n_val
+    X_val, y_val = windows(slice(n_train, None)), y_tensor[n_train:]
+
+    deadline = time.monotonic() + time_budget
+    best_loss = float("inf")
+    best_state = None
+    stale_epochs = 0
+
+    for epoch in range(epochs):
+        model.train()
+        order = torch.randperm(n_train)
+
+        for start in range(0, n_train, batch_size):
+            idx = order[start:start + batch_size]
+            optimizer.zero_grad()
+            loss = criterion(model(windows(idx.numpy())), y_tensor[idx.to(device)])
+            loss.backward()
+            optimizer.step()
+
+            if time.monotonic() > deadline:
+                break
+
+        if n_val:
+            model.eval()
+            with torch.no_grad():
+                val_loss = criterion(model(X_val), y_val).item()
+
+            if val_loss < best_loss:
+                best_loss = val_loss
+                best_state = {k: v.detach().clone() for k, v in model.state_dict().items()}
+                stale_epochs = 0
+            else:
+                stale_epochs += 1
+
+        if (epoch + 1) % 10 == 0:
+            logger.debug(
+                f"LSTM Epoch {epoch + 1}/{epochs}, Loss: {loss.item():.6f}, "
+                f"Val: {best_loss:.6f}")
+
+        if time.monotonic() > deadline:
+            logger.info(f"LSTM time budget reached after {epoch + 1} epochs")
+            break
+        if n_val and stale_epochs >= patience:
+            logger.debug(f"LSTM early stop after {epoch + 1} epochs")
+            break
+
+    if best_state is not None:
+        model.load_state_dict(best_state)
+
+    return model, device
+
+
+def predict_with_lstm(model: nn.Module, device: str, X: np.ndarray) -> np.ndarray:
+    """Make predictions with LSTM model (one column per output if several)."""
+    model.eval()
+    X_tensor = torch.tensor(X, dtype=torch.float32).to(device)
+
+    with torch.no_grad():
+        predictions = model(X_tensor).cpu().numpy()
+
+    return predictions.ravel() if predictions.shape[1] == 1 else predictions
+
+
+# ===========================================
+# INFERENCE ENGINE
+# ===========================================
+
+TREE_MODELS = ("rf", "gb", "xgb")
+
+
+def _per_output(model) -> bool:
+    """True for a MultiOutputRegressor (one fitted estimator per output)."""
+    return hasattr(model, "estimators_") and not hasattr(model, "n_estimators")
+
+
+def _sklearn_trees(model) -> Tuple[list, float]:
+    """
+    ([(tree_, output column)], leaf scale) of a fitted RF or GB regressor,
+    or of one GB regressor per output. Column None feeds every output.
+    """
+    if _per_output(model):
+        trees = []
+        for column, estimator in enumerate(model.estimators_):
+            sub, scale = _sklearn_trees(estimator)
+            trees += [(t, column) for t, _ in sub]
+        return trees, scale  # same learning_rate for every output
+    if hasattr(model, "learning_rate"):  # gradient boosting: offset + lr * sum
+        return [(t.tree_, None) for t in np.ravel(model.estimators_)], model.learning_rate
+    return [(t.tree_, None) for t in model.estimators_], 1.0 / len(model.estimators_)
+
+
+def _sibling_layout(
+    feature: np.ndarray,
+    threshold: np.ndarray,
+    left: np.ndarray,
+    right: np.ndarray,
+    value: np.ndarray
+) -> Tuple[np.ndarray, ...]:
+    """
+    Renumber a tree breadth-first so every split's children are adjacent:
+    one step is then node = first[node] + (x[feature[node]] > threshold[node]).
+    Leaves point at themselves with an infinite threshold; leaf values
+    are (nodes, outputs).
+    """
+    value = value.reshape(len(left), -1)
+    order = [0]
+    first = {}
+    for old in order:  # grows while iterating
+        if left[old] != old:
+            first[old] = len(order)
+            order.extend((int(left[old]), int(right[old])))
+
+    new_id = np.empty(len(left), dtype=np.int32)
+    new_id[order] = np.arange(len(order))
+    order = np.asarray(order)
+    leaf = left[order] == order
+    return (
+        np.where(leaf, 0, feature[order]).astype(np.int32),
+        np.where(leaf, np.inf, threshold[order]),
+        np.where(leaf, np.arange(len(order)),
+                 [first.get(int(o), 0) for o in order]).astype(np.int32),
+        np.where(leaf[:, None], value[order], 0.0)
+    )
+
+
+def _flatten_sklearn(tree) -> Tuple[Any, ...]:
+    leaf = tree.children_left < 0
+    nodes = np.arange(tree.node_count)
+    return _sibling_layout(
+        tree.feature,
+        tree.threshold,
+        np.where(leaf, nodes, tree.children_left),
+        np.where(leaf, nodes, tree.children_right),
+        tree.value[:, :, 0]
+    ) + (int(tree.max_depth),)
+
+
+def _flatten_xgb(tree: Dict[str, Any]) -> Tuple[Any, ...]:
+    nodes = {}
+    stack = [(tree, 0)]
+    depth = 0
+    while stack:
+        node, level = stack.pop()
+        nodes[node["nodeid"]] = node
+        depth = max(depth, level)
+        stack.extend((child, level + 1) for child in node.get("children", []))
+
+    n = max(nodes) + 1
+    feature = np.zeros(n, dtype=np.int32)
+    threshold = np.full(n, np.inf)
+    left = np.arange(n, dtype=np.int32)
+    right = np.arange(n, dtype=np.int32)
+    value = np.zeros(n)
+    for i, node in nodes.items():
+        if "leaf" in node:
+            value[i] = node["leaf"]
+            continue
+        feature[i] = int(node["split"].lstrip("f"))
+        # XGBoost tests float32(x) < float32(split); as "<=" on float64:
+        threshold[i] = np.nextafter(np.float32(node["split_condition"]), np.float32(-np.inf))
+        left[i], right[i] = node["yes"], node["no"]
+    return _sibling_layout(feature, threshold, left, right, value) + (depth,)
+
+
+class InferenceEngine:
+    """
+    Frozen, numpy-only form of a trained ensemble for serving.
+
+    All tree models are flattened into one set of node arrays and walked
+    together, one vectorized step per tree level; the LSTM runs as a
+    plain numpy forward pass. Each model is evaluated exactly once per
+    call, for any number of rows, and no sklearn/xgboost/torch objects
+    are touched. Members that do not reproduce their native predictions
+    when compiled are served by the native model instead.
+    """
+
+    def __init__(self, state: Dict[str, Any], native: Optional[Dict[str, Any]] = None):
+        self.state = state
+        self.native = native or {}
+        self.members = state["members"]
+        self.weights = state["weights"]
+        self._rows = state["groups"]
+
+    # --- compilation -------------------------------------------------
+
+    @classmethod
+    def from_models(
+        cls,
+        models: Dict[str, Any],
+        n_features: int,
+        lookback: int = 20,
+        n_outputs: int = 1,
+        weights: Optional[Dict[str, float]] = None,
+        tolerance: float = 1e-4
+    ) -> "InferenceEngine":
+        """
+        Compile fitted models; each member is verified on random rows.
+        n_outputs > 1 compiles multi-horizon models (vector leaves).
+        """
+        rng = np.random.default_rng(0)
+        X_check = rng.normal(size=(64, n_features))
+        X_seq_check = rng.normal(size=(8, lookback, n_features))
+
+        parts = []  # (name, [(tree arrays, output column)], scale)
+        native = {}
+        for name in TREE_MODELS:
+            model = models.get(name)
+            if model is None:
+                continue
+            try:
+                if name == "xgb":
+                    booster = model.get_booster()
+                    dumps = booster.get_dump(dump_format="json")
+                    # Multi-target boosters grow one tree per target per round
+                    n_targets = len(dumps) // max(booster.num_boosted_rounds(), 1)
+                    trees = [
+                        (_flatten_xgb(json.loads(d)), i % n_targets if n_targets > 1 else None)
+                        for i, d in enumerate(dumps)
+                    ]
+                    scale = 1.0
+                else:
+                    tree_objs, scale = _sklearn_trees(model)
+                    trees = [(_flatten_sklearn(t), column) for t, column in tree_objs]
+                parts.append((name, trees, scale))
+            except Exception as e:
+                logger.warning(f"Could not compile {name}, serving it natively: {e}")
+                native[name] = model
+
+        state = cls._pack(parts, n_outputs)
+        state["weights"] = dict(weights or ENSEMBLE_WEIGHTS)
+        state["members"] = [n for n in TREE_MODELS + ("lstm",) if models.get(n) is not None]
+
+        # Offsets (RF 0, GB init estimate, XGB base score) from one native call
+        engine = cls(state)
+        if parts:
+            raw = engine._tree_sums(X_check)
+            for name, _, _ in parts:
+                expected = np.asarray(
+                    models[name].predict(X_check), dtype=np.float64).reshape(len(X_check), -1)
+                offset = np.median(expected - raw[name], axis=0)
+                error = np.max(np.abs(raw[name] + offset - expected))
+                if error > tolerance * (1 + np.max(np.abs(expected))):
+                    logger.warning(f"Compiled {name} deviates by {error:.3g}, serving it natively")
+                    native[name] = models[name]
+                    offset = np.nan
+                state["groups"][name]["offset"] = offset
+
+        if models.get("lstm") is not None:
+            state["lstm"] = cls._pack_lstm(models["lstm"].state_dict())
+            expected = predict_with_lstm(
+                models["lstm"], models["device"], X_seq_check).reshape(len(X_seq_check), -1)
+            error = np.max(np.abs(cls(state)._lstm(X_seq_check) - expected))
+            if error > tolerance * (1 + np.max(np.abs(expected))):
+                logger.warning(f"Compiled lstm deviates by {error:.3g}, serving it natively")
+                native["lstm"] = (models["lstm"], models["device"])
+                del state["lstm"]
+
+        for name in native:
+            state["groups"].pop(name, None)
+        return cls(state, native)
+
+    @staticmethod
+    def _pack(parts: List[tuple], n_outputs: int = 1) -> Dict[str, Any]:
+        """Concatenate every tree into shared node arrays."""
+        feature, threshold, first, value = [], [], [], []
+        roots, groups = [], {}
+        n_nodes = 0
+        depth = 0
+        for name, trees, scale in parts:
+            start = len(roots)
+            for (f, thr, child, val, tree_depth), column in trees:
+                if column is not None:
+                    # Single-output tree feeding one column of the forecast
+                    wide = np.zeros((len(val), n_outputs))
+                    wide[:, column] = val[:, 0]
+                    val = wide
+                # Child indices become positions in the shared arrays
+                roots.append(n_nodes)
+                feature.append(f)
+                threshold.append(thr)
+                first.append(child + n_nodes)
+                value.append(val)
+                n_nodes += len(f)
+                depth = max(depth, tree_depth)
+            groups[name] = {"start": start, "stop": len(roots), "scale": scale, "offset": 0.0}
+
+        def cat(arrays, dtype):
+            return np.concatenate(arrays).astype(dtype) if arrays else np.zeros(0, dtype=dtype)
+
+        # Compact storage: the smallest feature index type, float32
+        # thresholds rounded down (trees compare float32 features, so
+        # x <= t exactly when x <= floor32(t)) and float32 leaf values.
+        feature = cat(feature, np.int64)
+        threshold = cat(threshold, np.float64)
+        threshold32 = threshold.astype(np.float32)
+        threshold32 = np.where(
+            threshold32 > threshold, np.nextafter(threshold32, np.float32(-np.inf)), threshold32)
+
+        return {
+            "feature": feature.astype(np.min_scalar_type(feature.max(initial=0))),
+            "threshold": threshold32,
+            "first": cat(first, np.int32),
+            "value": cat(value, np.float32).reshape(-1, n_outputs),
+            "roots": np.asarray(roots, dtype=np.int32),
+            "depth": depth,
+            "groups": groups,
+            "outputs": n_outputs
+        }
+
+    @staticmethod
+    def _pack_lstm(state_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        LSTM weights as float32 arrays, one (input, recurrent, bias) triple
+        per layer. The input/forget/output gate rows are halved so one tanh
+        yields all gates: sigmoid(x) = (1 + tanh(x / 2)) / 2.
+        """
+        w = {k: v.detach().cpu().numpy().astype(np.float32) for k, v in state_dict.items()}
+        layers = []
+        while f"lstm.weight_ih_l{len(layers)}" in w:
+            n = len(layers)
+            hidden = w[f"lstm.weight_hh_l{n}"].shape[1]
+            half = np.full((4 * hidden, 1), 0.5, dtype=np.float32)
+            half[2 * hidden:3 * hidden] = 1.0  # cell gate keeps plain tanh
+            layers.append((
+                np.ascontiguousarray((w[f"lstm.weight_ih_l{n}"] * half).T),
+                np.ascontiguousarray((w[f"lstm.weight_hh_l{n}"] * half).T),
+                (w[f"lstm.bias_ih_l{n}"] + w[f"lstm.bias_hh_l{n}"]) * half[:, 0]
+            ))
+        return {"layers": layers, "fc_weight": w["fc.weight"].T.copy(), "fc_bias": w["fc.bias"]}
+
+    # --- evaluation --------------------------------------------------
+
+    def _tree_sums(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        """Scaled leaf sums per tree model (before offsets), (rows, outputs)."""
+        s = self.state
+        if not len(s["roots"]):
+            return {}
+        # Tree libraries compare float32 features
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(s["roots"], (len(X), len(s["roots"])))
+        feature, threshold, first = s["feature"], s["threshold"], s["first"]
+        for _ in range(s["depth"]):
+            node = first[node] + (X[rows, feature[node]] > threshold[node])
+
+        leaves = s["value"].reshape(len(s["value"]), -1)[node]
+        return {
+            name: leaves[:, g["start"]:g["stop"]].sum(axis=1, dtype=np.float64) * g["scale"]
+            for name, g in s["groups"].items()
+        }
+
+    def _lstm(self, X_seq: np.ndarray) -> np.ndarray:
+        """PyTorch-compatible LSTM + linear head forward pass (eval mode)."""
+        lstm = self.state["lstm"]
+        h_seq = np.asarray(X_seq, dtype=np.float32)
+        batch, steps = h_seq.shape[:2]
+        for w_ih, w_hh, bias in lstm["layers"]:
+            hidden = w_hh.shape[0]
+            gates_in = h_seq @ w_ih + bias  # input projection for all steps at once
+            h = np.zeros((batch, hidden), dtype=np.float32)
+            c = np.zeros((batch, hidden), dtype=np.float32)
+            outputs = np.empty((batch, steps, hidden), dtype=np.float32)
+            for t in range(steps):
+                gates = np.tanh(gates_in[:, t] + h @ w_hh)
+                ifo = gates * 0.5 + 0.5  # the cell-gate slice of this is unused
+                c = ifo[:, hidden:2 * hidden] * c + ifo[:, :hidden] * gates[:, 2 * hidden:3 * hidden]
+                h = ifo[:, 3 * hidden:] * np.tanh(c)
+                outputs[:, t] = h
+            h_seq = outputs
+        return (h_seq[:, -1] @ lstm["fc_weight"] + lstm["fc_bias"]).astype(np.float64)
+
+    def predict(self, X: np.ndarray, X_seq: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Per-model and ensemble forecasts for each row of X (2-D); the LSTM
+        uses the matching windows in X_seq when given. Each is (rows,), or
+        (rows, outputs) for multi-horizon models.
+        """
+        preds = {}
+        with stage("predict:trees"):
+            for name, total in self._tree_sums(X).items():
+                preds[name] = total + self.state["groups"][name]["offset"]
+        for name in TREE_MODELS:
+            if name in self.native:
+                with stage(f"predict:{name}"):
+                    preds[name] = np.asarray(
+                        self.native[name].predict(X), dtype=np.float64).reshape(len(X), -1)
+        if X_seq is not None and len(X_seq):
+            with stage("predict:lstm"):
+                if "lstm" in self.state:
+                    preds["lstm"] = self._lstm(X_seq)
+                elif "lstm" in self.native:
+                    preds["lstm"] = predict_with_lstm(
+                        *self.native["lstm"], X_seq).reshape(len(X_seq), -1)
+
+        weights = {n: self.weights.get(n, 0.0) for n in preds}
+        total = sum(weights.values())
+        if total == 0:
+            raise ValueError("No models available for prediction")
+        preds["ensemble"] = sum(preds[n] * w for n, w in weights.items()) / total
+        if self.state.get("outputs", 1) == 1:
+            return {name: p[:, 0] for name, p in preds.items()}
+        return preds
+
+    @property
+    def frozen(self) -> bool:
+        """True when no member needs its native library."""
+        return not self.native
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [v for v in self.state.values() if isinstance(v, np.ndarray)]
+        if "lstm" in self.state:
+            lstm = self.state["lstm"]
+            arrays += [a for layer in lstm["layers"] for a in layer]
+            arrays += [lstm["fc_weight"], lstm["fc_bias"]]
+        return sum(a.nbytes for a in arrays)
+
+
+class FrozenScaler:
+    """StandardScaler.transform() from saved mean/scale, without sklearn."""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+# ===========================================
+# MODEL REGISTRY
+# ===========================================
+
+def data_fingerprint(df: pd.DataFrame, lookback: int) -> str:
+    """
+    Fingerprint of the bars a model set is trained on.
+    Changes when bars are added/dropped or history gets re-adjusted.
+    """
+    digest = hashlib.sha1()
+    # Epoch nanoseconds, so the index's datetime unit does not matter
+    digest.update(pd.DatetimeIndex(df.index).as_unit("ns").asi8.tobytes())
+    digest.update(np.ascontiguousarray(df["Close"].to_numpy(dtype=np.float64)).tobytes())
+    digest.update(str(lookback).encode())
+    return digest.hexdigest()[:16]
+
+
+class ModelRegistry:
+    """
+    Persists trained models, scaler and feature list per symbol as
+    artifacts in the cache backend (shared by all workers).
+
+    Entries are keyed by symbol + data fingerprint. Loaded entries stay in
+    memory, so a warm symbol is a load-and-infer operation instead of a
+    full retrain.
+
+    Every entry carries a compiled InferenceEngine. When it needs no
+    native model, a numpy-only "<symbol>.frozen" artifact is stored next
+    to the full one; serve-only workers load that and never import
+    sklearn, xgboost or torch.
+
+    Residency: with MODEL_COMPACT only the compiled engine stays in
+    memory (native models are reloaded from the artifact store when an
+    update needs them), and the least recently used entries are evicted
+    once the resident total exceeds the memory budget.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend = cache_backend,
+        max_age: int = MODEL_MAX_AGE,
+        budget: int = MODEL_MEMORY_BUDGET,
+        compact: bool = MODEL_COMPACT
+    ):
+        self.backend = backend
+        self.max_age = max_age
+        self.budget = budget
+        self.compact = compact
+        self._entries: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _compile(entry: Dict[str, Any]) -> Optional[InferenceEngine]:
+        try:
+            return InferenceEngine.from_models(
+                entry["models"], entry["n_features"], entry["lookback"],
+                n_outputs=len(entry.get("horizons") or (1,)))
+        except Exception as e:
+            logger.warning(f"Could not compile models for {entry['symbol']}: {e}")
+            return None
+
+    # --- residency ---------------------------------------------------
+
+    def _admit(
+        self,
+        symbol: str,
+        entry: Dict[str, Any],
+        native_bytes: int,
+        keep_native: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Make entry resident (compact unless keep_native) and evict least
+        recently used entries beyond the budget. native_bytes is the
+        serialized size of its native models.
+        """
+        engine = entry.get("engine")
+        if self.compact and engine is not None and not keep_native:
+            # Natively served members stay reachable through engine.native
+            entry["models"] = {}
+        keeps_native = bool(entry["models"]) or (engine is not None and not engine.frozen)
+        entry["nbytes"] = (engine.nbytes if engine is not None else 0) + (
+            native_bytes if keeps_native else 0)
+
+        with self._lock:
+            self._entries[symbol] = entry
+            self._entries.move_to_end(symbol)
+            total = sum(e["nbytes"] for e in self._entries.values())
+            while self.budget and total > self.budget and len(self._entries) > 1:
+                evicted, old = self._entries.popitem(last=False)
+                total -= old["nbytes"]
+                self.evictions += 1
+                logger.info(f"Evicted models for {evicted} ({old['nbytes'] / 2**20:.1f} MB)")
+        return entry
+
+    def _touch(self, symbol: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None:
+                self._entries.move_to_end(symbol)
+            return entry
+
+    # --- artifacts ---------------------------------------------------
+
+    def _read_frozen(self, symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            blob = self.backend.get_artifact(f"{symbol}.frozen")
+            if not blob:  # missing, or emptied when the models stopped compiling
+                return None
+            artifact = pickle.loads(blob)
+        except Exception as e:
+            logger.warning(f"Frozen model artifact unreadable for {symbol}: {e}")
+            return None
+
+        entry = dict(artifact["meta"])
+        entry.setdefault("horizons", None)
+        entry.setdefault("last_bar", None)
+        entry.setdefault("rows", None)
+        entry["scaler"] = FrozenScaler(*artifact["scaler"])
+        entry["models"] = {}
+        entry["engine"] = InferenceEngine(artifact["engine"])
+        return entry
+
+    def _read(self, symbol: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Full artifact as (entry with native models, serialized size)."""
+        try:
+            blob = self.backend.get_artifact(symbol)
+            if blob is None:
+                return None
+            # Unpickling imports torch (LSTM weights); go through the lazy lock
+            torch._load()
+            artifact = joblib.load(io.BytesIO(blob))
+        except Exception as e:
+            logger.warning(f"Model artifact unreadable for {symbol}: {e}")
+            return None
+
+        models = dict(artifact["models"])
+        if artifact.get("lstm_state") is not None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            lstm = lstm_predictor_class()(
+                artifact["n_features"], n_outputs=len(artifact["lstm_state"]["fc.bias"]))
+            lstm.load_state_dict(artifact["lstm_state"])
+            models["lstm"] = lstm.to(device)
+            models["device"] = device
+
+        entry = {k: v for k, v in artifact.items() if k != "lstm_state"}
+        entry.setdefault("updated_at", entry["trained_at"])
+        entry.setdefault("horizons", None)
+        entry.setdefault("last_bar", None)
+        entry.setdefault("rows", None)
+        entry["models"] = models
+        return entry, len(blob)
+
+    def _load(self, symbol: str) -> Optional[Dict[str, Any]]:
+        # The frozen artifact is all a compact (or serve-only) entry needs
+        if self.compact or SERVE_ONLY:
+            entry = self._read_frozen(symbol)
+            if entry is not None:
+                self.loads += 1
+                return self._admit(symbol, entry, 0)
+
+        found = self._read(symbol)
+        if found is None:
+            return None
+        entry, native_bytes = found
+        entry["engine"] = self._compile(entry)
+        self.loads += 1
+        return self._admit(symbol, entry, native_bytes)
+
+    # --- lookups -----------------------------------------------------
+
+    def get(self, symbol: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh entry matching the fingerprint, else None."""
+        entry = self._touch(symbol)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            # Another worker may have stored a newer artifact
+            entry = self._load(symbol)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return None
+
+        age = datetime.now().timestamp() - entry["updated_at"]
+        if age > self.max_age:
+            return None
+
+        return entry
+
+    def latest(self, symbol: str, max_age: float = MODEL_FULL_REFIT_AGE) -> Optional[Dict[str, Any]]:
+        """
+        Most recent entry regardless of fingerprint, as long as its last
+        full refit is younger than max_age (base for updates).
+        """
+        entry = self._touch(symbol) or self._load(symbol)
+        if entry is None:
+            return None
+
+        age = datetime.now().timestamp() - entry["trained_at"]
+        return entry if age <= max_age else None
+
+    def native(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        symbol's entry with its native (trainable) models and scaler, read
+        back from the artifact store when only the compact form is
+        resident. Not made resident.
+        """
+        entry = self._touch(symbol)
+        if entry is not None and entry["models"]:
+            return entry
+        found = self._read(symbol)
+        if found is None or (entry is not None and found[0]["fingerprint"] != entry["fingerprint"]):
+            return None
+        return found[0]
+
+    def put(
+        self,
+        symbol: str,
+        fingerprint: str,
+        models: Dict[str, Any],
+        scaler: StandardScaler,
+        features: List[str],
+        lookback: int,
+        trained_at: Optional[float] = None,
+        horizons: Optional[Tuple[int, ...]] = None,
+        bars: Optional[pd.DataFrame] = None
+    ) -> Dict[str, Any]:
+        """
+        Store a trained model set in memory and in the backend.
+        trained_at is the time of the last full refit (now if omitted);
+        horizons marks multi-horizon models (one output per horizon);
+        bars are the bars they were fitted on (last bar and row count are
+        kept, so later updates can tell whether any bars were appended).
+        """
+        lstm = models.get("lstm")
+        now = datetime.now().timestamp()
+        entry = {
+            "symbol": symbol,
+            "fingerprint": fingerprint,
+            "trained_at": trained_at or now,
+            "updated_at": now,
+            "features": list(features),
+            "lookback": lookback,
+            "n_features": len(features),
+            "horizons": list(horizons) if horizons else None,
+            "last_bar": bars.index[-1].timestamp() if bars is not None and len(bars) else None,
+            "rows": len(bars) if bars is not None else None,
+            "scaler": scaler,
+            "models": models,
+        }
+
+        artifact = dict(entry)
+        artifact["models"] = {k: models.get(k) for k in ("rf", "gb", "xgb")}
+        artifact["lstm_state"] = (
+            {k: v.cpu() for k, v in lstm.state_dict().items()}
+            if lstm is not None else None
+        )
+
+        engine = entry["engine"] = self._compile(entry)
+        native_bytes = 0
+        persisted = False
+        try:
+            buffer = io.BytesIO()
+            joblib.dump(artifact, buffer)
+            native_bytes = buffer.tell()
+            self.backend.put_artifact(symbol, buffer.getvalue())
+            # An empty frozen artifact hides an older one from _read_frozen()
+            self.backend.put_artifact(f"{symbol}.frozen", pickle.dumps({
+                "meta": {k: entry[k] for k in (
+                    "symbol", "fingerprint", "trained_at", "updated_at",
+                    "features", "lookback", "n_features", "horizons", "last_bar", "rows")},
+                "scaler": (scaler.mean_, scaler.scale_),
+                "engine": engine.state
+            }, protocol=pickle.HIGHEST_PROTOCOL) if engine is not None and engine.frozen else b"")
+            persisted = True
+        except Exception as e:
+            logger.warning(f"Could not persist models for {symbol}: {e}")
+
+        # Without a stored artifact there is nothing to reload native models from
+        return self._admit(symbol, entry, native_bytes, keep_native=not persisted)
+
+    def clear(self):
+        """Drop in-memory entries (stored artifacts are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def footprint(self) -> int:
+        """Approximate bytes held by resident models."""
+        with self._lock:
+            return sum(e["nbytes"] for e in self._entries.values())
+
+    def usage(self) -> Dict[str, int]:
+        """Resident bytes per entry, least recently used first."""
+        with self._lock:
+            return {k: e["nbytes"] for k, e in self._entries.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        usage = self.usage()
+        return {
+            "entries": len(usage),
+            "bytes": sum(usage.values()),
+            "budget": self.budget,
+            "compact": self.compact,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "bySymbol": usage
+        }
+
+
+model_registry = ModelRegistry()
+
+
+# ===========================================
+# ENSEMBLE PREDICTION
+# ===========================================
+
+def ensemble_predict(
+    models: Dict[str, Any],
+    X: np.ndarray,
+    X_seq: Optional[np.ndarray] = None,
+    weights: Optional[Dict[str, float]] = None
+) -> float:
+    """
+    Make ensemble prediction using all available models.
+    """
+    if weights is None:
+        weights = ENSEMBLE_WEIGHTS
+
+    predictions = []
+    total_weight = 0
+
+    # Random Forest
+    if "rf" in models and models["rf"] is not None:
+        with stage("predict:rf"):
+            pred = models["rf"].predict(X[[-1]])[0]
+        predictions.append(pred * weights.get("rf", 0.3))
+        total_weight += weights.get("rf", 0.3)
+
+    # Gradient Boosting
+    if "gb" in models and models["gb"] is not None:
+        with stage("predict:gb"):
+            pred = models["gb"].predict(X[[-1]])[0]
+        predictions.append(pred * weights.get("gb", 0.25))
+        total_weight += weights.get("gb", 0.25)
+
+    # XGBoost
+    if "xgb" in models and models["xgb"] is not None:
+        with stage("predict:xgb"):
+            pred = models["xgb"].predict(X[[-1]])[0]
+        predictions.append(pred * weights.get("xgb", 0.25))
+        total_weight += weights.get("xgb", 0.25)
+
+    # LSTM
+    if "lstm" in models and models["lstm"] is not None and X_seq is not None:
+        with stage("predict:lstm"):
+            pred = predict_with_lstm(
+                models["lstm"], models["device"], X_seq[[-1]])[0]
+        predictions.append(pred * weights.get("lstm", 0.15))
+        total_weight += weights.get("lstm", 0.15)
+
+    if total_weight == 0:
+        raise ValueError("No models available for prediction")
+
+    return sum(predictions) / total_weight
+
+
+# ===========================================
+# MAIN PREDICTION PIPELINE
+# ===========================================
+
+def train_models(
+    X: np.ndarray,
+    y: np.ndarray,
+    X_seq: np.ndarray,
+    y_seq: np.ndarray,
+    lookback: int
+) -> Dict[str, Any]:
+    """Fit all ensemble members from scratch on the training split."""
+    # Train/test split
+    split_idx = int(len(X) * 0.8)
+    X_train, y_train = X[:split_idx], y[:split_idx]
+
+    # Train models
+    models = {}
+    with stage("fit:rf"):
+        models["rf"] = train_random_forest(X_train, y_train)
+    with stage("fit:gb"):
+        models["gb"] = train_gradient_boosting(X_train, y_train)
+    with stage("fit:xgb"):
+        models["xgb"] = train_xgboost(X_train, y_train)
+
+    # Train LSTM if enough data
+    if len(X_seq) > lookback * 2:
+        seq_split = split_idx - lookback
+        X_seq_train = X_seq[:seq_split]
+        y_seq_train = y_seq[:seq_split]
+
+        if len(X_seq_train) > 10:
+            with stage("fit:lstm"):
+                lstm_model, device = train_lstm(
+                    X_seq_train,
+                    y_seq_train,
+                    n_features=X_seq.shape[2],
+                    epochs=30
+                )
+            models["lstm"] = lstm_model
+            models["device"] = device
+
+    return models
+
+
+def update_models(
+    models: Dict[str, Any],
+    X: np.ndarray,
+    y: np.ndarray,
+    X_seq: np.ndarray,
+    y_seq: np.ndarray,
+    lookback: int
+) -> Dict[str, Any]:
+    """
+    Extend previously trained models with the latest data: extra trees
+    and boosting rounds, plus a short LSTM fine-tune from its weights.
+    """
+    split_idx = int(len(X) * 0.8)
+    X_train, y_train = X[:split_idx], y[:split_idx]
+
+    updated = {}
+    with stage("update:rf"):
+        updated["rf"] = update_random_forest(models["rf"], X_train, y_train)
+    with stage("update:gb"):
+        updated["gb"] = update_gradient_boosting(models["gb"], X_train, y_train)
+    with stage("update:xgb"):
+        updated["xgb"] = update_xgboost(models.get("xgb"), X_train, y_train)
+
+    seq_split = split_idx - lookback
+    if models.get("lstm") is not None and seq_split > 10:
+        with stage("update:lstm"):
+            lstm_model, device = train_lstm(
+                X_seq[:seq_split],
+                y_seq[:seq_split],
+                n_features=X_seq.shape[2],
+                epochs=MODEL_UPDATE_EPOCHS,
+                model=models["lstm"]
+            )
+        updated["lstm"] = lstm_model
+        updated["device"] = device
+
+    return updated
+
+
+def bars_appended(entry: Dict[str, Any], df: pd.DataFrame) -> bool:
+    """
+    Whether df has bars beyond those entry's models were fitted on.
+    Entries saved without that record are assumed to be behind.
+    """
+    if entry.get("last_bar") is None or entry.get("rows") is None:
+        return True
+    return df.index[-1].timestamp() > entry["last_bar"] or len(df) > entry["rows"]
+
+
+def load_or_train_models(
+    symbol: str,
+    df: pd.DataFrame,
+    lookback: int,
+    horizons: Optional[Tuple[int, ...]] = None
+) -> tuple:
+    """
+    Registry entry for symbol that matches df, plus the scaled (X, y).
+
+    Registered models are reused until new bars arrive or they expire; on
+    new bars the previous models are extended instead of refitted. Only
+    one worker trains a given symbol at a time.
+
+    With horizons, y is (rows, horizons) and the models are multi-output:
+    one fit per model covers every horizon. They are registered under
+    forecast_key(symbol, horizons), next to the next-bar models.
+    """
+    fingerprint = data_fingerprint(df, lookback)
+    key = forecast_key(symbol, horizons)
+
+    def prepare(scaler=None):
+        X, y, features, scaler = prepare_features(df, scaler=scaler)
+        return X, horizon_targets(y, horizons) if horizons else y, features, scaler
+
+    def fit_rows(X, y):
+        # Rows whose every horizon lies inside the data
+        n = len(X) - max(horizons) + 1 if horizons else len(X)
+        X_seq, y_seq = create_sequences(X[:n], y[:n], lookback)
+        return X[:n], y[:n], X_seq, y_seq
+
+    def registered():
+        entry = model_registry.get(key, fingerprint)
+        if entry is None:
+            return None
+        X, y, features, _ = prepare(entry["scaler"])
+        return (entry, X, y) if entry["features"] == features else None
+
+    found = registered()
+    if found is not None:
+        logger.info(f"Using registered models for {symbol}")
+        return found
+
+    if SERVE_ONLY:
+        # Saved artifacts only: the latest models predict on the new bars
+        entry = model_registry.latest(key, max_age=float("inf"))
+        if entry is None or entry["lookback"] != lookback:
+            raise ValueError(f"No saved models for {key} (serve-only mode)")
+        X, y, features, _ = prepare(entry["scaler"])
+        if entry["features"] != features:
+            raise ValueError(f"Saved models for {symbol} use other features")
+        return entry, X, y
+
+    with cache_backend.lock(f"train:{key}"):
+        # Another worker may have trained it while we waited
+        found = registered()
+        if found is not None:
+            logger.info(f"Using models trained by another worker for {key}")
+            return found
+
+        base = model_registry.latest(key)
+        if base is not None and base["fingerprint"] != fingerprint and base["lookback"] == lookback:
+            # The scaler stays frozen between full refits: the saved trees
+            # split on values in its coordinates.
+            native = model_registry.native(key)
+            if native is not None:
+                X, y, features, scaler = prepare(native["scaler"])
+                if native["features"] == features:
+                    if bars_appended(base, df):
+                        models = update_models(native["models"], *fit_rows(X, y), lookback)
+                        logger.info(f"Updated registered models for {key}")
+                    else:
+                        # New fingerprint but no new bars: nothing to learn from
+                        models = native["models"]
+                        logger.info(f"No new bars for {key}, re-registering its models")
+                    entry = model_registry.put(
+                        key, fingerprint, models, scaler, features, lookback,
+                        trained_at=base["trained_at"], horizons=horizons, bars=df)
+                    return entry, X, y
+
+        X, y, features, scaler = prepare()
+        models = train_models(*fit_rows(X, y), lookback)
+        entry = model_registry.put(
+            key, fingerprint, models, scaler, features, lookback, horizons=horizons, bars=df)
+        return entry, X, y
+
+
+def predict_stock(
+    symbol: str,
+    lookback: int = 20,
+    use_cache: bool = True,
+    sentiment: Optional[float] = None,
+    features: Optional[pd.DataFrame] = None,
+    horizons: Optional[Tuple[int, ...]] = None
+) -> Dict[str, Any]:
+    """
+    Main prediction pipeline for a stock symbol.
+    Pass sentiment when the caller already has it (skips NewsAPI), and
+    features when they were built in bulk by build_feature_frames().
+
+    With horizons (bars ahead) the result adds a "forecast" curve with
+    one point per horizon, all from the same features and model fits;
+    the top-level prediction is the first horizon.
+
+    Freshly computed results carry a "timings" breakdown (seconds per
+    stage and per model) and a private "_modelBytes" footprint; neither
+    is cached.
+    """
+    symbol = symbol.upper()
+    key = forecast_key(symbol, horizons)
+
+    # Check cache
+    if use_cache:
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        with track_timings() as timings:
+            start = time.perf_counter()
+
+            # Get sentiment
+            if sentiment is None:
+                with stage("sentiment"):
+                    sentiment = (float(features["Sentiment"].iloc[-1])
+                                 if features is not None and not features.empty
+                                 else get_news_sentiment(symbol, NEWS_API_KEY))
+            logger.info(f"Sentiment for {symbol}: {sentiment:.3f}")
+
+            # Fetch and prepare data
+            if features is not None:
+                df = features
+            else:
+                with stage("fetch"):
+                    df = fetch_stock_data(symbol)
+                with stage("features"):
+                    df = add_technical_features(df, sentiment)
+
+            with stage("models"):
+                entry, X, y = load_or_train_models(symbol, df, lookback, horizons)
+            models = entry["models"]
+            engine = entry.get("engine")
+
+            # Make prediction (the LSTM only needs the final window)
+            with stage("inference"):
+                X_last, _ = create_sequences(X, y, lookback, last_only=True)
+                # One value per horizon (a single one in next-bar mode)
+                if engine is not None:
+                    preds = {k: np.atleast_1d(v[0]) for k, v in engine.predict(X[[-1]], X_last).items()}
+                else:
+                    preds = {
+                        name: np.ravel(models[name].predict(X[[-1]]))
+                        for name in TREE_MODELS if models.get(name) is not None
+                    }
+                    preds["ensemble"] = np.atleast_1d(ensemble_predict(models, X, X_last))
+                predicted_price = float(preds["ensemble"][0])
+                members = engine.members if engine is not None else [
+                    n for n in TREE_MODELS + ("lstm",) if models.get(n) is not None]
+
+            timings["predict"] = time.perf_counter() - start
+
+        # Calculate metrics
+        current_price = float(df["Close"].iloc[-1])
+        change = predicted_price - current_price
+        change_percent = (change / current_price) * 100
+
+        # Determine direction and confidence
+        direction = "up" if change > 0 else "down" if change < 0 else "neutral"
+
+        # Calculate confidence based on model agreement (per horizon)
+        individual_preds = [preds[name] for name in TREE_MODELS if name in preds]
+
+        if len(individual_preds) > 1:
+            std_dev = np.std(individual_preds, axis=0)
+            confidences = np.clip(100 - (std_dev / current_price * 100 * 10), 50, 95)
+        else:
+            confidences = np.full(len(preds["ensemble"]), 70.0)
+        confidence = float(confidences[0])
+
+        # Build result
+        result = {
+            "symbol": symbol,
+            "currentPrice": round(current_price, 2),
+            "predictedPrice": round(predicted_price, 2),
+            "change": round(change, 2),
+            "changePercent": round(change_percent, 2),
+            "direction": direction,
+            "confidence": round(confidence, 1),
+            "sentiment": round(sentiment, 3),
+            "sentimentLabel": "bullish" if sentiment > 0.1 else "bearish" if sentiment < -0.1 else "neutral",
+            "indicators": {
+                "rsi": round(float(df["RSI"].iloc[-1]), 2),
+                "macd": round(float(df["MACD"].iloc[-1]), 4),
+                "volatility": round(float(df["Volatility_20"].iloc[-1]) * 100, 2),
+                "ma20": round(float(df["MA_20"].iloc[-1]), 2),
+                "ma50": round(float(df["MA_50"].iloc[-1]), 2) if "MA_50" in df.columns else None
+            },
+            "models": {name: name in members for name in TREE_MODELS + ("lstm",)},
+            "dataPoints": len(df),
+            "modelsTrainedAt": datetime.utcfromtimestamp(entry["trained_at"]).isoformat(),
+            "modelsUpdatedAt": datetime.utcfromtimestamp(entry["updated_at"]).isoformat(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "disclaimer": "This is a demo prediction. Not financial advice."
+        }
+
+        if horizons:
+            result["horizons"] = list(horizons)
+            result["forecast"] = [
+                {
+                    "horizon": h,
+                    "predictedPrice": round(float(price), 2),
+                    "change": round(float(price) - current_price, 2),
+                    "changePercent": round((float(price) - current_price) / current_price * 100, 2),
+                    "direction": "up" if price > current_price else "down" if price < current_price else "neutral",
+                    "confidence": round(float(conf), 1)
+                }
+                for h, price, conf in zip(horizons, preds["ensemble"], confidences)
+            ]
+
+        # Cache result
+        prediction_cache.set(key, result)
+
+        return dict(
+            result,
+            timings={k: round(v, 6) for k, v in timings.items()},
+            _modelBytes=entry.get("nbytes", 0))
+
+    except Exception as e:
+        logger.error(f"Prediction error for {symbol}: {e}")
+        raise
+
+
+# ===========================================
+# WALK-FORWARD BACKTEST
+# ===========================================
+
+def _backtest_worker_init():
+    # Parallelism comes from running folds side by side
+    torch.set_num_threads(1)
+
+
+def backtest_folds(
+    n_rows: int,
+    train_window: int = BACKTEST_TRAIN_WINDOW,
+    test_window: int = BACKTEST_TEST_WINDOW,
+    max_folds: int = BACKTEST_MAX_FOLDS
+) -> List[Tuple[int, int, int]]:
+    """
+    Rolling (start, split, end) row ranges, oldest first: train on
+    [start, split), test on [split, end). The last fold ends at n_rows.
+    """
+    folds = []
+    end = n_rows
+    while len(folds) < max_folds and end - test_window - train_window >= 0:
+        split = end - test_window
+        folds.append((split - train_window, split, end))
+        end = split
+    return folds[::-1]
+
+
+def _backtest_fold(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit the selected models on one training window and predict its test window."""
+    X, y, lookback = task["X"], task["y"], task["lookback"]
+    n_train = task["n_train"]
+
+    # Scaler fitted on the training window only (no look-ahead)
+    scaler = StandardScaler().fit(X[:n_train])
+    X = scaler.transform(X)
+    X_train, y_train, X_test = X[:n_train], y[:n_train], X[n_train:]
+
+    preds: Dict[str, np.ndarray] = {}
+    if "rf" in task["models"]:
+        preds["rf"] = train_random_forest(X_train, y_train, n_jobs=1).predict(X_test)
+    if "gb" in task["models"]:
+        preds["gb"] = train_gradient_boosting(X_train, y_train).predict(X_test)
+    if "xgb" in task["models"] and xgb_available():
+        preds["xgb"] = train_xgboost(X_train, y_train, n_jobs=1).predict(X_test)
+    if "lstm" in task["models"] and n_train - lookback > 10:
+        # Window X[r - lookback:r] predicts y[r], as in create_sequences()
+        X_seq, y_seq = create_sequences(X, y, lookback)
+        model, device = train_lstm(
+            X_seq[:n_train - lookback], y_seq[:n_train - lookback],
+            n_features=X.shape[1], epochs=task["lstm_epochs"])
+        preds["lstm"] = predict_with_lstm(model, device, X_seq[n_train - lookback:])
+
+    return {
+        "symbol": task["symbol"],
+        "fold": task["fold"],
+        "actual": y[n_train:],
+        "current": task["close"][n_train:],
+        "preds": preds
+    }
+
+
+def forecast_metrics(
+    predicted: np.ndarray,
+    actual: np.ndarray,
+    current: np.ndarray
+) -> Dict[str, float]:
+    """Error metrics for next-close forecasts made at closes `current`."""
+    hit = np.sign(predicted - current) == np.sign(actual - current)
+    return {
+        "mae": round(float(mean_absolute_error(actual, predicted)), 4),
+        "rmse": round(float(np.sqrt(np.mean((predicted - actual) ** 2))), 4),
+        "mape": round(float(np.mean(np.abs((predicted - actual) / actual)) * 100), 4),
+        "r2": round(float(r2_score(actual, predicted)), 4),
+        "directionAccuracy": round(float(np.mean(hit)) * 100, 2),
+        "n": int(len(actual))
+    }
+
+
+def fit_ensemble_weights(preds: Dict[str, np.ndarray], actual: np.ndarray) -> Dict[str, float]:
+    """Non-negative least-squares blend of model forecasts, summing to 1."""
+    names = list(preds)
+    weights, _ = nnls(np.column_stack([preds[n] for n in names]), actual)
+    total = weights.sum()
+    if total <= 0:
+        return {n: round(1 / len(names), 4) for n in names}
+    return {n: round(float(w / total), 4) for n, w in zip(names, weights)}
+
+
+def _blend(preds: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    used = {n: weights[n] for n in preds if weights.get(n, 0) > 0}
+    total = sum(used.values())
+    return sum(preds[n] * w for n, w in used.items()) / total
+
+
+def walk_forward_backtest(
+    frames: Dict[str, pd.DataFrame],
+    sentiments: Optional[Dict[str, float]] = None,
+    models: Tuple[str, ...] = ("rf", "gb", "xgb", "lstm"),
+    train_window: int = BACKTEST_TRAIN_WINDOW,
+    test_window: int = BACKTEST_TEST_WINDOW,
+    max_folds: int = BACKTEST_MAX_FOLDS,
+    lookback: int = 20,
+    lstm_epochs: int = 30,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Walk-forward evaluation of each model and the ensemble over rolling
+    folds of many symbols' bars (OHLCV frames keyed by symbol).
+
+    Features are computed once for all symbols (vectorized panel) and
+    sliced per fold; every (symbol, fold) pair is an independent job run
+    in parallel on `workers` processes (0 = inline). Reports metrics per
+    model and for the default ENSEMBLE_WEIGHTS blend, plus ensemble
+    metrics per symbol. Historic news is not available, so sentiment is
+    constant per symbol (0 unless given).
+
+    "fittedWeights" are NNLS weights fitted on every fold (to use going
+    forward). Scoring them on those same forecasts would be in-sample, so
+    "heldOut" instead scores, for each test period after the first,
+    weights fitted on the earlier periods only, next to the default blend
+    on the same rows. Folds end at each symbol's last bar, so a period is
+    a fold position counted from the end.
+    """
+    started = time.perf_counter()
+    features = build_feature_frames(frames, sentiments)
+
+    tasks = []
+    for symbol, df in features.items():
+        X = df[FEATURE_COLS].to_numpy(dtype=np.float64)
+        y = df["Target"].to_numpy(dtype=np.float64)
+        close = df["Close"].to_numpy(dtype=np.float64)
+        for fold, (start, split, end) in enumerate(
+                backtest_folds(len(df), train_window, test_window, max_folds)):
+            tasks.append({
+                "symbol": symbol, "fold": fold, "models": models,
+                "X": X[start:end], "y": y[start:end], "close": close[start:end],
+                "n_train": split - start, "lookback": lookback,
+                "lstm_epochs": lstm_epochs
+            })
+
+    if not tasks:
+        raise ValueError("Not enough history for a single fold")
+
+    if workers is None:
+        workers = os.cpu_count() or 2
+    if workers > 0:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_backtest_worker_init
+        ) as pool:
+            results = list(pool.map(_backtest_fold, tasks))
+    else:
+        results = [_backtest_fold(task) for task in tasks]
+
+    results.sort(key=lambda r: (r["symbol"], r["fold"]))
+    names = [n for n in models if all(n in r["preds"] for r in results)]
+    if not names:
+        raise ValueError("No model produced forecasts for every fold")
+
+    actual = np.concatenate([r["actual"] for r in results])
+    current = np.concatenate([r["current"] for r in results])
+    preds = {n: np.concatenate([r["preds"][n] for r in results]) for n in names}
+    n_folds = {s: sum(r["symbol"] == s for r in results) for s in features}
+    period = np.concatenate([  # 0 = most recent test window
+        np.full(len(r["actual"]), n_folds[r["symbol"]] - 1 - r["fold"]) for r in results])
+
+    fitted = fit_ensemble_weights(preds, actual)
+    ensemble = _blend(preds, ENSEMBLE_WEIGHTS)
+
+    # Out-of-sample fitted blend: weights from strictly earlier periods
+    held_out = period < period.max()
+    fitted_oos = np.full(len(actual), np.nan)
+    for p in np.unique(period[held_out]):
+        earlier, rows = period > p, period == p
+        weights = fit_ensemble_weights({n: v[earlier] for n, v in preds.items()}, actual[earlier])
+        fitted_oos[rows] = _blend({n: v[rows] for n, v in preds.items()}, weights)
+
+    per_symbol = {}
+    offset = 0
+    for symbol in sorted(features):
+        rows = sum(len(r["actual"]) for r in results if r["symbol"] == symbol)
+        if rows:
+            part = slice(offset, offset + rows)
+            per_symbol[symbol] = forecast_metrics(ensemble[part], actual[part], current[part])
+            offset += rows
+
+    return {
+        "symbols": len(per_symbol),
+        "folds": len(results),
+        "trainWindow": train_window,
+        "testWindow": test_window,
+        "models": {n: forecast_metrics(preds[n], actual, current) for n in names},
+        "ensemble": forecast_metrics(ensemble, actual, current),
+        "defaultWeights": {n: ENSEMBLE_WEIGHTS.get(n, 0.0) for n in names},
+        "fittedWeights": fitted,
+        "heldOut": {
+            "periods": int(len(np.unique(period[held_out]))),
+            "ensemble": forecast_metrics(
+                ensemble[held_out], actual[held_out], current[held_out]),
+            "fittedEnsemble": forecast_metrics(
+                fitted_oos[held_out], actual[held_out], current[held_out])
+        } if held_out.any() else None,
+        "bySymbol": per_symbol,
+        "elapsed": round(time.perf_counter() - started, 2)
+    }
 
 
 # ===========================================
-# LSTM MODEL
+# JOB EXECUTION
 # ===========================================
 
-class LSTMPredictor(nn.Module):
-    """LSTM Neural Network for time series prediction."""
+_executor: Optional[Executor] = None
+_inflight: Dict[str, asyncio.Task] = {}
+_waiting: Dict[str, int] = {}  # requests awaiting each in-flight job
+_background: Set[str] = set()  # in-flight jobs a background caller owns
+_queued: Set[str] = set()  # in-flight jobs still waiting for a slot
+_jobs_submitted = 0
+_model_bytes: Dict[str, int] = {}  # resident model size last reported per symbol
 
-    def __init__(self, n_features: int, hidden_size: int = 64, num_layers: int = 2):
-        super().__init__()
 
-        self.lstm = nn.LSTM(
-            input_size=n_features,
-            hidden_size=hidden_size,
-            num_layers=num_layers,
-            batch_first=True,
-            dropout=0.2 if num_layers > 1 else 0
-        )
+class Overloaded(Exception):
+    """No capacity for a prediction job; retry after retry_after seconds."""
 
-        self.dropout = nn.Dropout(0.2)
-        self.fc = nn.Linear(hidden_size, 1)
+    status_code = 503
 
-    def forward(self, x):
-        lstm_out, _ = self.lstm(x)
-        out = self.dropout(lstm_out[:, -1, :])
-        return self.fc(out)
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
-def train_lstm(
-    X_train: np.ndarray,
-    y_train: np.ndarray,
-    n_features: int,
-    epochs: int = 50,
-    batch_size: int = 32
-) -> tuple:
-    """Train LSTM model."""
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = LSTMPredictor(n_features).to(device)
+class DeadlineExceeded(Overloaded):
+    """The request's deadline passed before its prediction finished."""
 
-    criterion = nn.MSELoss()
-    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+    status_code = 504
 
-    X_tensor = torch.tensor(X_train, dtype=torch.float32).to(device)
-    y_tensor = torch.tensor(
-        y_train, dtype=torch.float32).view(-1, 1).to(device)
 
-    model.train()
-    for epoch in range(epochs):
-        optimizer.zero_grad()
-        output = model(X_tensor)
-        loss = criterion(output, y_tensor)
-        loss.backward()
-        optimizer.step()
+class AdmissionController:
+    """
+    Bounded admission for prediction jobs (everything that is not a cache
+    hit; cache hits never queue). At most max_active jobs run at once and
+    up to max_queue wait for a slot: symbols with built models first,
+    then cold symbols (training), then background refreshes. When the
+    queue is full callers get Overloaded right away, with a Retry-After
+    estimated from the backlog and recent job durations.
+    """
 
-        if (epoch + 1) % 10 == 0:
-            logger.debug(
-                f"LSTM Epoch {epoch + 1}/{epochs}, Loss: {loss.item():.6f}")
+    PRIORITIES = {"warm": 0, "cold": 1, "background": 2}
+
+    def __init__(self, max_active: int = PREDICT_MAX_ACTIVE, max_queue: int = PREDICT_QUEUE_SIZE):
+        self.max_active = max(1, max_active)
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: List[list] = []  # heap of [priority, seq, future, key]
+        self._seq = itertools.count()
+        self._job_seconds = 1.0  # moving average
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0  # requests whose deadline passed (counted by run_prediction)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        backlog = self.queued + self.active
+        return max(1, math.ceil(backlog * self._job_seconds / self.max_active))
+
+    def has_room(self) -> bool:
+        return self.active < self.max_active or self.queued < self.max_queue
+
+    def check(self):
+        """Fail fast (before any work) when a new job could not even queue."""
+        if not self.has_room():
+            self.rejected += 1
+            raise Overloaded("Prediction queue is full", self.retry_after())
+
+    async def acquire(self, priority: str = "cold", key: Optional[str] = None):
+        """
+        Wait for a job slot (Overloaded if the queue is full). key names
+        the job so promote() can move it up later.
+        """
+        if self.active < self.max_active and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        self.check()
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = [self.PRIORITIES[priority], next(self._seq), future, key]
+        heapq.heappush(self._waiters, waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # the slot was handed over as we gave up
+            else:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            raise
+        self.admitted += 1
+
+    def release(self, seconds: Optional[float] = None):
+        """Free a slot; seconds (the job's run time) feeds Retry-After."""
+        if seconds is not None:
+            self._job_seconds += 0.2 * (seconds - self._job_seconds)
+        # Hand the slot straight to the next waiter, if any
+        while self._waiters:
+            _, _, future, _ = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def promote(self, key: str, priority: str):
+        """Raise a queued job to priority (e.g. a live request joined it)."""
+        rank = self.PRIORITIES[priority]
+        for waiter in self._waiters:
+            if waiter[3] == key and waiter[0] > rank:
+                waiter[0] = rank
+                heapq.heapify(self._waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "maxActive": self.max_active,
+            "maxQueue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "avgJobSeconds": round(self._job_seconds, 3)
+        }
 
-    return model, device
 
+admission = AdmissionController()
 
-def predict_with_lstm(model: nn.Module, device: str, X: np.ndarray) -> np.ndarray:
-    """Make predictions with LSTM model."""
-    model.eval()
-    X_tensor = torch.tensor(X, dtype=torch.float32).to(device)
 
-    with torch.no_grad():
-        predictions = model(X_tensor).cpu().numpy().flatten()
+def get_executor() -> Executor:
+    """Pool that runs blocking prediction jobs (created on first use)."""
+    global _executor
+    if _executor is None:
+        if PREDICT_WORKERS > 0:
+            # spawn: forking after torch/BLAS thread pools exist can deadlock
+            _executor = ProcessPoolExecutor(
+                max_workers=PREDICT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2)
+    return _executor
 
-    return predictions
 
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
 
-# ===========================================
-# ENSEMBLE PREDICTION
-# ===========================================
 
-def ensemble_predict(
-    models: Dict[str, Any],
-    X: np.ndarray,
-    X_seq: Optional[np.ndarray] = None,
-    weights: Optional[Dict[str, float]] = None
-) -> float:
-    """
-    Make ensemble prediction using all available models.
-    """
-    if weights is None:
-        weights = {"rf": 0.35, "gb": 0.25, "xgb": 0.25, "lstm": 0.15}
+async def _compute_prediction(
+    symbol: str,
+    lookback: int,
+    sentiment: Optional[float] = None,
+    features: Optional[pd.DataFrame] = None,
+    horizons: Optional[Tuple[int, ...]] = None,
+    background: bool = False
+) -> Dict[str, Any]:
+    global _jobs_submitted
+    loop = asyncio.get_running_loop()
+    key = forecast_key(symbol, horizons)
+    try:
+        timings = {}
+        if sentiment is None:
+            start = time.perf_counter()
+            sentiment = await sentiment_service.aget(symbol)
+            timings["sentiment"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # Symbols served before have models to load; the rest may train
+        priority = "background" if background else "warm" if key in _model_bytes else "cold"
+        _queued.add(key)
+        try:
+            await admission.acquire(priority, key)
+        finally:
+            _queued.discard(key)
 
-    predictions = []
-    total_weight = 0
+        _jobs_submitted += 1
+        admitted = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(
+                get_executor(), predict_stock, symbol, lookback, False, sentiment, features,
+                horizons)
+        finally:
+            _jobs_submitted -= 1
+            admission.release(time.perf_counter() - admitted)
+        timings["job"] = time.perf_counter() - start
+
+        _model_bytes[key] = result.pop("_modelBytes", 0)
+        timings.update(result.get("timings", {}))
+        # Time waiting for a job slot and a free worker (plus transfer to/from it)
+        timings["queue"] = max(0.0, timings["job"] - timings.get("predict", timings["job"]))
+        record_timings(timings)
+        result["timings"] = {k: round(v, 6) for k, v in timings.items()}
+
+        prediction_cache.set(key, {k: v for k, v in result.items() if k != "timings"})
+        return result
+    finally:
+        _inflight.pop(key, None)
+        _background.discard(key)
 
-    # Random Forest
-    if "rf" in models and models["rf"] is not None:
-        pred = models["rf"].predict(X[[-1]])[0]
-        predictions.append(pred * weights.get("rf", 0.3))
-        total_weight += weights.get("rf", 0.3)
 
-    # Gradient Boosting
-    if "gb" in models and models["gb"] is not None:
-        pred = models["gb"].predict(X[[-1]])[0]
-        predictions.append(pred * weights.get("gb", 0.25))
-        total_weight += weights.get("gb", 0.25)
+def _log_refresh_error(task: asyncio.Task):
+    """Done-callback for refreshes nobody awaits."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background refresh failed: {task.exception()}")
 
-    # XGBoost
-    if "xgb" in models and models["xgb"] is not None:
-        pred = models["xgb"].predict(X[[-1]])[0]
-        predictions.append(pred * weights.get("xgb", 0.25))
-        total_weight += weights.get("xgb", 0.25)
 
-    # LSTM
-    if "lstm" in models and models["lstm"] is not None and X_seq is not None:
-        pred = predict_with_lstm(
-            models["lstm"], models["device"], X_seq[[-1]])[0]
-        predictions.append(pred * weights.get("lstm", 0.15))
-        total_weight += weights.get("lstm", 0.15)
+def _start_prediction(
+    symbol: str,
+    lookback: int,
+    sentiment: Optional[float] = None,
+    features: Optional[pd.DataFrame] = None,
+    horizons: Optional[Tuple[int, ...]] = None,
+    background: bool = False
+) -> asyncio.Task:
+    """
+    Return the in-flight job for symbol (and horizons), starting one if
+    needed. background jobs queue behind request-driven ones; a request
+    joining a queued background job moves it up to its own priority.
+    """
+    key = forecast_key(symbol, horizons)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            _compute_prediction(symbol, lookback, sentiment, features, horizons, background))
+        _inflight[key] = task
+    elif not background:
+        admission.promote(key, "warm" if key in _model_bytes else "cold")
+    if background:
+        # Someone other than the waiting requests needs the result
+        _background.add(key)
+    return task
+
+
+async def run_prediction(
+    symbol: str,
+    lookback: int = 20,
+    use_cache: bool = True,
+    sentiment: Optional[float] = None,
+    features: Optional[pd.DataFrame] = None,
+    timings: bool = False,
+    horizons: Optional[Tuple[int, ...]] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Async entry point for predictions.
+    Runs predict_stock() on the job pool; concurrent requests for the
+    same symbol share one in-flight computation. Recently expired cache
+    entries are returned immediately while a refresh runs.
+    With timings=True the result includes a per-stage breakdown in
+    seconds (just "cache" when it was served from the cache). horizons
+    requests a multi-horizon forecast (see predict_stock).
+
+    Jobs go through admission control: Overloaded when the queue is
+    full, DeadlineExceeded when no result arrives within deadline
+    seconds. A job still queued when its last waiter gives up is dropped,
+    unless a background caller (pre-warm, stale refresh) also owns it.
+    """
+    symbol = normalize_symbol(symbol)
+    key = forecast_key(symbol, horizons)
+    start = time.perf_counter()
+    request_popularity.record(symbol)
+    if deadline is not None and deadline <= 0:
+        raise ValueError("deadline must be positive (seconds)")
+
+    if use_cache:
+        cached, state = prediction_cache.lookup(key)
+        if state == "stale" and admission.has_room():
+            _start_prediction(
+                symbol, lookback, sentiment, features, horizons, background=True
+            ).add_done_callback(_log_refresh_error)
+        if cached is not None:
+            elapsed = time.perf_counter() - start
+            stage_latency.observe(elapsed, "cache")
+            return dict(cached, timings={"cache": round(elapsed, 6)}) if timings else cached
+
+    if key not in _inflight:
+        admission.check()  # turn away before any work is started
+    task = _start_prediction(symbol, lookback, sentiment, features, horizons)
+
+    _waiting[key] = _waiting.get(key, 0) + 1
+    try:
+        # shield: a disconnecting client must not cancel the shared job
+        timeout = None if deadline is None else max(0.0, deadline - (time.perf_counter() - start))
+        result = await asyncio.wait_for(asyncio.shield(task), timeout)
+    except asyncio.TimeoutError:
+        admission.expired += 1
+        raise DeadlineExceeded(
+            f"No prediction for {symbol} within {deadline}s", admission.retry_after())
+    finally:
+        _waiting[key] -= 1
+        if not _waiting[key]:
+            del _waiting[key]
+            if key in _queued and key not in _background and not task.done():
+                task.cancel()
 
-    if total_weight == 0:
-        raise ValueError("No models available for prediction")
+    if timings:
+        return result
+    return {k: v for k, v in result.items() if k != "timings"}
 
-    return sum(predictions) / total_weight
+
+def process_resources() -> Dict[str, Optional[float]]:
+    """CPU time and memory of this process (prediction workers not included)."""
+    resources = {"cpuSeconds": time.process_time(), "rssBytes": None, "maxRssBytes": None}
+    try:
+        import resource
+        # ru_maxrss is in bytes on macOS, KiB elsewhere
+        resources["maxRssBytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (
+            1 if sys.platform == "darwin" else 1024)
+    except ImportError:  # Windows
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            resources["rssBytes"] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    return resources
+
+
+def render_metrics() -> str:
+    """All service metrics in Prometheus text exposition format."""
+    lines: List[str] = []
+
+    def gauge(name: str, description: str, value, kind: str = "gauge"):
+        lines.extend([f"# HELP {name} {description}", f"# TYPE {name} {kind}"])
+        lines.append(f"{name} {value if value is not None else 'NaN'}")
+
+    for histogram in (stage_latency, model_latency, http_latency):
+        lines.extend(histogram.render())
+
+    cache = prediction_cache.stats()
+    gauge("predict_cache_hits_total", "Fresh prediction cache hits", cache["hits"], "counter")
+    gauge("predict_cache_stale_hits_total", "Stale prediction cache hits",
+          cache["staleHits"], "counter")
+    gauge("predict_cache_misses_total", "Prediction cache misses", cache["misses"], "counter")
+    gauge("predict_cache_evictions_total", "Prediction cache evictions",
+          cache["evictions"], "counter")
+    gauge("predict_cache_hit_ratio", "Share of lookups served from cache", cache["hitRate"])
+    gauge("predict_cache_entries", "Entries in the prediction cache", cache["entries"])
+
+    quotes = quote_service.stats()
+    lookups = quotes["hits"] + quotes["upstreamCalls"]
+    gauge("quote_cache_hits_total", "Quotes served from the micro-cache", quotes["hits"], "counter")
+    gauge("quote_upstream_calls_total", "Quote requests sent upstream",
+          quotes["upstreamCalls"], "counter")
+    gauge("quote_cache_hit_ratio", "Share of quotes served from cache",
+          round(quotes["hits"] / lookups, 4) if lookups else None)
+
+    workers = PREDICT_WORKERS or os.cpu_count() or 2
+    gauge("predict_jobs_inflight", "Symbols with a prediction in progress", len(_inflight))
+    gauge("predict_jobs_submitted", "Prediction jobs handed to the worker pool", _jobs_submitted)
+    gauge("predict_queue_depth", "Prediction jobs waiting for a job slot or a free worker",
+          admission.queued + max(0, _jobs_submitted - workers))
+    gauge("predict_workers", "Prediction worker pool size", workers)
+    gauge("predict_admission_active", "Prediction jobs holding a job slot", admission.active)
+    gauge("predict_admission_max_active", "Job slots (concurrent prediction jobs)",
+          admission.max_active)
+    gauge("predict_admission_admitted_total", "Prediction jobs admitted",
+          admission.admitted, "counter")
+    gauge("predict_admission_rejected_total", "Prediction requests rejected with 503 (queue full)",
+          admission.rejected, "counter")
+    gauge("predict_deadline_exceeded_total", "Prediction requests past their deadline",
+          admission.expired, "counter")
+
+    gauge("app_import_seconds", "Time taken to import the service module", round(IMPORT_SECONDS, 4))
+    resources = process_resources()
+    gauge("process_cpu_seconds_total", "CPU time used by the server process",
+          round(resources["cpuSeconds"], 3), "counter")
+    gauge("process_resident_memory_bytes", "Resident memory of the server process",
+          resources["rssBytes"])
+    gauge("process_max_resident_memory_bytes", "Peak resident memory of the server process",
+          resources["maxRssBytes"])
+    registry = model_registry.stats()
+    gauge("model_registry_bytes", "Resident model memory in this process", registry["bytes"])
+    gauge("model_registry_entries", "Symbols with models resident in this process",
+          registry["entries"])
+    gauge("model_registry_budget_bytes", "Resident model memory budget per process (0 = unlimited)",
+          registry["budget"])
+    gauge("model_registry_loads_total", "Model artifacts loaded into this process",
+          registry["loads"], "counter")
+    gauge("model_registry_evictions_total", "Least recently used model evictions in this process",
+          registry["evictions"], "counter")
+    gauge("model_last_used_bytes", "Resident size of the models last used per symbol, summed",
+          sum(_model_bytes.values()))
+    lines.extend([
+        "# HELP model_symbol_bytes Resident size of the models last used, per symbol",
+        "# TYPE model_symbol_bytes gauge"])
+    lines.extend(
+        f'model_symbol_bytes{{symbol="{label_value(k)}"}} {v}' for k, v in sorted(_model_bytes.items()))
+
+    return "\n".join(lines) + "\n"
 
 
 # ===========================================
-# MAIN PREDICTION PIPELINE
+# SUBSCRIPTION HUB
 # ===========================================
 
-def predict_stock(
-    symbol: str,
-    lookback: int = 20,
-    use_cache: bool = True
-) -> Dict[str, Any]:
+class HubSubscriber:
     """
-    Main prediction pipeline for a stock symbol.
+    One WebSocket's view of the hub.
+    Only the latest undelivered result per symbol is kept, so a slow
+    client skips stale updates instead of buffering them.
     """
-    symbol = symbol.upper()
 
-    # Check cache
-    if use_cache and symbol in prediction_cache:
-        cached = prediction_cache[symbol]
-        if datetime.now().timestamp() - cached.get("cached_at", 0) < CACHE_TTL:
-            return cached["data"]
+    def __init__(self):
+        self.intervals: Dict[str, int] = {}
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.ready = asyncio.Event()
+        self.dropped = 0
 
-    try:
-        # Get sentiment
-        sentiment = get_news_sentiment(symbol, NEWS_API_KEY)
-        logger.info(f"Sentiment for {symbol}: {sentiment:.3f}")
+    def offer(self, symbol: str, message: Dict[str, Any]):
+        if symbol in self.pending:
+            self.dropped += 1
+        self.pending[symbol] = message
+        self.ready.set()
 
-        # Fetch and prepare data
-        df = fetch_stock_data(symbol)
-        df = add_technical_features(df, sentiment)
+    async def next_batch(self) -> List[Dict[str, Any]]:
+        await self.ready.wait()
+        self.ready.clear()
+        batch = list(self.pending.values())
+        self.pending.clear()
+        return batch
 
-        X, y, features, scaler = prepare_features(df)
 
-        # Train/test split
-        split_idx = int(len(X) * 0.8)
-        X_train, y_train = X[:split_idx], y[:split_idx]
-        X_test, y_test = X[split_idx:], y[split_idx:]
+class PredictionHub:
+    """
+    Computes each subscribed symbol at most once per interval and
+    broadcasts the result to every subscriber of that symbol.
+    """
 
-        # Create sequences for LSTM
-        X_seq, y_seq = create_sequences(X, y, lookback)
+    def __init__(self, min_interval: int = WS_MIN_INTERVAL, max_symbols: int = WS_MAX_SYMBOLS):
+        self.min_interval = min_interval
+        self.max_symbols = max_symbols
+        self._subscribers: Dict[str, Set[HubSubscriber]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
 
-        # Train models
-        models = {
-            "rf": train_random_forest(X_train, y_train),
-            "gb": train_gradient_boosting(X_train, y_train),
-            "xgb": train_xgboost(X_train, y_train)
+    def subscribe(self, sub: HubSubscriber, symbol: str, interval: int = WS_DEFAULT_INTERVAL):
+        """ValueError for a malformed symbol or interval, or past max_symbols."""
+        symbol = normalize_symbol(symbol)
+        try:
+            seconds = float(interval)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid interval: {interval!r} (seconds)")
+        if not math.isfinite(seconds):
+            raise ValueError(f"Invalid interval: {interval!r} (seconds)")
+        if symbol not in sub.intervals and len(sub.intervals) >= self.max_symbols:
+            raise ValueError(f"Too many subscriptions (max {self.max_symbols} per connection)")
+
+        sub.intervals[symbol] = max(self.min_interval, int(seconds))
+        self._subscribers.setdefault(symbol, set()).add(sub)
+
+        if symbol in self._latest:
+            sub.offer(symbol, self._latest[symbol])
+        if symbol not in self._tasks:
+            self._tasks[symbol] = asyncio.create_task(self._run(symbol))
+
+    def unsubscribe(self, sub: HubSubscriber, symbol: str):
+        if not isinstance(symbol, str):
+            return
+        symbol = symbol.strip().upper()
+        sub.intervals.pop(symbol, None)
+        sub.pending.pop(symbol, None)
+
+        subs = self._subscribers.get(symbol)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._subscribers[symbol]
+            self._latest.pop(symbol, None)
+            task = self._tasks.pop(symbol, None)
+            if task is not None:
+                task.cancel()
+
+    def unsubscribe_all(self, sub: HubSubscriber):
+        for symbol in list(sub.intervals):
+            self.unsubscribe(sub, symbol)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "symbols": len(self._subscribers),
+            "subscriptions": sum(len(s) for s in self._subscribers.values())
         }
 
-        # Train LSTM if enough data
-        if len(X_seq) > lookback * 2:
-            seq_split = split_idx - lookback
-            X_seq_train = X_seq[:seq_split]
-            y_seq_train = y_seq[:seq_split]
+    async def _run(self, symbol: str):
+        while self._subscribers.get(symbol):
+            try:
+                result = await run_prediction(symbol, use_cache=False)
+            except Exception as e:
+                result = {"symbol": symbol, "error": str(e)}
 
-            if len(X_seq_train) > 10:
-                lstm_model, device = train_lstm(
-                    X_seq_train,
-                    y_seq_train,
-                    n_features=X_seq.shape[2],
-                    epochs=30
-                )
-                models["lstm"] = lstm_model
-                models["device"] = device
+            subs = self._subscribers.get(symbol, set())
+            self._latest[symbol] = result
+            for sub in subs:
+                sub.offer(symbol, result)
 
-        # Make prediction
-        predicted_price = ensemble_predict(models, X, X_seq)
+            interval = min(
+                (sub.intervals.get(symbol, WS_DEFAULT_INTERVAL) for sub in subs),
+                default=WS_DEFAULT_INTERVAL)
+            await asyncio.sleep(interval)
 
-        # Calculate metrics
-        current_price = float(df["Close"].iloc[-1])
-        change = predicted_price - current_price
-        change_percent = (change / current_price) * 100
 
-        # Determine direction and confidence
-        direction = "up" if change > 0 else "down" if change < 0 else "neutral"
+prediction_hub = PredictionHub()
 
-        # Calculate confidence based on model agreement
-        individual_preds = []
-        if models.get("rf"):
-            individual_preds.append(models["rf"].predict(X[[-1]])[0])
-        if models.get("gb"):
-            individual_preds.append(models["gb"].predict(X[[-1]])[0])
-        if models.get("xgb"):
-            individual_preds.append(models["xgb"].predict(X[[-1]])[0])
 
-        if len(individual_preds) > 1:
-            std_dev = np.std(individual_preds)
-            confidence = max(
-                50, min(95, 100 - (std_dev / current_price * 100 * 10)))
+# ===========================================
+# PRE-WARM SCHEDULER
+# ===========================================
+
+class PopularityTracker:
+    """Exponentially decayed request counts per symbol."""
+
+    def __init__(self, half_life: float = PREWARM_POPULARITY_HALF_LIFE):
+        self.half_life = half_life
+        self._scores: Dict[str, Tuple[float, float]] = {}  # symbol -> (score, at)
+
+    def _decayed(self, symbol: str, now: float) -> float:
+        score, at = self._scores.get(symbol, (0.0, now))
+        return score * 0.5 ** ((now - at) / self.half_life)
+
+    def record(self, symbol: str):
+        now = time.time()
+        self._scores[symbol] = (self._decayed(symbol, now) + 1.0, now)
+
+    def score(self, symbol: str) -> float:
+        return self._decayed(symbol, time.time())
+
+    def top(self, n: int = 10) -> List[Tuple[str, float]]:
+        scores = [(s, round(self.score(s), 3)) for s in list(self._scores)]
+        return sorted(scores, key=lambda item: -item[1])[:n]
+
+
+request_popularity = PopularityTracker()
+
+
+class PrewarmScheduler:
+    """
+    Keeps predictions (and through them, models) for the supported
+    universe warm, so users rarely pay for a cold training run.
+
+    Crypto is refreshed every PREWARM_CRYPTO_INTERVAL around the clock;
+    stocks every PREWARM_STOCK_INTERVAL during the trading session,
+    widened by PREWARM_SESSION_MARGIN so the first refresh lands before
+    the open and the last one picks up the closing bar. Due symbols go
+    into a priority queue ordered by recent request popularity; at most
+    `concurrency` refreshes run at once and each waits for a free job
+    worker, so live requests are never queued behind pre-warming.
+    """
+
+    def __init__(
+        self,
+        stocks: List[str] = SUPPORTED_STOCKS,
+        crypto: List[str] = SUPPORTED_CRYPTO,
+        concurrency: int = PREWARM_CONCURRENCY,
+        popularity: PopularityTracker = request_popularity
+    ):
+        self.stocks = list(stocks)
+        self.crypto = list(crypto)
+        self.concurrency = concurrency
+        self.popularity = popularity
+        self.market_tz = ZoneInfo(PREWARM_MARKET_TZ)
+        opens, closes = PREWARM_MARKET_HOURS.split("-")
+        self.session = tuple(
+            int(t.split(":")[0]) * 60 + int(t.split(":")[1]) for t in (opens, closes))
+        self._queue: List[Tuple[float, int, str]] = []
+        self._queued: Set[str] = set()
+        self._counter = itertools.count()
+        self._last: Dict[str, float] = {}
+        self._ready: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self.refreshed = 0
+        self.failed = 0
+
+    def in_session(self, now: Optional[datetime] = None) -> bool:
+        """True inside the (margin-widened) stock session on a weekday."""
+        local = (now or datetime.now(self.market_tz)).astimezone(self.market_tz)
+        if local.weekday() >= 5:
+            return False
+        minute = local.hour * 60 + local.minute
+        margin = PREWARM_SESSION_MARGIN / 60
+        return self.session[0] - margin <= minute <= self.session[1] + margin
+
+    def is_due(self, symbol: str, now: float, in_session: bool) -> bool:
+        if symbol in self.crypto:
+            interval = PREWARM_CRYPTO_INTERVAL
+        elif in_session:
+            interval = PREWARM_STOCK_INTERVAL
         else:
-            confidence = 70.0
+            return False
+
+        if now - self._last.get(symbol, 0.0) < interval:
+            return False
+
+        # A live request may have refreshed it recently
+        cached = prediction_cache.peek(symbol)
+        if cached is not None and "timestamp" in cached:
+            computed = datetime.fromisoformat(
+                cached["timestamp"]).replace(tzinfo=timezone.utc).timestamp()
+            if now - computed < interval / 2:
+                self._last[symbol] = computed
+                return False
+        return True
+
+    def enqueue_due(self) -> int:
+        """Queue every due symbol by popularity; returns how many were added."""
+        now = time.time()
+        in_session = self.in_session()
+        added = 0
+        for symbol in self.crypto + self.stocks:
+            if symbol in self._queued or not self.is_due(symbol, now, in_session):
+                continue
+            heapq.heappush(
+                self._queue, (-self.popularity.score(symbol), next(self._counter), symbol))
+            self._queued.add(symbol)
+            added += 1
+        if added and self._ready is not None:
+            self._ready.set()
+        return added
+
+    async def _schedule_loop(self):
+        await asyncio.sleep(PREWARM_START_DELAY)
+        while True:
+            try:
+                self.enqueue_due()
+            except Exception as e:
+                logger.warning(f"Pre-warm scheduling failed: {e}")
+            await asyncio.sleep(PREWARM_TICK)
 
-        # Build result
-        result = {
-            "symbol": symbol,
-            "currentPrice": round(current_price, 2),
-            "predictedPrice": round(predicted_price, 2),
-            "change": round(change, 2),
-            "changePercent": round(change_percent, 2),
-            "direction": direction,
-            "confidence": round(confidence, 1),
-            "sentiment": round(sentiment, 3),
-            "sentimentLabel": "bullish" if sentiment > 0.1 else "bearish" if sentiment < -0.1 else "neutral",
-            "indicators": {
-                "rsi": round(float(df["RSI"].iloc[-1]), 2),
-                "macd": round(float(df["MACD"].iloc[-1]), 4),
-                "volatility": round(float(df["Volatility_20"].iloc[-1]) * 100, 2),
-                "ma20": round(float(df["MA_20"].iloc[-1]), 2),
-                "ma50": round(float(df["MA_50"].iloc[-1]), 2) if "MA_50" in df.columns else None
-            },
-            "models": {
-                "rf": models.get("rf") is not None,
-                "gb": models.get("gb") is not None,
-                "xgb": models.get("xgb") is not None,
-                "lstm": models.get("lstm") is not None
-            },
-            "dataPoints": len(df),
-            "timestamp": datetime.utcnow().isoformat(),
-            "disclaimer": "This is a demo prediction. Not financial advice."
-        }
+    async def _wait_for_capacity(self):
+        """Hold back while live prediction jobs occupy every slot or queue."""
+        while admission.active >= admission.max_active or admission.queued:
+            await asyncio.sleep(1)
 
-        # Cache result
-        prediction_cache[symbol] = {
-            "data": result,
-            "cached_at": datetime.now().timestamp()
+    async def _worker(self):
+        while True:
+            while not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+
+            _, _, symbol = heapq.heappop(self._queue)
+            await self._wait_for_capacity()
+            job = None
+            try:
+                # Not run_prediction(): pre-warming must not count as demand
+                job = _start_prediction(symbol, 20, background=True)
+                await asyncio.shield(job)
+                self.refreshed += 1
+            except asyncio.CancelledError:
+                if job is None or not job.cancelled():
+                    raise  # the worker itself is stopping
+                # The shared job was cancelled elsewhere: keep pre-warming
+                self.failed += 1
+                logger.warning(f"Pre-warm cancelled for {symbol}")
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Pre-warm failed for {symbol}: {e}")
+            finally:
+                self._last[symbol] = time.time()
+                self._queued.discard(symbol)
+
+    def start(self):
+        if self.concurrency <= 0 or self._tasks:
+            return
+        self._ready = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._schedule_loop())] + [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        logger.info(
+            f"Pre-warming {len(self.stocks)} stocks and {len(self.crypto)} crypto "
+            f"with concurrency {self.concurrency}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": bool(self._tasks),
+            "concurrency": self.concurrency,
+            "queued": len(self._queue),
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "inSession": self.in_session(),
+            "popular": self.popularity.top(5)
         }
 
-        return result
 
-    except Exception as e:
-        logger.error(f"Prediction error for {symbol}: {e}")
-        raise
+prewarm_scheduler = PrewarmScheduler()
 
 
 # ===========================================
 # FASTAPI APPLICATION
 # ===========================================
 
+def warm_imports():
+    """
+    Import the heavy libraries ahead of the first request that needs them.
+    Serve-only mode predicts with the numpy engine, so the training stacks
+    (sklearn, torch, xgboost) are left unloaded.
+    """
+    started = time.perf_counter()
+    modules = [pd, requests]
+    names = ["scipy.signal"]
+    if market_data.name == "yahoo":
+        modules.append(yf)
+    if not SERVE_ONLY:
+        modules.extend([joblib, torch])
+        names.extend(["sklearn.ensemble", "sklearn.preprocessing"])
+        xgb_available()
+    if HAS_VADER:
+        names.append("vaderSentiment.vaderSentiment")
+
+    for module in modules:
+        module._load()
+    for name in names:
+        _import(name)
+    logger.info(f"Imports warmed up in {time.perf_counter() - started:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background work on startup; stop it and release pools on shutdown."""
+    if IMPORT_WARMUP:
+        asyncio.create_task(asyncio.to_thread(warm_imports)).add_done_callback(
+            _log_refresh_error)
+    prewarm_scheduler.start()
+    try:
+        yield
+    finally:
+        await prewarm_scheduler.stop()
+        shutdown_executor()
+        await sentiment_service.aclose()
+
+
 app = FastAPI(
     title="World-Studio Stock Predictor",
     description="ML-powered stock price prediction API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -614,10 +4613,37 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        http_latency.observe(
+            time.perf_counter() - start, request.method,
+            route.path if route is not None else "unmatched", str(status))
+
+
 # Request/Response models
 class PredictRequest(BaseModel):
     symbol: str
     use_cache: bool = True
+    timings: bool = False
+    horizons: Optional[List[int]] = None
+    deadline: Optional[float] = None  # seconds
+
+
+class BatchPredictRequest(BaseModel):
+    symbols: List[str]
+    use_cache: bool = True
+    stream: bool = False
+    timings: bool = False
+    horizons: Optional[List[int]] = None
+    deadline: Optional[float] = None  # seconds, for the whole batch
 
 
 class PredictResponse(BaseModel):
@@ -643,8 +4669,14 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "predict": "POST /predict",
+            "batch": "POST /predict/batch",
+            "forecast": "GET /predict/{symbol}/forecast?horizons=1,5,20",
             "quote": "GET /quote/{symbol}",
+            "quotes": "GET /quotes?symbols=AAPL,MSFT",
             "supported": "GET /supported",
+            "cache": "GET /cache/stats",
+            "memory": "GET /models/memory",
+            "metrics": "GET /metrics",
             "health": "GET /health"
         }
     }
@@ -658,11 +4690,33 @@ async def health_check():
         "models": {
             "xgboost": HAS_XGB,
             "vader": HAS_VADER,
-            "torch": torch.cuda.is_available() and "GPU" or "CPU"
-        }
+            # Asking torch about CUDA would import it
+            "torch": (torch.cuda.is_available() and "GPU" or "CPU")
+            if torch._module is not None else "not loaded"
+        },
+        "startup": {
+            "importSeconds": round(IMPORT_SECONDS, 3),
+            "serveOnly": SERVE_ONLY
+        },
+        "jobs": {
+            "workers": PREDICT_WORKERS,
+            "inflight": len(_inflight),
+            "admission": admission.stats()
+        },
+        "subscriptions": prediction_hub.stats(),
+        "prewarm": prewarm_scheduler.stats(),
+        "cacheBackend": cache_backend.name,
+        "marketData": market_data.stats()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/supported")
 async def get_supported():
     return {
@@ -672,11 +4726,22 @@ async def get_supported():
     }
 
 
+def overloaded(e: Overloaded) -> HTTPException:
+    """503 (queue full) / 504 (deadline passed) with a Retry-After hint."""
+    return HTTPException(
+        status_code=e.status_code, detail=str(e),
+        headers={"Retry-After": str(e.retry_after)})
+
+
 @app.post("/predict")
 async def predict_endpoint(request: PredictRequest):
     try:
-        result = predict_stock(request.symbol, use_cache=request.use_cache)
+        result = await run_prediction(
+            request.symbol, use_cache=request.use_cache, timings=request.timings,
+            horizons=parse_horizons(request.horizons), deadline=request.deadline)
         return result
+    except Overloaded as e:
+        raise overloaded(e)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -684,11 +4749,102 @@ async def predict_endpoint(request: PredictRequest):
         raise HTTPException(status_code=500, detail="Prediction failed")
 
 
+@app.post("/predict/batch")
+async def predict_batch(request: BatchPredictRequest):
+    """
+    Predict many symbols in one call.
+    History for all uncached symbols is fetched with one bulk download
+    and their features are computed together in one vectorized panel,
+    then the per-symbol jobs are spread over the job pool. With
+    stream=true results are sent as NDJSON lines as each symbol finishes.
+    Symbols turned away by admission control are reported as errors with
+    "retryAfter"; when every symbol is, the whole batch gets a 503.
+    """
+    started = time.perf_counter()
+    try:
+        symbols = list(dict.fromkeys(
+            normalize_symbol(s) for s in request.symbols if s.strip()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(symbols) > BATCH_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many symbols (max {BATCH_MAX_SYMBOLS})")
+    try:
+        horizons = parse_horizons(request.horizons)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.deadline is not None and request.deadline <= 0:
+        raise HTTPException(status_code=400, detail="deadline must be positive (seconds)")
+
+    pending = [
+        s for s in symbols
+        if not request.use_cache or not prediction_cache.is_fresh(forecast_key(s, horizons))
+    ]
+    sentiments: Dict[str, float] = {}
+    features: Dict[str, pd.DataFrame] = {}
+    if pending:
+        # No point downloading history for jobs that cannot even queue
+        try:
+            admission.check()
+        except Overloaded as e:
+            raise overloaded(e)
+        # History in one bulk download, news for all symbols concurrently
+        frames, sentiments = await asyncio.gather(
+            asyncio.to_thread(prefetch_stock_data, pending),
+            sentiment_service.aget_many(pending))
+        # Too-short histories are left to the per-symbol path's error
+        frames = {s: f for s, f in frames.items() if len(f) >= 100}
+        features = await asyncio.to_thread(build_feature_frames, frames, sentiments)
+
+    async def run_one(symbol: str) -> Dict[str, Any]:
+        deadline = None
+        if request.deadline is not None:
+            deadline = max(1e-3, request.deadline - (time.perf_counter() - started))
+        try:
+            return await run_prediction(
+                symbol, use_cache=request.use_cache, timings=request.timings,
+                sentiment=sentiments.get(symbol), features=features.get(symbol),
+                horizons=horizons, deadline=deadline)
+        except Overloaded as e:
+            return {"symbol": symbol, "error": str(e), "retryAfter": e.retry_after}
+        except ValueError as e:
+            return {"symbol": symbol, "error": str(e)}
+        except Exception as e:
+            logger.error(f"Batch prediction error for {symbol}: {e}")
+            return {"symbol": symbol, "error": "Prediction failed"}
+
+    tasks = [asyncio.ensure_future(run_one(s)) for s in symbols]
+
+    if request.stream:
+        async def stream_results():
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+    results = await asyncio.gather(*tasks)
+    if all("retryAfter" in r for r in results):
+        raise overloaded(Overloaded(
+            "Prediction queue is full", max(r["retryAfter"] for r in results)))
+    return {
+        "results": [r for r in results if "error" not in r],
+        "errors": {r["symbol"]: r["error"] for r in results if "error" in r},
+        "count": len(results),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 @app.get("/predict/{symbol}")
-async def predict_get(symbol: str):
+async def predict_get(symbol: str, timings: bool = False, deadline: Optional[float] = None):
     try:
-        result = predict_stock(symbol)
+        result = await run_prediction(symbol, timings=timings, deadline=deadline)
         return result
+    except Overloaded as e:
+        raise overloaded(e)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -696,29 +4852,90 @@ async def predict_get(symbol: str):
         raise HTTPException(status_code=500, detail="Prediction failed")
 
 
+@app.get("/predict/{symbol}/forecast")
+async def predict_forecast(
+    symbol: str,
+    horizons: Optional[str] = None,
+    timings: bool = False,
+    deadline: Optional[float] = None
+):
+    """
+    Forecast curve for several horizons (bars ahead, e.g. ?horizons=1,5,20;
+    FORECAST_HORIZONS by default) from one shared training pass.
+    """
+    try:
+        result = await run_prediction(
+            symbol, timings=timings,
+            horizons=parse_horizons(horizons) or FORECAST_HORIZONS, deadline=deadline)
+        return result
+    except Overloaded as e:
+        raise overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Forecast error: {e}")
+        raise HTTPException(status_code=500, detail="Prediction failed")
+
+
 @app.get("/quote/{symbol}")
 async def get_quote(symbol: str):
     """Get quick quote without full prediction."""
     try:
-        ticker = yf.Ticker(symbol.upper())
-        info = ticker.info
-
-        return {
-            "symbol": symbol.upper(),
-            "price": info.get("regularMarketPrice") or info.get("currentPrice"),
-            "previousClose": info.get("previousClose"),
-            "open": info.get("open"),
-            "high": info.get("dayHigh"),
-            "low": info.get("dayLow"),
-            "volume": info.get("volume"),
-            "marketCap": info.get("marketCap"),
-            "name": info.get("shortName") or info.get("longName"),
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        return await quote_service.info(symbol.upper())
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Quote failed: {str(e)}")
 
 
+@app.get("/quotes")
+async def get_quotes(symbols: str):
+    """
+    Quotes for many symbols: GET /quotes?symbols=AAPL,MSFT,BTC-USD
+    Served from a short-TTL cache; misses are fetched in one bulk call.
+    """
+    requested = list(dict.fromkeys(
+        s.strip().upper() for s in symbols.split(",") if s.strip()))
+
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(requested) > QUOTES_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many symbols (max {QUOTES_MAX_SYMBOLS})")
+
+    quotes = await quote_service.quotes(requested)
+    return {
+        "quotes": [quotes[s] for s in requested if s in quotes],
+        "missing": [s for s in requested if s not in quotes],
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Prediction cache size and hit/miss/eviction counters."""
+    return {**prediction_cache.stats(), "timestamp": datetime.utcnow().isoformat()}
+
+
+@app.get("/models/memory")
+async def models_memory():
+    """
+    Model residency. "process" is the main process's registry only;
+    with PREDICT_WORKERS > 0 the models live in the workers, whose
+    registries are not collected. Each of those processes has its own
+    MODEL_MEMORY_BUDGET. "lastUsed" is the resident size last reported
+    by whichever worker served each symbol.
+    """
+    processes = PREDICT_WORKERS + 1
+    return {
+        "process": {**model_registry.stats(), "pid": os.getpid(), "scope": "main process"},
+        "lastUsed": dict(sorted(_model_bytes.items())),
+        "workers": PREDICT_WORKERS,
+        "budgetPerProcess": MODEL_MEMORY_BUDGET,
+        "maxTotalBudget": MODEL_MEMORY_BUDGET * processes if MODEL_MEMORY_BUDGET else None,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 @app.delete("/cache")
 async def clear_cache():
     """Clear prediction cache."""
@@ -732,34 +4949,75 @@ async def clear_cache():
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    Real-time predictions through the shared hub.
+
+    Messages:
+        {"symbol": "AAPL", "interval": 60}                   # subscribe
+        {"action": "subscribe", "symbols": [...], "interval": 60}
+        {"action": "unsubscribe", "symbols": [...]}
+
+    Malformed messages, symbols or intervals, and subscriptions past
+    WS_MAX_SYMBOLS, are answered with {"error": ...}; the socket and its
+    other subscriptions stay up.
+    """
     await websocket.accept()
     logger.info("WebSocket connected")
 
-    try:
-        data = await websocket.receive_json()
-        symbol = data.get("symbol", "AAPL").upper()
-        interval = data.get("interval", 60)  # seconds
+    sub = HubSubscriber()
 
+    async def receive_loop():
         while True:
-            try:
-                result = predict_stock(symbol, use_cache=False)
-                await websocket.send_json(result)
-            except Exception as e:
-                await websocket.send_json({"error": str(e)})
+            data = await websocket.receive_json()
+            if not isinstance(data, dict):
+                sub.offer("error", {"error": "Expected a JSON object"})
+                continue
+            action = data.get("action", "subscribe")
+            symbols = data.get("symbols") or [data.get("symbol", "AAPL")]
+            interval = data.get("interval", WS_DEFAULT_INTERVAL)  # seconds
+            if not isinstance(symbols, list):
+                symbols = [symbols]
+
+            for symbol in symbols:
+                if action == "unsubscribe":
+                    prediction_hub.unsubscribe(sub, symbol)
+                    continue
+                try:
+                    prediction_hub.subscribe(sub, symbol, interval)
+                except ValueError as e:
+                    sub.offer(f"error:{symbol}", {"symbol": symbol, "error": str(e)})
+
+    async def send_loop():
+        while True:
+            for message in await sub.next_batch():
+                await websocket.send_json(message)
 
-            await asyncio.sleep(interval)
+    tasks = [asyncio.create_task(receive_loop()), asyncio.create_task(send_loop())]
+
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
 
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
+        for task in tasks:
+            task.cancel()
+        prediction_hub.unsubscribe_all(sub)
+        if sub.dropped:
+            logger.info(f"WebSocket skipped {sub.dropped} stale updates")
         try:
             await websocket.close()
         except Exception:
             pass
 
 
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+
 # ===========================================
 # MAIN
 # ===========================================
@@ -779,7 +5037,7 @@ if __name__ == "__main__":
     print(
         f"║  VADER: {'✅' if HAS_VADER else '❌'}                            ║")
     print(
-        f"║  CUDA: {'✅' if torch.cuda.is_available() else '❌'}                             ║")
+        f"║  Serve-only: {'✅' if SERVE_ONLY else '❌'}                       ║")
     print("╚════════════════════════════════════════╝")
 
     uvicorn.run(app, host=host, port=port)
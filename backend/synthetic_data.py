@@ -0,0 +1,37 @@
+"""
+World-Studio.live - Synthetic Market Data
+=========================================
+
+Random-walk daily bars shared by the benchmarks, the load test and the
+test suite. Only numpy and pandas are needed, so it can be imported
+before predict_stock.py reads its configuration.
+"""
+
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_bars(n_bars: int, seed: int = 0) -> pd.DataFrame:
+    """Random-walk daily bars ending today."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_bars)
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, n_bars)))
+    open_ = close * (1 + rng.normal(0, 0.003, n_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, n_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, n_bars)))
+    volume = rng.integers(1_000_000, 20_000_000, n_bars).astype(float)
+
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index)
+
+
+def write_bars(directory: str, symbols: List[str], n_bars: int, seed: int = 0):
+    """One <SYMBOL>.csv of synthetic bars per symbol (replay/fixture format)."""
+    os.makedirs(directory, exist_ok=True)
+    for i, symbol in enumerate(symbols):
+        synthetic_bars(n_bars, seed=seed + i).to_csv(os.path.join(directory, f"{symbol}.csv"))
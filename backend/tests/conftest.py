@@ -0,0 +1,34 @@
+"""
+Shared fixtures. predict_stock reads its configuration at import time,
+so the stores point at a scratch directory before it is imported.
+"""
+
+import os
+import sys
+import shutil
+import atexit
+import tempfile
+
+_SCRATCH = tempfile.mkdtemp(prefix="predict-tests-")
+atexit.register(shutil.rmtree, _SCRATCH, ignore_errors=True)
+os.environ["MODEL_DIR"] = os.path.join(_SCRATCH, "models")
+os.environ["DATA_DIR"] = os.path.join(_SCRATCH, "data")
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["MARKET_DATA_PROVIDER"] = "yahoo"
+os.environ["PREDICT_WORKERS"] = "0"
+os.environ["PREWARM_CONCURRENCY"] = "0"
+os.environ["IMPORT_WARMUP"] = "false"
+os.environ["NEWS_API_KEY"] = ""
+os.environ.setdefault("LSTM_TIME_BUDGET", "5")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from synthetic_data import synthetic_bars  # noqa: E402,F401
+
+
+@pytest.fixture
+def bars() -> pd.DataFrame:
+    return synthetic_bars(400)
@@ -0,0 +1,115 @@
+"""Admission control, deadlines and shared in-flight jobs."""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import predict_stock as ps
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    """
+    A fresh admission controller and cache, and predict_stock() replaced
+    by a stub that blocks until `release` is set and counts its calls.
+    """
+    release = threading.Event()
+    calls = []
+
+    def fake_predict(symbol, lookback, use_cache, sentiment, features, horizons):
+        calls.append(symbol)
+        release.wait(10)
+        return {"symbol": symbol, "timestamp": "2026-01-01T00:00:00", "_modelBytes": 0}
+
+    async def no_sentiment(symbol):
+        return 0.0
+
+    monkeypatch.setattr(ps, "predict_stock", fake_predict)
+    monkeypatch.setattr(ps.sentiment_service, "aget", no_sentiment)
+    monkeypatch.setattr(ps, "admission", ps.AdmissionController(max_active=1, max_queue=4))
+    monkeypatch.setattr(ps, "prediction_cache", ps.PredictionCache(max_entries=100, ttl=60))
+    yield release, calls
+    release.set()
+    assert not ps._inflight and not ps._waiting and not ps._background
+
+
+async def request(method, url):
+    transport = httpx.ASGITransport(app=ps.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, url)
+
+
+def test_full_queue_is_503_with_retry_after(jobs):
+    ps.admission.max_queue = 0
+    ps.admission.active = 1  # every slot busy
+
+    response = asyncio.run(request("GET", "/predict/AAPL"))
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert ps.admission.rejected == 1
+
+
+def test_deadline_is_504_and_drops_the_queued_job(jobs):
+    ps.admission.active = 1
+
+    async def scenario():
+        response = await request("GET", "/predict/AAPL?deadline=0.1")
+        await asyncio.sleep(0)  # let the cancelled job unwind
+        return response
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 504
+    assert int(response.headers["Retry-After"]) >= 1
+    assert ps.admission.expired == 1
+    assert ps.admission.queued == 0
+
+
+def test_request_joining_background_job_times_out_without_cancelling_it(jobs):
+    release, calls = jobs
+    ps.admission.active = 1  # the background job has to queue
+
+    async def scenario():
+        background = ps._start_prediction("BTC-USD", 20, background=True)
+        ps._start_prediction("ETH-USD", 20, background=True)
+        await asyncio.sleep(0.01)
+        assert ps.admission._waiters[0][0] == ps.admission.PRIORITIES["background"]
+
+        with pytest.raises(ps.DeadlineExceeded):
+            await ps.run_prediction("BTC-USD", sentiment=0.0, deadline=0.1)
+        assert not background.done()
+        # The live request moved the job ahead of the other background one
+        ranks = {w[3]: w[0] for w in ps.admission._waiters}
+        assert ranks == {"BTC-USD": ps.admission.PRIORITIES["cold"],
+                         "ETH-USD": ps.admission.PRIORITIES["background"]}
+
+        release.set()
+        ps.admission.release()  # free the busy slot: BTC-USD runs first
+        result = await background
+        await ps._inflight["ETH-USD"]
+        return result
+
+    assert asyncio.run(scenario())["symbol"] == "BTC-USD"
+    assert calls == ["BTC-USD", "ETH-USD"]
+
+
+def test_concurrent_requests_share_one_job(jobs):
+    release, calls = jobs
+
+    async def scenario():
+        waiting = [asyncio.create_task(ps.run_prediction("AAPL", sentiment=0.0)) for _ in range(5)]
+        forecast = asyncio.create_task(ps.run_prediction("AAPL", sentiment=0.0, horizons=(1, 5)))
+        await asyncio.sleep(0.05)
+        waiting[0].cancel()  # a client going away does not cancel the shared job
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(*waiting[1:], forecast)
+        return results, waiting[0].cancelled()
+
+    results, cancelled = asyncio.run(scenario())
+    assert cancelled
+    assert sorted(calls) == ["AAPL", "AAPL"]  # one next-bar job, one forecast job
+    assert [r["symbol"] for r in results] == ["AAPL"] * 5
+    assert ps.prediction_cache.get("AAPL")["symbol"] == "AAPL"
+    assert ps.prediction_cache.get("AAPL@1-5")["symbol"] == "AAPL"
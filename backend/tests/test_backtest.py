@@ -0,0 +1,41 @@
+import numpy as np
+
+import predict_stock as ps
+from conftest import synthetic_bars
+
+
+def test_backtest_is_deterministic_and_scores_fitted_weights_held_out():
+    frames = {"AAA": synthetic_bars(400, seed=1), "BBB": synthetic_bars(360, seed=2)}
+    kwargs = dict(models=("rf", "gb"), train_window=150, test_window=40, max_folds=3, workers=0)
+
+    report = ps.walk_forward_backtest(frames, **kwargs)
+    again = ps.walk_forward_backtest(frames, **kwargs)
+
+    assert report["folds"] == 6
+    assert report["heldOut"]["periods"] == 2
+    assert report["heldOut"]["ensemble"]["n"] == 2 * 2 * 40
+    assert report["heldOut"]["fittedEnsemble"]["n"] == 2 * 2 * 40
+    assert abs(sum(report["fittedWeights"].values()) - 1) < 1e-3
+    for key in ("models", "ensemble", "fittedWeights", "heldOut", "bySymbol"):
+        assert report[key] == again[key], key
+
+
+def test_fitted_weights_never_see_the_period_they_are_scored_on(monkeypatch):
+    # rf is exact in the older period, gb in the latest one
+    def fold(task):
+        actual = np.linspace(100, 110, 50)
+        good, bad = actual, actual + 10
+        rf, gb = (good, bad) if task["fold"] == 0 else (bad, good)
+        return {"symbol": task["symbol"], "fold": task["fold"], "actual": actual,
+                "current": actual - 1, "preds": {"rf": rf, "gb": gb}}
+
+    monkeypatch.setattr(ps, "_backtest_fold", fold)
+    report = ps.walk_forward_backtest(
+        {"AAA": synthetic_bars(300)}, models=("rf", "gb"),
+        train_window=100, test_window=50, max_folds=2, workers=0)
+
+    # Weights from the older period (all rf) are 10 off in the latest one;
+    # weights fitted in-sample on both periods would split the difference
+    assert report["heldOut"]["periods"] == 1
+    assert report["heldOut"]["fittedEnsemble"]["mae"] == 10.0
+    assert report["fittedWeights"]["rf"] < 1
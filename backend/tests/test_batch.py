@@ -0,0 +1,99 @@
+"""
+/predict/batch: per-symbol failures, admission and request validation.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import predict_stock as ps
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """Batch endpoint with stubbed data, sentiment and prediction jobs."""
+    prefetched = []
+
+    def fake_predict(symbol, lookback, use_cache, sentiment, features, horizons):
+        if symbol == "BAD":
+            raise ValueError(f"Insufficient data for {symbol} (need 100+ days)")
+        if symbol == "ERR":
+            raise RuntimeError("model exploded")
+        return {"symbol": symbol, "predictedPrice": 1.0, "_modelBytes": 0}
+
+    async def no_sentiment(symbols, api_key=None):
+        return {}
+
+    monkeypatch.setattr(ps, "predict_stock", fake_predict)
+    monkeypatch.setattr(ps, "prefetch_stock_data", lambda symbols: prefetched.extend(symbols) or {})
+    monkeypatch.setattr(ps.sentiment_service, "aget_many", no_sentiment)
+    monkeypatch.setattr(ps, "admission", ps.AdmissionController(max_active=4, max_queue=8))
+    monkeypatch.setattr(ps, "prediction_cache", ps.PredictionCache(max_entries=100, ttl=60))
+    return prefetched
+
+
+def post(body):
+    async def call():
+        transport = httpx.ASGITransport(app=ps.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/predict/batch", json=body)
+    return asyncio.run(call())
+
+
+def test_failures_are_reported_per_symbol(service):
+    response = post({"symbols": ["aapl", "BAD", "msft", "ERR", "AAPL "]})
+    assert response.status_code == 200
+    body = response.json()
+
+    assert [r["symbol"] for r in body["results"]] == ["AAPL", "MSFT"]
+    assert body["errors"] == {
+        "BAD": "Insufficient data for BAD (need 100+ days)", "ERR": "Prediction failed"}
+    assert body["count"] == 4
+    assert sorted(service) == ["AAPL", "BAD", "ERR", "MSFT"]  # one bulk prefetch
+
+
+def test_cached_symbols_are_not_prefetched(service):
+    ps.prediction_cache.set("AAPL", {"symbol": "AAPL", "predictedPrice": 2.0})
+    body = post({"symbols": ["AAPL", "MSFT"]}).json()
+
+    assert service == ["MSFT"]
+    assert {r["symbol"]: r["predictedPrice"] for r in body["results"]} == {"AAPL": 2.0, "MSFT": 1.0}
+
+
+def test_streamed_results_include_errors(service):
+    response = post({"symbols": ["AAPL", "BAD"], "stream": True})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert {line["symbol"]: "error" in line for line in lines} == {"AAPL": False, "BAD": True}
+
+
+def test_overloaded_symbols_get_retry_after(service):
+    ps.prediction_cache.set("AAPL", {"symbol": "AAPL", "predictedPrice": 2.0})
+    ps.admission.max_active, ps.admission.max_queue = 1, 1
+    ps.admission.active = 1  # busy: MSFT queues until its deadline, NVDA is turned away
+
+    response = post({"symbols": ["AAPL", "MSFT", "NVDA"], "deadline": 0.2})
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["symbol"] for r in body["results"]] == ["AAPL"]
+    assert set(body["errors"]) == {"MSFT", "NVDA"}
+
+
+def test_full_queue_rejects_the_whole_batch(service):
+    ps.admission.max_queue = 0
+    ps.admission.active = ps.admission.max_active
+
+    response = post({"symbols": ["AAPL", "MSFT"]})
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert service == []  # nothing downloaded for jobs that cannot queue
+
+
+@pytest.mark.parametrize("body", [
+    {"symbols": []}, {"symbols": [" "]}, {"symbols": ["../etc"]},
+    {"symbols": ["S%d" % i for i in range(ps.BATCH_MAX_SYMBOLS + 1)]},
+    {"symbols": ["AAPL"], "horizons": [0]}, {"symbols": ["AAPL"], "deadline": 0}])
+def test_invalid_batches_are_400(service, body):
+    assert post(body).status_code == 400
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import predict_stock as ps
+
+
+class Clock(datetime):
+    """datetime whose now() is set by the test."""
+
+    at = 1_000_000.0
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.fromtimestamp(cls.at, tz)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(ps, "datetime", Clock)
+    return Clock
+
+
+def test_ttl_default_comes_from_the_environment():
+    assert ps.PredictionCache().ttl == ps.CACHE_TTL
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ps.PredictionCache(max_entries=2, ttl=60)
+    cache.set("A", {"v": 1})
+    cache.set("B", {"v": 2})
+    assert cache.get("A") == {"v": 1}  # A is now the most recent
+    cache.set("C", {"v": 3})
+
+    assert cache.get("B") is None
+    assert cache.get("A") == {"v": 1} and cache.get("C") == {"v": 3}
+    assert cache.evictions == 1 and len(cache) == 2
+
+
+def test_byte_budget_evicts_oldest_entries():
+    cache = ps.PredictionCache(max_entries=100, ttl=60, max_bytes=1000)
+    for key in "ABCD":
+        cache.set(key, {"payload": "x" * 300})  # ~360 bytes serialized
+
+    assert cache.stats()["bytes"] <= 1000
+    assert len(cache) == 2 and cache.evictions == 2
+    assert cache.get("B") is None and cache.get("D") is not None
+
+
+def test_entries_go_stale_then_expire(clock):
+    cache = ps.PredictionCache(ttl=60, stale_ttl=30)
+    cache.set("AAPL", {"v": 1})
+
+    clock.at += 59
+    assert cache.lookup("AAPL") == ({"v": 1}, "fresh")
+    clock.at += 2
+    assert cache.lookup("AAPL") == ({"v": 1}, "stale")
+    assert cache.get("AAPL") is None  # get() wants fresh data
+    clock.at += 30
+    assert cache.lookup("AAPL") == (None, None)
+    assert len(cache) == 0
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["staleHits"], stats["misses"]) == (1, 2, 1)
+
+
+def test_stale_entry_is_served_while_it_refreshes(clock, monkeypatch):
+    cache = ps.PredictionCache(ttl=60, stale_ttl=600)
+    monkeypatch.setattr(ps, "prediction_cache", cache)
+    monkeypatch.setattr(ps, "admission", ps.AdmissionController(max_active=1, max_queue=4))
+    monkeypatch.setattr(
+        ps, "predict_stock",
+        lambda symbol, *args: {"symbol": symbol, "version": 2, "_modelBytes": 0})
+
+    cache.set("AAPL", {"symbol": "AAPL", "version": 1})
+    clock.at += 120
+
+    async def scenario():
+        served = await ps.run_prediction("AAPL", sentiment=0.0)
+        refresh = ps._inflight["AAPL"]
+        await refresh
+        return served
+
+    assert asyncio.run(scenario())["version"] == 1
+    assert cache.get("AAPL")["version"] == 2
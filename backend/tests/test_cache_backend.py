@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import subprocess
+
+import pytest
+
+import predict_stock as ps
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def redis_backend(tmp_path):
+    url = os.getenv("TEST_REDIS_URL")
+    if url:
+        import redis
+        client = redis.Redis.from_url(url)
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        client = fakeredis.FakeRedis()
+    try:
+        client.ping()
+    except Exception as e:
+        pytest.skip(f"Redis unavailable: {e}")
+    backend = ps.RedisCacheBackend(client=client, prefix=f"test-{os.getpid()}:")
+    backend.artifact_dir = str(tmp_path)
+    return backend
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield ps.CacheBackend(str(tmp_path))
+    elif request.param == "sqlite":
+        yield ps.SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), str(tmp_path))
+    else:
+        backend = redis_backend(tmp_path)
+        yield backend
+        backend.clear()
+
+
+def test_values_round_trip(backend):
+    backend.set("pred:AAPL", b"\x00first")
+    backend.set("pred:AAPL", b"\x00second")  # replaced, not duplicated
+    backend.set("sentiment:AAPL", b"0.5")
+    assert backend.get("pred:AAPL") == b"\x00second"
+    assert backend.get("missing") is None
+
+    backend.clear("pred:")
+    assert backend.get("pred:AAPL") is None
+    assert backend.get("sentiment:AAPL") == b"0.5"
+    backend.delete("sentiment:AAPL")
+    assert backend.get("sentiment:AAPL") is None
+
+
+def test_values_expire(backend):
+    backend.set("short", b"x", ttl=0.2)
+    backend.set("forever", b"y")
+    assert backend.get("short") == b"x"
+    time.sleep(0.3)
+    assert backend.get("short") is None
+    assert backend.get("forever") == b"y"
+
+
+def test_artifact_blobs_round_trip(backend):
+    blob = os.urandom(1 << 20)
+    backend.put_artifact("AAPL@1-5", blob)
+    assert backend.get_artifact("AAPL@1-5") == blob
+    assert backend.get_artifact("MSFT") is None
+
+
+def test_sqlite_is_shared_between_processes(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    code = (
+        "import sys, predict_stock as ps; "
+        f"ps.SQLiteCacheBackend({str(path)!r}, {str(tmp_path)!r}).set('pred:AAPL', b'from child')"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=BACKEND, check=True)
+    assert ps.SQLiteCacheBackend(str(path), str(tmp_path)).get("pred:AAPL") == b"from child"
+
+
+@pytest.mark.skipif(ps.fcntl is None, reason="file locks need fcntl")
+def test_lock_is_exclusive_across_processes(tmp_path):
+    code = (
+        "import sys, time, predict_stock as ps\n"
+        f"with ps.CacheBackend({str(tmp_path)!r}).lock('train:AAPL') as acquired:\n"
+        "    print('locked' if acquired else 'failed', flush=True)\n"
+        "    time.sleep(1.5)\n"
+    )
+    child = subprocess.Popen(
+        [sys.executable, "-c", code], cwd=BACKEND, stdout=subprocess.PIPE, text=True)
+    try:
+        assert child.stdout.readline().strip() == "locked"
+        backend = ps.CacheBackend(str(tmp_path))
+
+        with backend.lock("train:AAPL", timeout=0.3) as acquired:
+            assert acquired is False  # held by the other process
+        with backend.lock("train:MSFT", timeout=0.3) as acquired:
+            assert acquired is True  # other names are independent
+
+        with backend.lock("train:AAPL", timeout=10) as acquired:
+            assert acquired is True  # once the other process lets go
+    finally:
+        child.wait(10)
+    assert child.returncode == 0
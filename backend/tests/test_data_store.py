@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import predict_stock as ps
+
+
+def test_store_read_and_sync_fingerprint_alike(tmp_path, bars, monkeypatch):
+    """Bars read back from the store hash like freshly fetched ones."""
+    store = ps.OHLCVStore(str(tmp_path), refresh=0)
+    start = datetime.now() - timedelta(days=5 * 365)
+    fetched = bars.set_axis(bars.index.as_unit("us"))  # what yfinance returns
+    monkeypatch.setattr(ps, "download_bars", lambda symbol, s, e: fetched.copy())
+
+    synced = store.sync("TEST", start, datetime.now())
+    stored = store.read("TEST")
+    topped_up = store.sync("TEST", start, datetime.now())  # refresh=0: fetches again
+
+    assert len(synced) == len(stored) == len(topped_up) == len(bars)
+    fingerprints = {ps.data_fingerprint(df, 20) for df in (synced, stored, topped_up)}
+    assert len(fingerprints) == 1
+
+
+def test_fingerprint_ignores_index_unit(bars):
+    for unit in ("s", "ms", "us"):
+        other = bars.set_axis(pd.DatetimeIndex(bars.index).as_unit(unit))
+        assert ps.data_fingerprint(other, 20) == ps.data_fingerprint(bars, 20)
+
+
+def test_fingerprint_changes_with_new_bars(bars):
+    assert ps.data_fingerprint(bars.iloc[:-1], 20) != ps.data_fingerprint(bars, 20)
+    assert ps.data_fingerprint(bars, 20) != ps.data_fingerprint(bars, 30)
+
+
+class FakeUpstream:
+    """download_bars()/download_bars_many() over a swappable history."""
+
+    def __init__(self, history):
+        self.history = history
+        self.starts = []
+
+    def bars(self, symbol, start, end):
+        self.starts.append(pd.Timestamp(start))
+        return self.history[self.history.index >= pd.Timestamp(start)].copy()
+
+    def bars_many(self, symbols, start, end):
+        return {s: self.bars(s, start, end) for s in symbols}
+
+
+def split_adjusted(bars, ratio=2.0):
+    adjusted = bars.copy()
+    adjusted[["Open", "High", "Low", "Close"]] /= ratio
+    adjusted["Volume"] *= ratio
+    return adjusted
+
+
+@pytest.fixture
+def upstream(bars, monkeypatch):
+    fake = FakeUpstream(bars)
+    monkeypatch.setattr(ps, "download_bars", fake.bars)
+    monkeypatch.setattr(ps, "download_bars_many", fake.bars_many)
+    return fake
+
+
+def test_top_up_overlaps_one_finished_bar(tmp_path, bars, upstream):
+    store = ps.OHLCVStore(str(tmp_path), refresh=0)
+    start = datetime.now() - timedelta(days=5 * 365)
+    store.sync("TEST", start, datetime.now())
+
+    # Only the unfinished last bar moved: a normal top-up
+    upstream.history = bars.copy()
+    upstream.history.iloc[-1, upstream.history.columns.get_loc("Close")] *= 1.01
+    synced = store.sync("TEST", start, datetime.now())
+
+    assert upstream.starts[-1] == bars.index[-2]
+    assert synced["Close"].iloc[-1] == upstream.history["Close"].iloc[-1]
+    assert len(upstream.starts) == 2
+
+
+@pytest.mark.parametrize("many", [False, True], ids=["sync", "sync_many"])
+def test_readjusted_history_is_refetched(tmp_path, bars, upstream, many):
+    store = ps.OHLCVStore(str(tmp_path), refresh=0)
+    start = datetime.now() - timedelta(days=5 * 365)
+    store.sync("TEST", start, datetime.now())
+
+    upstream.history = split_adjusted(bars)
+    if many:
+        synced = store.sync_many(["TEST"], start, datetime.now())["TEST"]
+    else:
+        synced = store.sync("TEST", start, datetime.now())
+
+    # A top-up, then the full history again
+    assert upstream.starts[-2] == bars.index[-2]
+    assert upstream.starts[-1] <= bars.index[0]
+    np.testing.assert_allclose(synced["Close"], upstream.history["Close"])
+    np.testing.assert_allclose(store.read("TEST")["Close"], upstream.history["Close"])
@@ -0,0 +1,60 @@
+"""
+Compiled InferenceEngine against the native models it was built from.
+
+Tolerance: |compiled - native| <= 1e-4 * (1 + max |native|), the bound
+from_models() itself accepts. The engine stores thresholds and leaf
+values as float32, so sums over hundreds of trees drift by ~1e-5 (RF,
+GB) to ~7e-5 (XGBoost) of the prediction scale; the numpy LSTM runs in
+float32 like the torch model.
+"""
+
+import numpy as np
+import pytest
+
+import predict_stock as ps
+from conftest import synthetic_bars
+
+TOL = 1e-4
+LOOKBACK = 20
+
+
+def assert_close(got, expected, err_msg=""):
+    expected = np.asarray(expected, dtype=np.float64)
+    np.testing.assert_allclose(
+        got, expected, rtol=0, atol=TOL * (1 + np.max(np.abs(expected))), err_msg=err_msg)
+
+
+def native_predictions(models, X, X_seq):
+    preds = {name: np.asarray(models[name].predict(X), dtype=np.float64).reshape(len(X), -1)
+             for name in ps.TREE_MODELS if models.get(name) is not None}
+    preds["lstm"] = ps.predict_with_lstm(models["lstm"], models["device"], X_seq).reshape(len(X_seq), -1)
+    return preds
+
+
+def fitted(horizons=None):
+    df = ps.add_technical_features(synthetic_bars(300, seed=7), 0.0)
+    X, y, _, _ = ps.prepare_features(df)
+    if horizons:
+        y = ps.horizon_targets(y, horizons)
+        X, y = X[:len(X) - max(horizons) + 1], y[:len(y) - max(horizons) + 1]
+    X_seq, y_seq = ps.create_sequences(X, y, LOOKBACK)
+    models = ps.train_models(X, y, X_seq, y_seq, LOOKBACK)
+    # Rows aligned with the LSTM windows, as predict_stock() pairs them
+    return models, X[LOOKBACK:], X_seq
+
+
+@pytest.mark.parametrize("horizons", [None, (1, 5)], ids=["next_bar", "multi_horizon"])
+def test_compiled_matches_native(horizons):
+    models, X, X_seq = fitted(horizons)
+    n_outputs = len(horizons) if horizons else 1
+    engine = ps.InferenceEngine.from_models(models, X.shape[1], LOOKBACK, n_outputs=n_outputs)
+    assert engine.frozen, f"served natively: {sorted(engine.native)}"
+
+    got = engine.predict(X, X_seq)
+    expected = native_predictions(models, X, X_seq)
+    for name, native in expected.items():
+        assert_close(np.reshape(got[name], native.shape), native, err_msg=name)
+
+    weights = {name: ps.ENSEMBLE_WEIGHTS[name] for name in expected}
+    ensemble = sum(expected[n] * w for n, w in weights.items()) / sum(weights.values())
+    assert_close(np.reshape(got["ensemble"], ensemble.shape), ensemble, err_msg="ensemble")
@@ -0,0 +1,83 @@
+"""
+Forecast horizons: parsing, cache keys, targets and request validation.
+"""
+
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+
+import predict_stock as ps
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (None, None), ([], None), ("", None), (" , ", None),
+    ([5, 1, 5], (1, 5)), ("20,1, 5", (1, 5, 20)), (["3"], (3,)),
+    ([1, ps.FORECAST_MAX_HORIZON], (1, ps.FORECAST_MAX_HORIZON)),
+])
+def test_parse_horizons(raw, expected):
+    assert ps.parse_horizons(raw) == expected
+
+
+@pytest.mark.parametrize("raw, message", [
+    ("abc", "Invalid horizons"), ("1,x", "Invalid horizons"), ([1.5j], "Invalid horizons"),
+    ([0, 5], "between 1 and"), ("-1", "between 1 and"),
+    ([ps.FORECAST_MAX_HORIZON + 1], "between 1 and"),
+])
+def test_parse_horizons_rejects(raw, message):
+    with pytest.raises(ValueError, match=message):
+        ps.parse_horizons(raw)
+
+
+def test_forecast_key():
+    assert ps.forecast_key("AAPL") == "AAPL"
+    assert ps.forecast_key("AAPL", ()) == "AAPL"
+    assert ps.forecast_key("AAPL", (1, 5, 20)) == "AAPL@1-5-20"
+
+
+def test_horizon_targets():
+    y = np.arange(1.0, 7.0)  # next-bar closes for rows 0..5
+    Y = ps.horizon_targets(y, (1, 3))
+    np.testing.assert_array_equal(Y[:, 0], y)
+    np.testing.assert_array_equal(Y[:4, 1], [3.0, 4.0, 5.0, 6.0])
+    assert np.isnan(Y[4:, 1]).all()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Records the horizons run_prediction is called with."""
+    seen = []
+
+    async def fake_run(symbol, horizons=None, **kwargs):
+        seen.append(horizons)
+        return {"symbol": symbol}
+
+    monkeypatch.setattr(ps, "run_prediction", fake_run)
+    return seen
+
+
+def request(method, url, **kwargs):
+    async def call():
+        transport = httpx.ASGITransport(app=ps.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+    return asyncio.run(call())
+
+
+def test_forecast_endpoint_parses_horizons(calls):
+    assert request("GET", "/predict/AAPL/forecast?horizons=5,1").status_code == 200
+    assert request("GET", "/predict/AAPL/forecast").status_code == 200
+    assert calls == [(1, 5), ps.FORECAST_HORIZONS]
+
+
+@pytest.mark.parametrize("method, url, body", [
+    ("GET", "/predict/AAPL/forecast?horizons=abc", None),
+    ("GET", f"/predict/AAPL/forecast?horizons={ps.FORECAST_MAX_HORIZON + 1}", None),
+    ("POST", "/predict", {"symbol": "AAPL", "horizons": [0]}),
+])
+def test_bad_horizons_are_400(calls, method, url, body):
+    response = request(method, url, json=body)
+    assert response.status_code == 400
+    assert "orizons" in response.json()["detail"]
+    assert calls == []
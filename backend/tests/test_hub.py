@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import predict_stock as ps
+
+
+@pytest.fixture
+def predictions(monkeypatch):
+    """run_prediction() stub: counts calls per symbol."""
+    calls = []
+
+    async def fake_run(symbol, use_cache=True, **kwargs):
+        calls.append(symbol)
+        return {"symbol": symbol, "predictedPrice": 1.0}
+
+    monkeypatch.setattr(ps, "run_prediction", fake_run)
+    return calls
+
+
+@pytest.mark.parametrize("symbol, expected", [
+    (" aapl ", "AAPL"), ("brk-b", "BRK-B"), ("BTC-USD", "BTC-USD"), ("^gspc", "^GSPC"),
+    ("eurusd=x", "EURUSD=X")])
+def test_symbols_are_normalized(symbol, expected):
+    assert ps.normalize_symbol(symbol) == expected
+
+
+@pytest.mark.parametrize("symbol", ["", "../etc/passwd", "AA PL", "A" * 30, None, 42])
+def test_malformed_symbols_are_rejected(symbol):
+    with pytest.raises(ValueError):
+        ps.normalize_symbol(symbol)
+
+
+def test_subscribe_validates_and_caps(predictions):
+    async def scenario():
+        hub = ps.PredictionHub(min_interval=10, max_symbols=2)
+        sub = ps.HubSubscriber()
+        with pytest.raises(ValueError):
+            hub.subscribe(sub, "AAPL", "soon")
+        with pytest.raises(ValueError):
+            hub.subscribe(sub, "not a symbol")
+        assert hub.stats() == {"symbols": 0, "subscriptions": 0}
+
+        hub.subscribe(sub, "aapl", "30")
+        hub.subscribe(sub, "MSFT", 1)  # clamped to min_interval
+        hub.subscribe(sub, "AAPL", 60)  # re-subscribing does not count
+        with pytest.raises(ValueError, match="max 2"):
+            hub.subscribe(sub, "TSLA")
+        intervals = dict(sub.intervals)
+        hub.unsubscribe_all(sub)
+        return intervals
+
+    assert asyncio.run(scenario()) == {"AAPL": 60, "MSFT": 10}
+
+
+def test_bad_message_keeps_the_socket_and_its_subscriptions(predictions):
+    client = TestClient(ps.app)
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"symbol": "AAPL"})
+        assert ws.receive_json()["symbol"] == "AAPL"
+
+        ws.send_json({"symbol": "MSFT", "interval": "often"})
+        assert "Invalid interval" in ws.receive_json()["error"]
+        ws.send_json({"symbols": ["../x"]})
+        assert "Invalid symbol" in ws.receive_json()["error"]
+        ws.send_json(["not", "an", "object"])
+        assert "error" in ws.receive_json()
+
+        ws.send_json({"symbol": "msft"})
+        assert ws.receive_json()["symbol"] == "MSFT"
+        assert ps.prediction_hub.stats() == {"symbols": 2, "subscriptions": 2}
+    assert predictions[:2] == ["AAPL", "MSFT"]
@@ -0,0 +1,96 @@
+"""
+Streaming and vectorized indicators against add_technical_features().
+
+Tolerance: rtol 1e-8. Both fast paths compute each window's variance
+around its own mean; pandas' online rolling variance is itself off by
+up to ~1.5e-9 relative on long, smooth series, so that is the slack.
+The absolute floor stays tiny: smooth-series volatilities are ~1e-7.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import predict_stock as ps
+from conftest import synthetic_bars
+
+RTOL = 1e-8
+ATOL = 1e-15
+
+
+def smooth_bars(n_bars: int = 3000) -> pd.DataFrame:
+    """Slow, nearly constant growth: worst case for running-sum variances."""
+    t = np.arange(n_bars)
+    close = 100 * np.exp(0.0005 * t + 0.002 * np.sin(t / 30))
+    return pd.DataFrame({
+        "Open": close * 0.999, "High": close * 1.002, "Low": close * 0.997,
+        "Close": close, "Volume": 1e6 + 1e3 * np.cos(t / 7)
+    }, index=pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n_bars))
+
+
+FRAMES = {"random_walk": lambda: synthetic_bars(400), "smooth": smooth_bars}
+
+
+@pytest.mark.parametrize("kind", FRAMES)
+def test_streaming_matches_batch(kind):
+    df = FRAMES[kind]()
+    batch = ps.add_technical_features(df, 0.1)
+
+    state = ps.IndicatorState(0.1)
+    rows = {}
+    for ts, o, h, l, c, v in zip(df.index, *(df[col].to_numpy() for col in ps.OHLCV_COLUMNS)):
+        rows[ts] = dict(state.update(o, h, l, c, v, ts))
+    streamed = pd.DataFrame.from_dict(rows, orient="index").loc[batch.index]
+
+    for column in batch.columns.drop("Target"):
+        np.testing.assert_allclose(
+            streamed[column].to_numpy(dtype=np.float64), batch[column].to_numpy(),
+            rtol=RTOL, atol=ATOL, err_msg=column)
+
+
+def test_streaming_replace_last_matches_batch():
+    df = synthetic_bars(301)  # the batch path drops the last bar (no target)
+    state = ps.IndicatorState.from_frame(df.iloc[:-2])
+    last = df.iloc[-2]
+    # An intraday value first, then the final bar replaces it
+    state.update(last.Open, last.High, last.Low, last.Close * 1.05, last.Volume / 2, df.index[-2])
+    state.update(last.Open, last.High, last.Low, last.Close, last.Volume, df.index[-2],
+                 replace_last=True)
+
+    expected = ps.add_technical_features(df, 0.0).loc[df.index[-2]]
+    np.testing.assert_allclose(
+        state.feature_row(), expected[ps.FEATURE_COLS].to_numpy(dtype=np.float64),
+        rtol=RTOL, atol=ATOL)
+
+
+def test_panel_matches_per_symbol():
+    frames = {
+        "LONG": synthetic_bars(400, seed=1),
+        "SHORT": synthetic_bars(150, seed=2),  # padded with leading NaN rows
+        "SMOOTH": smooth_bars(5000),
+    }
+    sentiments = {"LONG": 0.2, "SHORT": -0.1}
+    panel = ps.build_feature_frames(frames, sentiments)
+
+    for symbol, df in frames.items():
+        expected = ps.add_technical_features(df, sentiments.get(symbol, 0.0))
+        got = panel[symbol]
+        assert got.index.equals(expected.index), symbol
+        for column in expected.columns:
+            np.testing.assert_allclose(
+                got[column].to_numpy(), expected[column].to_numpy(),
+                rtol=RTOL, atol=ATOL, err_msg=f"{symbol} {column}")
+
+
+def test_feature_panel_rows_match_per_symbol():
+    frames = [synthetic_bars(300, seed=4), synthetic_bars(300, seed=5)]
+    ohlcv = np.stack([df[ps.OHLCV_COLUMNS].to_numpy() for df in frames])
+    features, target, valid = ps.build_feature_panel(ohlcv, sentiment=[0.0, 0.5])
+
+    for i, df in enumerate(frames):
+        expected = ps.add_technical_features(df, [0.0, 0.5][i])
+        assert valid[i].sum() == len(expected)
+        np.testing.assert_allclose(
+            features[i][valid[i]], expected[ps.FEATURE_COLS].to_numpy(),
+            rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose(target[i][valid[i]], expected["Target"].to_numpy(), rtol=RTOL)
@@ -0,0 +1,59 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import predict_stock as ps
+from conftest import synthetic_bars
+
+
+@pytest.fixture
+def recordings(tmp_path):
+    bars = synthetic_bars(300)
+    bars.to_csv(tmp_path / "AAPL.csv")
+    (tmp_path / "quotes.json").write_text(json.dumps({"aapl": {"name": "Apple Inc."}}))
+    return tmp_path, bars
+
+
+def replay(directory, **kwargs):
+    return ps.ReplayProvider(str(directory), latency=0, jitter=0, **kwargs)
+
+
+def test_missing_directory_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        replay(tmp_path / "missing")
+
+
+@pytest.mark.parametrize("speed", [0, 60])
+def test_empty_directory_still_has_a_clock(tmp_path, speed):
+    provider = replay(tmp_path, speed=speed)
+    assert isinstance(provider.now(), datetime)
+    assert provider.bars("AAPL", datetime(2020, 1, 1), provider.now()).empty
+    assert provider.quotes(["AAPL"]) == {}
+    assert provider.stats()["symbols"] == 0
+
+
+def test_recorded_bars_and_quotes(recordings):
+    directory, bars = recordings
+    provider = replay(directory)
+
+    assert provider.now() == bars.index[-1].to_pydatetime() + timedelta(days=1)
+    window = provider.bars("aapl", bars.index[100].to_pydatetime(), provider.now())
+    pd.testing.assert_frame_equal(window, bars.iloc[100:], check_freq=False)
+
+    quote = provider.quotes(["AAPL"])["AAPL"]
+    assert quote["name"] == "Apple Inc."
+    assert quote["price"] == round(bars["Close"].iloc[-1], 4)
+    assert provider.calls == 2
+
+
+def test_replay_clock_hides_future_bars(recordings):
+    directory, bars = recordings
+    start = bars.index[150]
+    provider = replay(directory, speed=24 * 3600, start=str(start))  # a day per second
+    provider.epoch = time.time()
+
+    visible = provider.bars("AAPL", bars.index[0].to_pydatetime(), datetime.max)
+    assert start <= visible.index[-1] < bars.index[160]
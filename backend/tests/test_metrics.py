@@ -0,0 +1,10 @@
+import predict_stock as ps
+
+
+def test_label_values_are_escaped(monkeypatch):
+    histogram = ps.Histogram("test_seconds", "Test", ("route",))
+    histogram.observe(0.01, 'a\\b"c\nd')
+    assert 'test_seconds_count{route="a\\\\b\\"c\\nd"} 1' in histogram.render()
+
+    monkeypatch.setattr(ps, "_model_bytes", {'X"\n': 10})
+    assert 'model_symbol_bytes{symbol="X\\"\\n"} 10' in ps.render_metrics().splitlines()
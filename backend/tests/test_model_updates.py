@@ -0,0 +1,35 @@
+import pytest
+
+import predict_stock as ps
+from conftest import synthetic_bars
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    backend = ps.CacheBackend(str(tmp_path))
+    registry = ps.ModelRegistry(backend)
+    monkeypatch.setattr(ps, "cache_backend", backend)
+    monkeypatch.setattr(ps, "model_registry", registry)
+    return registry
+
+
+def forest_size(registry, key: str) -> int:
+    return registry.native(key)["models"]["rf"].n_estimators
+
+
+def test_update_skipped_without_new_bars(registry):
+    longer = ps.add_technical_features(synthetic_bars(301, seed=3), 0.0)
+    df = longer.iloc[:-1]
+    ps.load_or_train_models("UPD", df, 20)
+    trees = forest_size(registry, "UPD")
+
+    # Re-adjusted history: new fingerprint, but no bar was appended
+    adjusted = df.copy()
+    adjusted.iloc[:50, adjusted.columns.get_loc("Close")] *= 1.001
+    entry, _, _ = ps.load_or_train_models("UPD", adjusted, 20)
+    assert entry["fingerprint"] == ps.data_fingerprint(adjusted, 20)
+    assert forest_size(registry, "UPD") == trees
+
+    # An appended bar extends the models
+    ps.load_or_train_models("UPD", longer, 20)
+    assert forest_size(registry, "UPD") == trees + ps.MODEL_UPDATE_TREES
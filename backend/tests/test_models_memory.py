@@ -0,0 +1,11 @@
+import asyncio
+
+import predict_stock as ps
+
+
+def test_models_memory_states_its_scope():
+    report = asyncio.run(ps.models_memory())
+    assert report["process"]["scope"] == "main process"
+    assert report["budgetPerProcess"] == ps.MODEL_MEMORY_BUDGET
+    if ps.MODEL_MEMORY_BUDGET:
+        assert report["maxTotalBudget"] == ps.MODEL_MEMORY_BUDGET * (ps.PREDICT_WORKERS + 1)
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import predict_stock as ps
+
+
+def test_is_due_leaves_cache_stats_and_order_alone(monkeypatch):
+    cache = ps.PredictionCache(max_entries=10, ttl=60)
+    monkeypatch.setattr(ps, "prediction_cache", cache)
+    stamp = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    for symbol in ("BTC-USD", "ETH-USD"):
+        cache.set(symbol, {"symbol": symbol, "timestamp": stamp})
+    before = cache.stats()
+
+    scheduler = ps.PrewarmScheduler(stocks=[], crypto=["BTC-USD", "ETH-USD", "SOL-USD"], concurrency=0)
+    assert not scheduler.is_due("BTC-USD", time.time(), in_session=False)  # just refreshed
+    assert scheduler.is_due("SOL-USD", time.time(), in_session=False)  # nothing cached
+
+    assert cache.stats() == before
+    assert list(cache._entries) == ["BTC-USD", "ETH-USD"]
+
+
+def test_worker_survives_a_cancelled_job(monkeypatch):
+    monkeypatch.setattr(ps, "admission", ps.AdmissionController(max_active=1, max_queue=4))
+
+    async def job(symbol):
+        if symbol == "BTC-USD":
+            await asyncio.sleep(10)  # cancelled below, like a dropped shared job
+        return {"symbol": symbol}
+
+    started = {}
+
+    def start_prediction(symbol, lookback, background=False):
+        started[symbol] = asyncio.ensure_future(job(symbol))
+        return started[symbol]
+
+    monkeypatch.setattr(ps, "_start_prediction", start_prediction)
+    scheduler = ps.PrewarmScheduler(stocks=[], crypto=["BTC-USD", "ETH-USD"], concurrency=1)
+
+    async def scenario():
+        scheduler._ready = asyncio.Event()
+        worker = asyncio.create_task(scheduler._worker())
+        scheduler._queue = [(0, 0, "BTC-USD"), (0, 1, "ETH-USD")]
+        scheduler._ready.set()
+        await asyncio.sleep(0.01)
+        started["BTC-USD"].cancel()
+        await asyncio.sleep(0.01)
+        alive = not worker.done()
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        return alive
+
+    assert asyncio.run(scenario())
+    assert scheduler.failed == 1
+    assert scheduler.refreshed == 1
+
+
+def test_lifespan_starts_and_stops_background_work(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    scheduler = ps.PrewarmScheduler(stocks=[], crypto=[], concurrency=1)
+    closed = []
+    monkeypatch.setattr(ps, "prewarm_scheduler", scheduler)
+    monkeypatch.setattr(ps, "IMPORT_WARMUP", False)
+    monkeypatch.setattr(ps, "shutdown_executor", lambda: closed.append("executor"))
+
+    with TestClient(ps.app):
+        assert scheduler.stats()["enabled"]
+    assert not scheduler.stats()["enabled"]
+    assert closed == ["executor"]
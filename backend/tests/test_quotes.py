@@ -0,0 +1,143 @@
+"""
+QuoteService micro-cache: hits within ttl, bulk and coalesced upstream
+fetches, and degraded answers when upstream fails.
+"""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import predict_stock as ps
+
+
+class Upstream:
+    """Counts bulk quote and info calls; can block or fail on demand."""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.fail = False
+        self.unknown = set()
+
+    def quotes(self, symbols):
+        self.calls.append(("quotes", tuple(symbols)))
+        self.gate.wait(5)
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return {s: {"symbol": s, "price": 100.0 + len(self.calls)}
+                for s in symbols if s not in self.unknown}
+
+    def info(self, symbol):
+        self.calls.append(("info", symbol))
+        return {"symbol": symbol, "price": 10.0, "name": f"{symbol} Inc.", "marketCap": 1e9}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = Upstream()
+    monkeypatch.setattr(ps, "fetch_quotes", fake.quotes)
+    monkeypatch.setattr(ps, "fetch_quote_info", fake.info)
+    monkeypatch.setattr(ps, "quote_service", ps.QuoteService(ttl=60, info_ttl=600))
+    return fake
+
+
+def expire(service, prefix="q:"):
+    """Age every cached entry under prefix past the price ttl."""
+    for key, (at, value) in list(service._cache.items()):
+        if key.startswith(prefix):
+            service._cache[key] = (at - service.ttl, value)
+
+
+def test_repeat_within_ttl_is_a_hit(upstream):
+    service = ps.quote_service
+
+    async def scenario():
+        first = await service.quotes(["AAPL", "MSFT"])
+        second = await service.quotes(["MSFT", "AAPL"])
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert upstream.calls == [("quotes", ("AAPL", "MSFT"))]
+    assert service.stats() == {"hits": 2, "upstreamCalls": 1}
+
+    expire(service)
+    asyncio.run(service.quotes(["AAPL"]))
+    assert upstream.calls[-1] == ("quotes", ("AAPL",))
+
+
+def test_misses_are_fetched_in_one_bulk_call(upstream):
+    service = ps.quote_service
+    asyncio.run(service.quotes(["AAPL"]))
+    asyncio.run(service.quotes(["AAPL", "MSFT", "NVDA"]))
+    assert upstream.calls == [("quotes", ("AAPL",)), ("quotes", ("MSFT", "NVDA"))]
+
+
+def test_concurrent_callers_share_one_fetch(upstream):
+    service = ps.quote_service
+    upstream.gate.clear()
+
+    async def scenario():
+        callers = [asyncio.create_task(service.quotes(["AAPL", "MSFT"])) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        upstream.gate.set()
+        return await asyncio.gather(*callers)
+
+    results = asyncio.run(scenario())
+    assert upstream.calls == [("quotes", ("AAPL", "MSFT"))]
+    assert all(r == results[0] for r in results)
+    assert not service._inflight
+
+
+def test_upstream_failure_reports_missing(upstream):
+    service = ps.quote_service
+    upstream.fail = True
+    assert asyncio.run(service.quotes(["AAPL"])) == {}
+
+    upstream.fail = False
+    upstream.unknown = {"NOPE"}
+    assert set(asyncio.run(service.quotes(["AAPL", "NOPE"]))) == {"AAPL"}
+
+
+def test_info_keeps_name_longer_than_price(upstream):
+    service = ps.quote_service
+
+    async def scenario():
+        first = await service.info("AAPL")
+        cached = await service.info("AAPL")
+        return first, cached
+
+    first, cached = asyncio.run(scenario())
+    assert cached == first and first["name"] == "AAPL Inc."
+    assert upstream.calls == [("info", "AAPL")]
+    # The info fetch also primes the price cache
+    assert "name" not in asyncio.run(service.quotes(["AAPL"]))["AAPL"]
+    assert len(upstream.calls) == 1
+
+    expire(service)  # price stale, name still fresh: refetched together
+    assert asyncio.run(service.info("AAPL"))["marketCap"] == 1e9
+    assert upstream.calls[-1] == ("info", "AAPL")
+
+
+def get(url):
+    async def call():
+        transport = httpx.ASGITransport(app=ps.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(url)
+    return asyncio.run(call())
+
+
+def test_quotes_endpoint(upstream):
+    upstream.unknown = {"NOPE"}
+    body = get("/quotes?symbols=aapl, NOPE,AAPL").json()
+    assert [q["symbol"] for q in body["quotes"]] == ["AAPL"]
+    assert body["missing"] == ["NOPE"]
+
+
+@pytest.mark.parametrize("symbols", [" , ", ",".join(f"S{i}" for i in range(ps.QUOTES_MAX_SYMBOLS + 1))])
+def test_quotes_endpoint_rejects_bad_lists(upstream, symbols):
+    assert get(f"/quotes?symbols={symbols}").status_code == 400
+    assert upstream.calls == []
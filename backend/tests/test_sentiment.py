@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+import pytest
+
+import predict_stock as ps
+
+RATE_LIMITED = {"status": "error", "code": "rateLimited", "message": "Too many requests"}
+GOOD = {"status": "ok", "articles": [{"title": "Record profits", "description": "Great quarter",
+                                      "url": "https://example.com/a"}]}
+
+
+class FakeSession:
+    def __init__(self, status_code, body):
+        self.status_code, self.body = status_code, body
+
+    def get(self, url, params=None, timeout=None):
+        return httpx.Response(self.status_code, json=self.body, request=httpx.Request("GET", url))
+
+
+@pytest.fixture
+def service():
+    if not ps.HAS_VADER:
+        pytest.skip("vaderSentiment not installed")
+    svc = ps.SentimentService(api_key="test", ttl=0, stale_ttl=0)
+    svc._store("AAPL", 0.6)  # a good score, already expired (ttl=0)
+    return svc
+
+
+@pytest.mark.parametrize("status_code, body", [(200, RATE_LIMITED), (429, RATE_LIMITED), (500, {})])
+def test_get_keeps_last_good_score_on_errors(service, status_code, body):
+    service._session = FakeSession(status_code, body)
+    assert service.get("AAPL") == 0.6
+    assert service._scores["AAPL"][0] == 0.6
+
+
+@pytest.mark.parametrize("status_code, body", [(200, RATE_LIMITED), (429, RATE_LIMITED)])
+def test_async_fetch_keeps_last_good_score_on_errors(service, status_code, body):
+    if not ps.HAS_HTTPX:
+        pytest.skip("httpx not installed")
+
+    async def scenario():
+        service._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(status_code, json=body)))
+        try:
+            return await service.aget("AAPL")
+        finally:
+            await service.aclose()
+
+    assert asyncio.run(scenario()) == 0.6
+    assert service._scores["AAPL"][0] == 0.6
+
+
+def test_good_response_is_scored_and_cached(service):
+    service._session = FakeSession(200, GOOD)
+    score = service.get("AAPL")
+    assert score > 0 and score != 0.6
+    assert service._scores["AAPL"][0] == score
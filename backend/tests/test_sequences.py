@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import predict_stock as ps
+
+
+def copied_sequences(X, y, lookback):
+    """The original list-of-copies create_sequences()."""
+    Xs, ys = [], []
+    for i in range(len(X) - lookback):
+        Xs.append(X[i:i + lookback])
+        ys.append(y[i + lookback])
+    return np.array(Xs), np.array(ys)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(200, 15)), rng.normal(size=200)
+
+
+@pytest.mark.parametrize("lookback", [1, 20, 199])
+def test_windows_match_copies(data, lookback):
+    X, y = data
+    X_seq, y_seq = ps.create_sequences(X, y, lookback)
+    X_ref, y_ref = copied_sequences(X, y, lookback)
+
+    np.testing.assert_array_equal(X_seq, X_ref)
+    np.testing.assert_array_equal(y_seq, y_ref)
+    assert np.shares_memory(X_seq, X)  # a view, not a copy
+    assert not X_seq.flags.writeable
+
+
+def test_last_only_is_the_final_window(data):
+    X, y = data
+    X_last, y_last = ps.create_sequences(X, y, 20, last_only=True)
+    X_ref, y_ref = copied_sequences(X, y, 20)
+
+    np.testing.assert_array_equal(X_last, X_ref[-1:])
+    np.testing.assert_array_equal(y_last, y_ref[-1:])
+
+
+def test_too_short_gives_no_windows(data):
+    X, y = data
+    X_seq, y_seq = ps.create_sequences(X[:20], y[:20], 20)
+    assert X_seq.shape == (0, 20, 15) and len(y_seq) == 0
+
+
+def test_lstm_trains_the_same_on_the_window_view(data):
+    X, y = data
+    X_seq, y_seq = ps.create_sequences(X, y, 20)
+
+    states = []
+    for windows in (X_seq, np.array(X_seq)):
+        ps.torch.manual_seed(0)
+        model, _ = ps.train_lstm(windows, y_seq, n_features=15, epochs=2, time_budget=60)
+        states.append(model.state_dict())
+
+    for name, value in states[0].items():
+        assert ps.torch.equal(value, states[1][name]), name
@@ -0,0 +1,30 @@
+import os
+import sys
+import subprocess
+
+import numpy as np
+
+import predict_stock as ps
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_serve_only_warmup_skips_training_stacks():
+    code = (
+        "import sys, predict_stock as ps; ps.warm_imports(); "
+        "print(','.join(m for m in ('torch', 'sklearn', 'xgboost') if m in sys.modules))"
+    )
+    env = dict(os.environ, SERVE_ONLY="1")
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, env=env,
+        capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_broken_xgboost_install_disables_the_model(monkeypatch):
+    monkeypatch.setattr(ps, "HAS_XGB", True)
+    monkeypatch.setattr(ps, "xgb", ps.LazyModule("xgboost_broken_install"))
+
+    X, y = np.random.rand(50, 3), np.random.rand(50)
+    assert ps.train_xgboost(X, y) is None
+    assert ps.HAS_XGB is False